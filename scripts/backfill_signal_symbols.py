@@ -0,0 +1,68 @@
+"""Fill in signals.symbol for signals stored before the parser recorded the traded pair.
+
+Each signal without a symbol is matched to the message it was parsed from: a
+telegram_messages row of its source's group whose message_date equals the
+signal's creation_time. The pair is taken from that text with extract_symbol.
+Signals are left without a symbol, and so stay out of backtests, when:
+- the message is gone (retention dropped its partition);
+- the signal was created without a message date, so creation_time is the
+  ingestion time and matches nothing;
+- several messages of the group share that second and name different pairs;
+- the text names no recognizable pair.
+
+    python -m scripts.backfill_signal_symbols --batch 5000 [--dry-run]
+"""
+import argparse
+import logging
+from collections import Counter
+from src.database.connection import db
+from src.database.queries_signals import SignalQueries
+from src.parser.signal_parser import extract_symbol
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(batch: int, dry_run: bool = False) -> Counter:
+    counts = Counter()
+    after_id = 0
+    while True:
+        rows = SignalQueries.get_symbol_backfill_page(after_id, batch)
+        if not rows:
+            return counts
+        candidates = {}
+        for signal_id, text in rows:
+            found = candidates.setdefault(signal_id, set())
+            if text is not None:
+                found.add(extract_symbol(text))
+        symbols = {}
+        for signal_id, found in candidates.items():
+            found.discard(None)
+            if len(found) == 1:
+                symbols[signal_id] = found.pop()
+            else:
+                counts['ambiguous' if found else 'unmatched'] += 1
+        counts['signals'] += len(candidates)
+        counts['updated'] += len(symbols) if dry_run else SignalQueries.set_signal_symbols(symbols)
+        after_id = max(candidates)
+        logger.info(f"Backfill: {dict(counts)} (through signal {after_id})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch', type=int, default=5000, help="signals per page")
+    parser.add_argument('--dry-run', action='store_true', help="report what would be set without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db.connect()
+    try:
+        counts = backfill(args.batch, args.dry_run)
+    finally:
+        db.disconnect()
+    print(f"{counts['signals']} signal(s) without a symbol: {counts['updated']} "
+          f"{'would be ' if args.dry_run else ''}set, {counts['unmatched']} without a message naming a pair, "
+          f"{counts['ambiguous']} ambiguous")
+
+
+if __name__ == '__main__':
+    main()
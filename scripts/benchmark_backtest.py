@@ -0,0 +1,148 @@
+"""Benchmark the vectorized signal backtester on synthetic candles and signals, and check it against a plain loop.
+
+Each pair gets a seeded random walk of 1-minute candles, and signals are drawn at
+random times with entries at the market and targets / stops a few percent away
+(some with fewer than four targets). The full set is backtested in one process
+and then across worker processes. A sample is replayed candle by candle with a
+straightforward loop, and the two must agree. No database is needed.
+
+    python -m scripts.benchmark_backtest --signals 300000 --symbols 30 --days 365
+"""
+import argparse
+import time
+import numpy as np
+from src.trading.backtest import (
+    MAX_TAKE_PROFITS, NO_DATA, OPEN, OUTCOMES, SL, TP1, Candles, SignalBatch, run_backtest
+)
+
+START_MS = 1_704_067_200_000  # 2024-01-01
+MINUTE_MS = 60_000
+
+
+class RandomWalkCandles:
+    """Deterministic 1-minute candles per symbol; picklable like the real candle sources"""
+
+    def __init__(self, days: int, seed: int):
+        self.days = days
+        self.seed = seed
+
+    def load(self, symbol: str) -> Candles:
+        rng = np.random.default_rng([self.seed, int(symbol[3:-4])])
+        count = self.days * 24 * 60
+        close = rng.uniform(0.1, 50000) * np.exp(np.cumsum(rng.normal(0, 0.0015, count)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        wick = np.abs(rng.normal(0, 0.001, (2, count)))
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        return Candles(START_MS + np.arange(count, dtype=np.int64) * MINUTE_MS, open_, high, low, close,
+                       rng.uniform(1, 100, count))
+
+
+def make_signals(count, symbols, candles_source, days, seed):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"SYN{n}USDT" for n in range(symbols)], dtype=object)
+    symbol_codes = rng.integers(0, symbols, count)
+    # Leave the last day without signals so most windows have candles, but not all
+    times = START_MS + rng.integers(0, (days - 1) * 24 * 60, count) * MINUTE_MS + rng.integers(0, MINUTE_MS, count)
+    entries = np.empty(count)
+    for code in range(symbols):
+        mask = symbol_codes == code
+        candles = candles_source.load(names[code])
+        entries[mask] = candles.close[np.searchsorted(candles.times, times[mask], 'right') - 1]
+    side = np.where(rng.random(count) < 0.5, 1.0, -1.0)
+    step = rng.uniform(0.005, 0.03, count) * side
+    take_profits = entries[:, None] * (1 + step[:, None] * np.arange(1, MAX_TAKE_PROFITS + 1))
+    targets = rng.integers(1, MAX_TAKE_PROFITS + 1, count)
+    take_profits[np.arange(MAX_TAKE_PROFITS) >= targets[:, None]] = np.nan
+    stop_losses = entries * (1 - step * rng.uniform(0.5, 2, count))
+    sources = np.array([f"source-{n}" for n in range(8)], dtype=object)[rng.integers(0, 8, count)]
+    return SignalBatch(np.arange(count, dtype=np.int64), times, sources, names[symbol_codes],
+                       entries, take_profits, stop_losses)
+
+
+def replay(batch, index, candles, horizon_ms):
+    """One signal, candle by candle: (outcome, targets hit, pnl %) with the stop first on shared candles"""
+    entry, stop_loss = batch.entries[index], batch.stop_losses[index]
+    take_profits = [tp for tp in batch.take_profits[index] if not np.isnan(tp)]
+    long = take_profits[0] > entry
+    start = np.searchsorted(candles.times, batch.times[index], 'left')
+    stop = np.searchsorted(candles.times, batch.times[index] + horizon_ms, 'left')
+    if stop <= start:
+        return NO_DATA, 0, None
+    hit = 0
+    realized = 0.0
+    share = 1 / len(take_profits)
+    for n in range(start, stop):
+        high, low = candles.high[n], candles.low[n]
+        if (low <= stop_loss) if long else (high >= stop_loss):
+            exit_return = (stop_loss - entry) / entry * (1 if long else -1)
+            pnl = realized + (1 - hit * share) * exit_return
+            return (TP1 - 1 + hit if hit else SL), hit, pnl * 100
+        while hit < len(take_profits) and ((high >= take_profits[hit]) if long else (low <= take_profits[hit])):
+            realized += (take_profits[hit] - entry) / entry * (1 if long else -1) * share
+            hit += 1
+        if hit == len(take_profits):
+            return TP1 - 1 + hit, hit, realized * 100
+    exit_return = (candles.close[stop - 1] - entry) / entry * (1 if long else -1)
+    pnl = realized + (1 - hit * share) * exit_return
+    return (TP1 - 1 + hit if hit else OPEN), hit, pnl * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signals', type=int, default=300000)
+    parser.add_argument('--symbols', type=int, default=30)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--horizon-hours', type=float, default=168)
+    parser.add_argument('--workers', type=int, default=0, help="processes for the parallel run (0 = one per CPU)")
+    parser.add_argument('--check', type=int, default=500, help="signals to verify against the plain loop")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    candles_source = RandomWalkCandles(args.days, args.seed)
+    started = time.perf_counter()
+    batch = make_signals(args.signals, args.symbols, candles_source, args.days, args.seed)
+    print(f"generated {len(batch):,} signals over {args.symbols} pairs x {args.days * 1440:,} candles "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    serial = run_backtest(batch, candles_source, args.horizon_hours, workers=1)
+    serial_elapsed = time.perf_counter() - started
+    print(f"1 process:   {serial_elapsed:.2f}s ({len(batch) / serial_elapsed:,.0f} signals/s, "
+          f"including loading the candles)")
+    started = time.perf_counter()
+    parallel = run_backtest(batch, candles_source, args.horizon_hours, workers=args.workers or None)
+    parallel_elapsed = time.perf_counter() - started
+    print(f"parallel:    {parallel_elapsed:.2f}s ({len(batch) / parallel_elapsed:,.0f} signals/s)")
+    assert all(np.array_equal(serial.columns[name], parallel.columns[name], equal_nan=True)
+               for name in serial.columns), "parallel run differs from the serial one"
+
+    rng = np.random.default_rng(args.seed + 1)
+    sample = rng.choice(len(batch), min(args.check, len(batch)), replace=False)
+    horizon_ms = int(args.horizon_hours * 3600 * 1000)
+    loaded = {}
+    mismatches = 0
+    started = time.perf_counter()
+    for index in sample.tolist():
+        symbol = batch.symbols[index]
+        if symbol not in loaded:
+            loaded[symbol] = candles_source.load(symbol)
+        outcome, hit, pnl = replay(batch, index, loaded[symbol], horizon_ms)
+        got_pnl = parallel.columns['pnl_pct'][index]
+        if (outcome != parallel.columns['outcome'][index] or hit != parallel.columns['targets_hit'][index]
+                or (pnl is None) != np.isnan(got_pnl) or (pnl is not None and abs(pnl - got_pnl) > 1e-9)):
+            mismatches += 1
+    loop_elapsed = time.perf_counter() - started
+    print(f"plain loop:  {len(sample) / loop_elapsed:,.0f} signals/s on a {len(sample)} signal sample; "
+          f"{len(sample) - mismatches}/{len(sample)} agree with the vectorized result")
+
+    counts = np.bincount(parallel.columns['outcome'], minlength=len(OUTCOMES))
+    print("outcomes: " + ', '.join(f"{name}={count:,}" for name, count in zip(OUTCOMES, counts.tolist())))
+    for source, stats in parallel.by_source().items():
+        print(f"  {source}: {stats['evaluated']:,} evaluated, win {stats['win_rate']:.1%}, "
+              f"avg {stats['avg_pnl_pct']:+.2f}%, SL {stats['sl_rate']:.1%}, TP1 {stats['tp1_rate']:.1%}, "
+              f"TP4 {stats['tp4_rate']:.1%}, median first hit {stats['median_first_hit_min']:.0f} min")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark CandleStore range reads against fetching the same candles from PostgreSQL.
+
+Generates --symbols random-walk series of 1-minute candles and writes them as
+kline CSVs. It bulk loads them into a temporary CandleStore and times
+one-candle incremental appends. The same candles are COPYed into a scratch
+benchmark_candles table (TIMESTAMP open time, DECIMAL(18, 8) prices like the
+rest of the schema, keyed on symbol and time). Then the same random time ranges
+are read both ways into NumPy arrays, checking that the results match. The
+table and files are removed afterwards.
+
+    python -m scripts.benchmark_candle_store --symbols 10 --days 90 --reads 2000 --range-hours 24
+"""
+import argparse
+import io
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from src.database.candle_store import CandleStore, Candles
+from src.database.connection import db
+
+START_MS = 1_704_067_200_000  # 2024-01-01
+MINUTE_MS = 60_000
+EPOCH = np.datetime64(0, 'ms')
+EPOCH_DATETIME = datetime(1970, 1, 1)
+
+
+def make_candles(days, rng):
+    count = days * 24 * 60
+    close = np.round(rng.uniform(0.1, 50000) * np.exp(np.cumsum(rng.normal(0, 0.0015, count))), 8)
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, count))), 8)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, count))), 8)
+    volume = np.round(rng.uniform(1, 1000, count), 8)
+    return Candles(START_MS + np.arange(count, dtype=np.int64) * MINUTE_MS, open_, high, low, close, volume)
+
+
+def write_csv(path, candles):
+    with open(path, 'w') as f:
+        f.write("open_time,open,high,low,close,volume\n")
+        np.savetxt(f, np.column_stack(candles), delimiter=',', fmt=['%d'] + ['%.8f'] * 5)
+
+
+def copy_to_postgres(symbol, candles):
+    text = io.StringIO()
+    stamps = np.datetime_as_string(candles.times.astype('datetime64[ms]'))
+    for row in zip(stamps.tolist(), *(column.tolist() for column in candles[1:])):
+        text.write(f"{symbol},{row[0]},{row[1]:.8f},{row[2]:.8f},{row[3]:.8f},{row[4]:.8f},{row[5]:.8f}\n")
+    text.seek(0)
+    with db.get_cursor() as cursor:
+        cursor.copy_expert("COPY benchmark_candles FROM STDIN WITH (FORMAT csv)", text)
+
+
+def read_postgres(symbol, start, end, as_float):
+    """The rows of one range, converted to NumPy columns as a backtest would need them"""
+    columns = ("(EXTRACT(EPOCH FROM open_time) * 1000)::bigint, open::float8, high::float8, low::float8, "
+               "close::float8, volume::float8") if as_float else "open_time, open, high, low, close, volume"
+    with db.get_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {columns} FROM benchmark_candles
+            WHERE symbol = %s AND open_time >= %s AND open_time < %s
+            ORDER BY open_time
+        """, (symbol, *(EPOCH_DATETIME + timedelta(milliseconds=int(value)) for value in (start, end))))
+        rows = cursor.fetchall()
+    if not rows:
+        return Candles(*(np.empty(0) for _ in range(6)))
+    times, *prices = zip(*rows)
+    if as_float:
+        times = np.array(times, dtype=np.int64)
+    else:
+        times = (np.array(times, dtype='datetime64[ms]') - EPOCH).astype(np.int64)
+    return Candles(times, *(np.array(column, dtype=np.float64) for column in prices))
+
+
+def timed_reads(label, ranges, read):
+    latencies = []
+    results = []
+    for symbol, start, end in ranges:
+        started = time.perf_counter()
+        candles = read(symbol, start, end)
+        # Touch the data so lazily mapped pages are really read
+        float(candles.close.sum())
+        latencies.append(time.perf_counter() - started)
+        results.append(candles)
+    latencies = np.array(latencies) * 1e6
+    rows = sum(len(candles) for candles in results)
+    print(f"{label:28} {len(ranges) / latencies.sum() * 1e6:>10,.0f} reads/s  p50 {np.percentile(latencies, 50):>8.1f} us  "
+          f"p99 {np.percentile(latencies, 99):>8.1f} us  ({rows / len(ranges):,.0f} candles each)")
+    return latencies.sum(), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--range-hours', type=float, default=24)
+    parser.add_argument('--appends', type=int, default=20000, help="one-candle appends to time")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    directory = tempfile.mkdtemp(prefix='candles-')
+    symbols = [f"BENCH{n}USDT" for n in range(args.symbols)]
+    series = {symbol: make_candles(args.days, rng) for symbol in symbols}
+    total = sum(len(candles) for candles in series.values())
+    for symbol, candles in series.items():
+        write_csv(f"{directory}/{symbol}_1m.csv", candles)
+
+    db.connect()
+    try:
+        store = CandleStore(f"{directory}/store")
+        started = time.perf_counter()
+        for symbol in symbols:
+            store.load_csv(f"{directory}/{symbol}_1m.csv", symbol)
+        elapsed = time.perf_counter() - started
+        print(f"bulk CSV load: {total:,} candles in {elapsed:.2f}s ({total / elapsed:,.0f} candles/s)")
+
+        live = make_candles(max(1, args.appends // 1440 + 1), rng)
+        started = time.perf_counter()
+        for n in range(args.appends):
+            store.append('LIVEUSDT', Candles(*(column[n:n + 1] for column in live)))
+        elapsed = time.perf_counter() - started
+        print(f"incremental append: {args.appends / elapsed:,.0f} one-candle appends/s "
+              f"({elapsed / args.appends * 1e6:.1f} us each)")
+
+        with db.get_cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS benchmark_candles")
+            cursor.execute("""
+                CREATE TABLE benchmark_candles (
+                    symbol VARCHAR(20) NOT NULL,
+                    open_time TIMESTAMP NOT NULL,
+                    open DECIMAL(18, 8), high DECIMAL(18, 8), low DECIMAL(18, 8),
+                    close DECIMAL(18, 8), volume DECIMAL(18, 8),
+                    PRIMARY KEY (symbol, open_time)
+                )
+            """)
+        started = time.perf_counter()
+        for symbol, candles in series.items():
+            copy_to_postgres(symbol, candles)
+        with db.get_cursor() as cursor:
+            cursor.execute("ANALYZE benchmark_candles")
+        print(f"PostgreSQL COPY: {total:,} rows in {time.perf_counter() - started:.2f}s")
+
+        span = int(args.range_hours * 3600 * 1000)
+        last = START_MS + args.days * 86_400_000 - span
+        ranges = [(symbols[rng.integers(len(symbols))], start, start + span)
+                  for start in (START_MS + rng.integers(0, (last - START_MS) // MINUTE_MS, args.reads) * MINUTE_MS)]
+
+        reader = CandleStore(f"{directory}/store", readonly=True)
+        store_time, store_results = timed_reads("CandleStore range", ranges, reader.range)
+        float_time, float_results = timed_reads(
+            "PostgreSQL (float8 casts)", ranges, lambda *key: read_postgres(*key, as_float=True))
+        decimal_time, decimal_results = timed_reads(
+            "PostgreSQL (DECIMAL rows)", ranges, lambda *key: read_postgres(*key, as_float=False))
+        mismatches = sum(
+            not all(np.array_equal(a, b) for a, b in zip(ours, theirs)) or
+            not all(np.array_equal(a, b) for a, b in zip(ours, decimal))
+            for ours, theirs, decimal in zip(store_results, float_results, decimal_results))
+        print(f"store is {float_time / store_time:,.0f}x faster than float8 reads and "
+              f"{decimal_time / store_time:,.0f}x faster than DECIMAL reads; "
+              f"{len(ranges) - mismatches}/{len(ranges)} ranges identical")
+
+        symbol = symbols[0]
+        started = time.perf_counter()
+        whole = reader.range(symbol)
+        float(whole.close.sum())
+        store_scan = time.perf_counter() - started
+        started = time.perf_counter()
+        read_postgres(symbol, START_MS, START_MS + args.days * 86_400_000, as_float=True)
+        postgres_scan = time.perf_counter() - started
+        print(f"full series ({len(whole):,} candles): store {store_scan * 1000:.2f} ms, "
+              f"PostgreSQL {postgres_scan * 1000:.1f} ms")
+        reader.close()
+        store.close()
+    finally:
+        with db.get_cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS benchmark_candles")
+        db.disconnect()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark bytes and latency per poll of the REST list endpoints with and without
+conditional GETs and gzip.
+
+Runs the Flask app in-process against the configured database; list sizes are
+whatever the database currently holds.
+
+    python -m scripts.benchmark_conditional_get --polls 200
+"""
+import argparse
+import logging
+import time
+from src.web.app import app
+from src.web.conditional import table_versions
+
+ENDPOINTS = [
+    '/api/exchanges',
+    '/api/sources',
+    '/api/trading-pairs',
+    '/api/exchange-trading-pairs',
+    '/api/signals?limit=1000',
+]
+
+
+def poll(client, url, polls, headers=None):
+    """Return (average bytes, average seconds, last response) over `polls` requests"""
+    total_bytes = 0
+    started = time.perf_counter()
+    for _ in range(polls):
+        response = client.get(url, headers=headers or {})
+        total_bytes += len(response.get_data())
+    elapsed = time.perf_counter() - started
+    return total_bytes / polls, elapsed / polls, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polls', type=int, default=200)
+    args = parser.parse_args()
+
+    deadline = time.monotonic() + 5
+    while not table_versions.connected and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    client = app.test_client()
+    print(f"{'endpoint':32} {'full':>18} {'gzip':>18} {'304':>18}")
+    for url in ENDPOINTS:
+        full_bytes, full_time, response = poll(client, url, args.polls)
+        gzip_bytes, gzip_time, _ = poll(client, url, args.polls, {'Accept-Encoding': 'gzip'})
+        etag = response.headers.get('ETag')
+        cond_bytes, cond_time, cond = poll(client, url, args.polls, {'If-None-Match': etag})
+        assert cond.status_code == 304, cond.status_code
+        print(f"{url:32} {full_bytes:8.0f}B {full_time * 1000:6.2f}ms "
+              f"{gzip_bytes:8.0f}B {gzip_time * 1000:6.2f}ms "
+              f"{cond_bytes:8.0f}B {cond_time * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    # app.py configures INFO logging on import
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark Telegram message ingestion: per-row save_message vs. buffered bulk inserts.
+
+Requires a migrated database (see src/database/migration_runner.py). Rows are written
+under a dedicated group_id and removed afterwards.
+
+    python -m scripts.benchmark_message_ingestion --messages 5000
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from src.database.connection import db
+from src.database.message_buffer import MessageBuffer
+from src.database.queries import MessageQueries
+
+BENCH_GROUP_ID = -999000111
+
+
+def bench_per_row(count):
+    started = time.perf_counter()
+    for i in range(count):
+        MessageQueries.save_message(f"LONG BTCUSDT entry {i}", datetime.now(), 1, "bench", BENCH_GROUP_ID)
+    return time.perf_counter() - started
+
+
+def bench_buffered(count, batch_size):
+    started = time.perf_counter()
+    with MessageBuffer(max_size=batch_size) as buffer:
+        futures = [
+            buffer.add(f"LONG BTCUSDT entry {i}", datetime.now(), 1, "bench", BENCH_GROUP_ID)
+            for i in range(count)
+        ]
+    ids = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    assert len(set(ids)) == count
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    db.connect()
+    try:
+        per_row = bench_per_row(args.messages)
+        buffered = bench_buffered(args.messages, args.batch_size)
+        print(f"per-row save_message : {args.messages / per_row:10.0f} msg/s ({per_row:.2f}s)")
+        print(f"buffered (batch={args.batch_size}): {args.messages / buffered:10.0f} msg/s ({buffered:.2f}s)")
+        print(f"speedup              : {per_row / buffered:10.1f}x")
+    finally:
+        db.execute_update("DELETE FROM telegram_messages WHERE group_id = %s", (BENCH_GROUP_ID,))
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
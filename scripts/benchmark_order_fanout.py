@@ -0,0 +1,102 @@
+"""Fan out signal orders to mock MEXC and Kraken servers and report where the time goes.
+
+Starts one scripts.mock_exchange server per venue, each with its own response
+latency. It places every signal's orders one exchange after the other (the
+executeTrade flow) and then concurrently through ExecutionEngine. Finally it
+makes one venue slower than its order timeout to show timeouts and late-ack
+cancellation. Events are written to exchange_events, and the per-exchange
+latency summary is read back from there.
+
+    python -m scripts.benchmark_order_fanout --signals 50 --mexc-latency 0.02 --kraken-latency 0.05
+"""
+import argparse
+import time
+from datetime import datetime
+from src.database.connection import db
+from src.database.event_buffer import ExchangeEventBuffer
+from src.database.queries import ExchangeEventQueries
+from src.exchanges.kraken import Kraken
+from src.exchanges.mexc import MEXC
+from src.trading.execution import ExecutionEngine, OrderRequest
+from scripts.mock_exchange import KRAKEN_KEY, KRAKEN_SECRET, MEXC_KEY, MEXC_SECRET, serve
+
+ORDERS = [OrderRequest('MEXC', 'BTCUSDT', 'LONG', '0.01'), OrderRequest('KRAKEN', 'XBTUSD', 'LONG', '0.01')]
+
+
+def make_clients(mexc_url, kraken_url, signals):
+    clients = {'MEXC': MEXC(MEXC_KEY, MEXC_SECRET, mexc_url), 'KRAKEN': Kraken(KRAKEN_KEY, KRAKEN_SECRET, kraken_url)}
+    kraken = clients['KRAKEN']
+    kraken._trading_bucket('XBTUSD')
+    # Kraken's private limits would otherwise throttle the run; measure transport and fan-out only
+    for client in clients.values():
+        for bucket in client.buckets().values():
+            bucket.capacity = bucket._tokens = max(bucket.capacity, signals * 4)
+    return clients
+
+
+def report(label, engine, elapsed, signals):
+    stats = engine.stats()
+    print(f"{label}: {signals / elapsed:,.1f} signals/s, placed={stats['placed']} rejected={stats['rejected']} "
+          f"timeouts={stats['timeouts']} late_acks={stats['late_acks']} cancelled={stats['cancelled']}")
+    for name, snapshot in stats['signal_to_ack'].items():
+        if snapshot['count']:
+            print(f"  {name:7} signal-to-ack p50={snapshot['p50_ms']:.1f}ms p99={snapshot['p99_ms']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signals', type=int, default=50)
+    parser.add_argument('--mexc-latency', type=float, default=0.02)
+    parser.add_argument('--kraken-latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    db.connect()
+    mexc_server, mexc_url = serve(latency=args.mexc_latency)
+    kraken_server, kraken_url = serve(latency=args.kraken_latency)
+    clients = make_clients(mexc_url, kraken_url, args.signals)
+    started_at = datetime.now()
+
+    events = ExchangeEventBuffer()
+    sequential = ExecutionEngine(events, max_workers=1, exchange_factory=clients.__getitem__)
+    started = time.perf_counter()
+    for signal_id in range(args.signals):
+        # One exchange at a time, as executeTrade does
+        for order in ORDERS:
+            sequential.execute(signal_id, [order])
+    report("sequential", sequential, time.perf_counter() - started, args.signals)
+
+    concurrent = ExecutionEngine(events, exchange_factory=clients.__getitem__)
+    started = time.perf_counter()
+    for signal_id in range(args.signals):
+        concurrent.execute(signal_id, ORDERS)
+    report("concurrent", concurrent, time.perf_counter() - started, args.signals)
+
+    # Kraken now answers after its order timeout: the signal returns at the deadline,
+    # and the late acks are cancelled on the exchange
+    kraken_server.RequestHandlerClass.state.latency = 0.3
+    timeouts = ExecutionEngine(events, timeouts={'KRAKEN': 0.1}, exchange_factory=clients.__getitem__)
+    started = time.perf_counter()
+    for signal_id in range(5):
+        results = timeouts.execute(signal_id, ORDERS)
+    elapsed = time.perf_counter() - started
+    # Let the late acks arrive and their cancels complete
+    time.sleep(0.8)
+    report("kraken over its timeout", timeouts, elapsed, 5)
+    print(f"  last signal: {results}")
+
+    for engine in (sequential, concurrent, timeouts):
+        engine.close()
+    events.close()
+    print(f"events: {events.stats()}")
+    for row in ExchangeEventQueries.get_order_latency(started_at):
+        print(f"  {row['exchange']:7} orders={row['orders']} p50={row['p50_ms']:.1f}ms p99={row['p99_ms']:.1f}ms "
+              f"queue={row['mean_queue_ms']:.2f}ms exchange={row['mean_exchange_ms']:.1f}ms")
+    for client in clients.values():
+        client.close()
+    mexc_server.shutdown()
+    kraken_server.shutdown()
+    db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
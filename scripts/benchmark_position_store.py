@@ -0,0 +1,147 @@
+"""Benchmark the write-behind PositionStore against per-change UPDATEs, then check crash recovery.
+
+Creates --positions open trades and positions in the configured database. It
+reprices them from random-walk ticks, once with a synchronous
+PositionQueries.update_position_price per change and once through PositionStore.
+It then makes more changes, including closes, and abandons the store without
+flushing, as a crash would. A fresh store recovers from the database plus the
+journal, and the script checks that it matches. The rows it created are deleted
+afterwards.
+
+    python -m scripts.benchmark_position_store --positions 2000 --symbols 100 --ticks 20000
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from psycopg2.extras import execute_values
+from src.database.connection import db
+from src.database.queries import PositionQueries
+from src.trading.position_store import PositionStore
+
+
+def create_book(positions, symbols, rng):
+    prices = {f"BENCH{n}USDT": rng.uniform(1, 1000) for n in range(symbols)}
+    names = list(prices)
+    trades = [(symbol, prices[symbol] * rng.uniform(0.98, 1.02), rng.uniform(0.1, 10),
+               rng.choice(['LONG', 'SHORT']), 'MEXC')
+              for symbol in (rng.choice(names) for _ in range(positions))]
+    with db.get_cursor() as cursor:
+        trade_ids = [row[0] for row in execute_values(cursor, """
+            INSERT INTO trades (symbol, entry_price, quantity, position_type, exchange) VALUES %s RETURNING id
+            """, trades, page_size=1000, fetch=True)]
+        position_ids = [row[0] for row in execute_values(cursor, """
+            INSERT INTO positions (trade_id, exchange, monitoring) VALUES %s RETURNING id
+            """, [(trade_id, 'MEXC', True) for trade_id in trade_ids], page_size=1000, fetch=True)]
+    return prices, trades, trade_ids, position_ids
+
+
+def delete_book(trade_ids):
+    with db.get_cursor() as cursor:
+        cursor.execute("DELETE FROM positions WHERE trade_id = ANY(%s)", (trade_ids,))
+        cursor.execute("DELETE FROM trades WHERE id = ANY(%s)", (trade_ids,))
+
+
+def make_ticks(prices, count, rng):
+    prices = dict(prices)
+    names = list(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(names)
+        prices[symbol] *= 1 + rng.gauss(0, 0.002)
+        ticks.append((symbol, prices[symbol]))
+    return ticks
+
+
+def db_state(position_ids):
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT p.id, p.current_price, p.current_profit_loss, p.monitoring, t.status, t.exit_price
+            FROM positions p JOIN trades t ON t.id = p.trade_id WHERE p.id = ANY(%s) ORDER BY p.id
+            """, (position_ids,))
+        return {row[0]: row[1:] for row in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=2000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--ticks', type=int, default=20000)
+    parser.add_argument('--sync-changes', type=int, default=2000,
+                        help="position updates to time on the synchronous path")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db.connect()
+    prices, trades, trade_ids, position_ids = create_book(args.positions, args.symbols, rng)
+    by_symbol = {}
+    for (symbol, entry, quantity, side, _), position_id in zip(trades, position_ids):
+        by_symbol.setdefault(symbol, []).append((position_id, entry, quantity, -1 if side == 'SHORT' else 1))
+    ticks = make_ticks(prices, args.ticks, rng)
+    journal_dir = tempfile.mkdtemp(prefix='position-journal-')
+    try:
+        changes = 0
+        started = time.perf_counter()
+        for symbol, price in ticks:
+            for position_id, entry, quantity, sign in by_symbol[symbol]:
+                PositionQueries.update_position_price(position_id, price, (price - entry) * quantity * sign)
+                changes += 1
+            if changes >= args.sync_changes:
+                break
+        sync_elapsed = time.perf_counter() - started
+        print(f"synchronous UPDATE per change: {changes / sync_elapsed:,.0f} changes/s "
+              f"({sync_elapsed / changes * 1e6:.0f} us each)")
+
+        store = PositionStore(f"{journal_dir}/positions.journal", flush_interval=3600)
+        store.recover()
+        repriced = 0
+        started = time.perf_counter()
+        for symbol, price in ticks:
+            repriced += store.apply_prices({('MEXC', symbol): price})
+        store.journal.sync()
+        store_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        rows = store.flush()
+        flush_elapsed = time.perf_counter() - started
+        print(f"PositionStore: {repriced / store_elapsed:,.0f} changes/s "
+              f"({store_elapsed / repriced * 1e6:.2f} us each, {len(ticks) / store_elapsed:,.0f} ticks/s); "
+              f"one flush of {rows} rows took {flush_elapsed * 1000:.1f} ms")
+
+        # Changes after the last flush, then a crash: no flush, only the journal survives
+        for symbol, price in make_ticks(prices, 2000, rng):
+            store.apply_prices({('MEXC', symbol): price})
+        closed = rng.sample(range(len(position_ids)), max(1, len(position_ids) // 10))
+        for n in closed:
+            store.close_trade(trade_ids[n], store.get(position_ids[n])['current_price'])
+            store.close_position(position_ids[n])
+        store.journal.sync()
+        ours = set(position_ids)
+        expected = {row['position_id']: row for row in store.positions() if row['position_id'] in ours}
+        print(f"crash with {store.stats()['dirty_positions']} unflushed positions and "
+              f"{store.stats()['dirty_trades']} unflushed trade closes")
+        del store
+
+        recovered = PositionStore(f"{journal_dir}/positions.journal", flush_interval=3600)
+        started = time.perf_counter()
+        replayed = recovered.recover()
+        print(f"recovery replayed {replayed} journal records in {(time.perf_counter() - started) * 1000:.1f} ms")
+        state = db_state(position_ids)
+        mismatches = 0
+        for position_id, row in expected.items():
+            price, pnl, monitoring, status, exit_price = state[position_id]
+            if (abs(float(price) - row['current_price']) > 1e-6 or abs(float(pnl) - row['current_profit_loss']) > 1e-4
+                    or monitoring != row['monitoring'] or status != row['status']):
+                mismatches += 1
+        print(f"database after recovery: {len(expected) - mismatches}/{len(expected)} positions match "
+              f"the pre-crash state; {recovered.stats()['positions']} still tracked")
+        recovered.stop()
+    finally:
+        delete_book(trade_ids)
+        shutil.rmtree(journal_dir, ignore_errors=True)
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
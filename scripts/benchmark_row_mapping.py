@@ -0,0 +1,86 @@
+"""Microbenchmark row mapping and JSON encoding on synthetic signal rows.
+
+Compares the old hand-built index dicts with the cached row mapper, and Flask's
+default JSON provider with FastJSONProvider. No database is needed.
+
+    python -m scripts.benchmark_row_mapping --rows 100000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.database.queries_signals import SIGNAL_COLUMNS
+from src.database.rows import compile_row_mapper
+from src.web.json_provider import FastJSONProvider
+
+
+def make_rows(count):
+    base = datetime(2024, 1, 1)
+    price = Decimal('42123.12345678')
+    return [
+        (i, base + timedelta(seconds=i), '6f1c2b3a-0000-4000-8000-000000000000', price, price,
+         price, price, price, price, price, 'BTCUSDT', base, base)
+        for i in range(count)
+    ]
+
+
+def map_by_index(rows):
+    signals = []
+    for result in rows:
+        signals.append({
+            'id': result[0],
+            'creation_time': result[1],
+            'source_uuid': result[2],
+            'source_entry_price': result[3],
+            'current_price': result[4],
+            'tp1': result[5],
+            'tp2': result[6],
+            'tp3': result[7],
+            'tp4': result[8],
+            'sl': result[9],
+            'symbol': result[10],
+            'created_at': result[11],
+            'updated_at': result[12]
+        })
+    return signals
+
+
+def map_with_mapper(rows):
+    mapper = compile_row_mapper(SIGNAL_COLUMNS)
+    return [mapper(row) for row in rows]
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:28} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows} signal rows")
+    by_index, index_time = timed("map: index dicts", map_by_index, rows)
+    mapped, mapped_time = timed("map: row mapper", map_with_mapper, rows)
+    assert by_index == mapped
+    print(f"{'  speedup':28} {index_time / mapped_time:9.1f}x")
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    with app.app_context():
+        default_body, default_time = timed("json: Flask default", default_provider.response, mapped)
+        fast_body, fast_time = timed("json: FastJSONProvider", fast_provider.response, mapped)
+    assert default_provider.loads(default_body.get_data()) == fast_provider.loads(fast_body.get_data())
+    print(f"{'  speedup':28} {default_time / fast_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark per-source compiled signal parsers on a synthetic message corpus.
+
+The corpus mixes several real-world channel formats with chatter and result posts
+("TP1 hit"). Each format gets a source whose samples are one formatted message.
+Compares cached compiled parsers, recompiling per message, and the generic
+keyword parser, and checks extracted fields against the generated values. No
+database is needed.
+
+    python -m scripts.benchmark_signal_parser --messages 50000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from src.parser.signal_parser import GENERIC_PARSER, ParserCache, compile_source_parser
+
+FORMATS = {
+    'hashtag': (
+        "🚀 #{symbol}/USDT {side}\n"
+        "Entry: {entry}\n"
+        "TP1: {tp1}\nTP2: {tp2}\nTP3: {tp3}\n"
+        "SL: {sl}\n"
+        "Leverage: 10x"
+    ),
+    'list': (
+        "{symbol}USDT {side}\n\n"
+        "Entry zone: {entry} - {entry_high}\n\n"
+        "Targets:\n1) {tp1}\n2) {tp2}\n3) {tp3}\n4) {tp4}\n\n"
+        "Stop loss: {sl}"
+    ),
+    'one_line': "{verb} {symbol} at {entry}, targets {tp1} / {tp2} / {tp3}, stop {sl}",
+    'emoji': (
+        "📍Coin: #{symbol}\n📈 Direction: {side}\n"
+        "💰 Entry Price: ${entry}\n"
+        "🎯 Take Profit 1: ${tp1}\n🎯 Take Profit 2: ${tp2}\n"
+        "🛑 Stop Loss: ${sl}"
+    ),
+}
+EXPECTED_TPS = {'hashtag': 3, 'list': 4, 'one_line': 3, 'emoji': 2}
+
+CHATTER = [
+    "{symbol} TP1 hit ✅ +{pct}%",
+    "Good morning traders, market looks choppy today",
+    "Close half of {symbol} here and move SL to entry",
+    "Reminder: risk max {pct}% per trade",
+    "{symbol} pumped {pct}% in the last hour 🔥",
+]
+SYMBOLS = ['BTC', 'ETH', 'SOL', 'DOGE', 'XRP', 'ADA', 'AVAX', 'LINK', 'PEPE', 'ARB', 'OP', 'SUI']
+
+
+def make_signal(rng, name):
+    """Return (message, expected fields) for one signal in the given format"""
+    entry = Decimal(str(round(rng.uniform(0.05, 50000), rng.choice([2, 4]))))
+    side = rng.choice(['LONG', 'SHORT'])
+    step = entry * Decimal('0.02') * (1 if side == 'LONG' else -1)
+    values = {
+        'symbol': rng.choice(SYMBOLS), 'side': side, 'verb': 'Buy' if side == 'LONG' else 'Sell',
+        'entry': entry, 'entry_high': entry + abs(step) / 2,
+        'tp1': entry + step, 'tp2': entry + 2 * step, 'tp3': entry + 3 * step, 'tp4': entry + 4 * step,
+        'sl': entry - step,
+    }
+    expected = {'source_entry_price': entry, 'sl': values['sl'], 'symbol': values['symbol'] + 'USDT'}
+    for n in range(1, EXPECTED_TPS[name] + 1):
+        expected[f"tp{n}"] = values[f"tp{n}"]
+    return FORMATS[name].format(**values), expected
+
+
+def make_corpus(count, signal_ratio=0.6, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        name = rng.choice(list(FORMATS))
+        if rng.random() < signal_ratio:
+            message, expected = make_signal(rng, name)
+        else:
+            message = rng.choice(CHATTER).format(symbol=rng.choice(SYMBOLS), pct=rng.randint(1, 40))
+            expected = None
+        corpus.append((name, message, expected))
+    return corpus
+
+
+def make_sources(seed=11):
+    rng = random.Random(seed)
+    sources = {}
+    for name in FORMATS:
+        sample, _ = make_signal(rng, name)
+        sources[name] = {'uuid': f"source-{name}", 'message_sample_long': sample, 'message_sample_short': None}
+    return sources
+
+
+def run(label, corpus, parse):
+    correct = wrong = 0
+    started = time.perf_counter()
+    results = [parse(name, message) for name, message, _ in corpus]
+    elapsed = time.perf_counter() - started
+    for (_, _, expected), fields in zip(corpus, results):
+        if fields == expected:
+            correct += 1
+        else:
+            wrong += 1
+    print(f"{label:28} {len(corpus) / elapsed:>10,.0f} msg/s  "
+          f"{elapsed / len(corpus) * 1e6:6.1f} us/msg  correct {correct}/{len(corpus)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50_000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    sources = make_sources()
+    cache = ParserCache()
+
+    run('compiled, cached', corpus, lambda name, message: cache.parse(sources[name], message))
+    run('compiled per message', corpus[:args.messages // 10],
+        lambda name, message: compile_source_parser(sources[name]).parse(message))
+    run('generic keyword parser', corpus, lambda name, message: GENERIC_PARSER.parse(message))
+    print(f"cache: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark the TP/SL trigger index against rescanning every position per tick.
+
+Builds a book of open positions (4 take profits and a stop each) spread over many
+symbols, replays random-walk price ticks through both a full scan and
+TriggerIndex, checks they fire the same levels, and measures open/close churn.
+No database is needed.
+
+    python -m scripts.benchmark_triggers --positions 10000 --symbols 500 --ticks 200000
+"""
+import argparse
+import random
+import time
+from src.trading.triggers import TriggerIndex
+
+
+def make_book(positions, symbols, rng):
+    prices = {f"SYM{n}USDT": rng.uniform(0.01, 50000) for n in range(symbols)}
+    names = list(prices)
+    book = []
+    for position_id in range(positions):
+        symbol = rng.choice(names)
+        entry = prices[symbol] * rng.uniform(0.97, 1.03)
+        side = rng.choice(['LONG', 'SHORT'])
+        direction = 1 if side == 'LONG' else -1
+        step = entry * rng.uniform(0.005, 0.03) * direction
+        take_profits = [entry + step * n for n in range(1, 5)]
+        stop_loss = entry - step * rng.uniform(1, 3)
+        book.append((position_id, symbol, side, take_profits, stop_loss))
+    return prices, book
+
+
+def make_ticks(prices, count, rng):
+    prices = dict(prices)
+    names = list(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(names)
+        prices[symbol] *= 1 + rng.gauss(0, 0.004)
+        ticks.append((symbol, prices[symbol]))
+    return ticks
+
+
+class FullScan:
+    """The per-position loop: every tick checks every open level of every position"""
+
+    def __init__(self, book):
+        # position_id -> [symbol, side, pending take profits, stop]
+        self.positions = {position_id: [symbol, side, list(tps), sl] for position_id, symbol, side, tps, sl in book}
+
+    def on_price(self, symbol, price):
+        fired = []
+        for position_id, position in list(self.positions.items()):
+            if position[0] != symbol:
+                continue
+            _, side, take_profits, stop_loss = position
+            long = side == 'LONG'
+            for level in [tp for tp in take_profits if (price >= tp if long else price <= tp)]:
+                take_profits.remove(level)
+                fired.append((position_id, 'tp', level))
+            if price <= stop_loss if long else price >= stop_loss:
+                fired.append((position_id, 'sl', stop_loss))
+                del self.positions[position_id]
+        return fired
+
+
+def run(label, ticks, on_price):
+    fired = []
+    started = time.perf_counter()
+    for symbol, price in ticks:
+        fired += on_price(symbol, price)
+    elapsed = time.perf_counter() - started
+    print(f"{label:20} {len(ticks) / elapsed:>12,.0f} ticks/s  {elapsed / len(ticks) * 1e6:8.2f} us/tick  "
+          f"fired {len(fired)}")
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=10_000)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--ticks', type=int, default=200_000)
+    parser.add_argument('--scan-ticks', type=int, default=1_000,
+                        help="ticks replayed through the (slow) full scan")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    prices, book = make_book(args.positions, args.symbols, rng)
+    ticks = make_ticks(prices, args.ticks, rng)
+
+    started = time.perf_counter()
+    index = TriggerIndex()
+    for position_id, symbol, side, take_profits, stop_loss in book:
+        index.add_position(position_id, symbol, side, take_profits, stop_loss)
+    print(f"indexed {len(index)} levels for {args.positions} positions in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    scan_ticks = ticks[:args.scan_ticks]
+    scanned = run('full scan', scan_ticks, FullScan(book).on_price)
+    indexed = run('trigger index', scan_ticks, index.on_price)
+    expected = sorted((position_id, kind, level) for position_id, kind, level in scanned)
+    actual = sorted((trigger.owner, trigger.kind, trigger.level) for trigger in indexed)
+    print(f"same levels fired: {expected == actual}")
+
+    index = TriggerIndex()
+    for position_id, symbol, side, take_profits, stop_loss in book:
+        index.add_position(position_id, symbol, side, take_profits, stop_loss)
+    run('trigger index', ticks, index.on_price)
+
+    # Churn: close a random open position and open a new one
+    churn = min(args.positions, 10_000)
+    started = time.perf_counter()
+    for n in range(churn):
+        position_id, symbol, side, take_profits, stop_loss = book[rng.randrange(len(book))]
+        index.remove_position(position_id)
+        index.add_position(('new', n), symbol, side, take_profits, stop_loss)
+    elapsed = time.perf_counter() - started
+    print(f"{'open/close churn':20} {churn / elapsed:>12,.0f} pairs/s  {elapsed / churn * 1e6:8.2f} us/pair")
+    print(f"index: {index.stats()}")
+
+
+if __name__ == '__main__':
+    main()
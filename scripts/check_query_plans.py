@@ -0,0 +1,143 @@
+"""Fail if any hot query's plan falls back to a sequential scan on a seeded database.
+
+Applies pending migrations, seeds realistic row counts and selectivity inside a
+transaction, runs ANALYZE and EXPLAIN on each hot query, then rolls the seed data
+back. Exits non-zero listing the offending queries and their plans.
+
+    python -m scripts.check_query_plans --rows 50000
+"""
+import argparse
+import json
+import logging
+import sys
+from src.database.connection import db
+from src.database.migration_runner import migrate
+
+SOURCE_UUID = '00000000-0000-4000-8000-000000000001'
+
+# Sequential scans of smaller relations are ignored
+MIN_SCAN_ROWS = 1000
+
+# (name, SQL as issued by the query classes, params)
+HOT_QUERIES = [
+    ('TradeQueries.get_open_trades',
+     "SELECT * FROM trades WHERE status = 'OPEN';", None),
+    ('TradeQueries.get_open_trades(exchange)',
+     "SELECT * FROM trades WHERE status = 'OPEN' AND exchange = %s;", ('MEXC',)),
+    ('MessageQueries.get_unparsed_messages',
+     "SELECT * FROM telegram_messages WHERE parsed = FALSE ORDER BY created_at ASC;", None),
+    ('PositionQueries.get_monitoring_positions',
+     "SELECT * FROM positions WHERE monitoring = TRUE;", None),
+    ('SignalQueries.get_signals_by_source', """
+        SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+               tp1, tp2, tp3, tp4, sl, created_at, updated_at
+        FROM signals
+        WHERE source_uuid = %s
+        ORDER BY creation_time DESC
+        LIMIT %s
+     """, (SOURCE_UUID, 100)),
+    ('SignalQueries.get_signals_page(source)', """
+        SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+               tp1, tp2, tp3, tp4, sl, created_at, updated_at
+        FROM signals
+        WHERE source_uuid = %s
+        ORDER BY creation_time DESC, id DESC
+        LIMIT %s
+     """, (SOURCE_UUID, 100)),
+]
+
+
+def seed(cursor, rows):
+    """Insert `rows` rows per table with the skew seen in production (few open/unparsed/monitored)"""
+    sources = max(rows // 500, 2)
+    cursor.execute("""
+        INSERT INTO exchanges (name, api_key, uuid)
+        VALUES ('plan-check', 'x', '00000000-0000-4000-8000-000000000000');
+        INSERT INTO sources (uuid, name, exchange_uuid, telegram_group_id)
+        SELECT '00000000-0000-4000-8000-' || lpad(to_hex(g), 12, '0'), 'source ' || g,
+               '00000000-0000-4000-8000-000000000000', g
+        FROM generate_series(1, %(sources)s) g;
+        INSERT INTO trades (symbol, entry_price, quantity, position_type, status, exchange)
+        SELECT 'SYM' || (g %% 500), 100, 1, 'LONG',
+               CASE WHEN g %% 100 = 0 THEN 'OPEN' ELSE 'CLOSED' END,
+               CASE WHEN g %% 2 = 0 THEN 'MEXC' ELSE 'KRAKEN' END
+        FROM generate_series(1, %(rows)s) g;
+        INSERT INTO telegram_messages (message_text, group_id, parsed, created_at)
+        SELECT 'message ' || g, 1, g %% 100 <> 0, now() - g * interval '1 second'
+        FROM generate_series(1, %(rows)s) g;
+        INSERT INTO positions (trade_id, exchange, monitoring)
+        SELECT id, exchange, status = 'OPEN' FROM trades;
+        INSERT INTO signals (creation_time, source_uuid, source_entry_price)
+        SELECT now() - g * interval '1 minute',
+               '00000000-0000-4000-8000-' || lpad(to_hex(1 + g %% %(sources)s), 12, '0'), 100
+        FROM generate_series(1, %(rows)s) g;
+        ANALYZE exchanges, sources, trades, telegram_messages, positions, signals;
+    """, {'rows': rows, 'sources': sources})
+
+
+def seq_scans(plan):
+    """Yield the relations read by a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan node"""
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan.get('Relation Name')
+    for child in plan.get('Plans', []):
+        yield from seq_scans(child)
+
+
+def large_relations(cursor, relations, min_rows):
+    """Keep the relations ANALYZE estimated at `min_rows` rows or more
+
+    Scanning an empty or near-empty relation (e.g. a future monthly partition) is
+    the right plan, not a regression.
+    """
+    if not relations:
+        return []
+    cursor.execute(
+        "SELECT relname FROM pg_class WHERE relname = ANY(%s) AND reltuples >= %s;",
+        (relations, min_rows)
+    )
+    large = {row[0] for row in cursor.fetchall()}
+    return [relation for relation in relations if relation in large]
+
+
+def check_plans(cursor, min_rows=MIN_SCAN_ROWS):
+    """Return [(name, relations, plan)] for every hot query that sequentially scans a large relation"""
+    failures = []
+    for name, query, params in HOT_QUERIES:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        relations = large_relations(cursor, list(seq_scans(plan[0]['Plan'])), min_rows)
+        status = f"SEQ SCAN on {', '.join(relations)}" if relations else 'ok'
+        print(f"{name:45} {status}")
+        if relations:
+            failures.append((name, relations, plan))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000, help='seed rows per table')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    db.connect()
+    try:
+        migrate()
+        with db.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    seed(cursor, args.rows)
+                    failures = check_plans(cursor)
+            finally:
+                conn.rollback()
+    finally:
+        db.disconnect()
+
+    for name, relations, plan in failures:
+        print(f"\n{name} regressed to a sequential scan:\n{json.dumps(plan, indent=2)}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Local websocket server replaying MEXC and Kraken market data, plus a consumer check.
+
+Serves the MEXC deals stream at /mexc and the Kraken v2 ticker channel at /kraken.
+It answers subscriptions and pings the way the venues do, then sends a random walk
+for every subscribed symbol, or the ticks of a JSONL recording with one
+{"exchange", "symbol", "price"} object per line. Without --serve, it runs the
+real MarketDataStreams against itself for --seconds. It then reports update
+throughput, exchange-to-cache lag, lock-free read throughput, and staleness once
+the feed stalls.
+
+    python -m scripts.market_data_replay --symbols 50 --rate 2000 --seconds 5
+    python -m scripts.market_data_replay --serve --port 8766 --file ticks.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import websockets
+from src.exchanges.market_data import KrakenStream, MexcStream, split_pair
+from src.exchanges.ticker_cache import TickerCache, normalize_symbol
+
+
+class ReplayServer:
+    def __init__(self, rate, recording=None):
+        self.rate = rate
+        self.recording = recording
+        self.prices = {}
+        self.sent = 0
+        # While paused the connections stay open but silent, as when a venue stalls
+        self.paused = False
+
+    def price(self, symbol):
+        price = self.prices.get(symbol) or random.uniform(1, 50000)
+        price *= 1 + random.gauss(0, 0.0005)
+        self.prices[symbol] = price
+        return price
+
+    async def handler(self, websocket, path=None):
+        path = path or websocket.path
+        venue = 'KRAKEN' if path.rstrip('/').endswith('kraken') else 'MEXC'
+        symbols = []
+        feeder = None
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                method = request.get('method', '').lower()
+                if method in ('ping',):
+                    reply = ({'method': 'pong', 'time_in': None} if venue == 'KRAKEN'
+                             else {'id': 0, 'code': 0, 'msg': 'PONG'})
+                    await websocket.send(json.dumps(reply))
+                elif venue == 'MEXC' and method == 'subscription':
+                    symbols += [param.rsplit('@', 1)[1] for param in request['params']]
+                    await websocket.send(json.dumps({'id': 0, 'code': 0, 'msg': ','.join(request['params'])}))
+                elif venue == 'KRAKEN' and method == 'subscribe':
+                    symbols += request['params']['symbol']
+                    await websocket.send(json.dumps({'method': 'subscribe', 'success': True,
+                                                     'result': {'channel': 'ticker'}}))
+                if symbols and feeder is None:
+                    feeder = asyncio.create_task(self.feed(websocket, venue, symbols))
+        finally:
+            if feeder is not None:
+                feeder.cancel()
+
+    def ticks(self, venue, symbols):
+        if self.recording:
+            wanted = {normalize_symbol(symbol) for symbol in symbols}
+            names = {normalize_symbol(symbol): symbol for symbol in symbols}
+            for tick in itertools.cycle(self.recording):
+                if tick.get('exchange', venue).upper() == venue and normalize_symbol(tick['symbol']) in wanted:
+                    yield names[normalize_symbol(tick['symbol'])], float(tick['price'])
+        while True:
+            symbol = random.choice(symbols)
+            yield symbol, self.price(symbol)
+
+    def message(self, venue, symbol, price):
+        if venue == 'KRAKEN':
+            return {'channel': 'ticker', 'type': 'update', 'data': [{'symbol': symbol, 'last': round(price, 8)}]}
+        return {'c': f"spot@public.deals.v3.api@{symbol}", 's': symbol, 't': int(time.time() * 1000),
+                'd': {'deals': [{'S': 1, 'p': f"{price:.8f}", 'v': '0.01', 't': int(time.time() * 1000)}],
+                      'e': 'spot@public.deals.v3.api'}}
+
+    async def feed(self, websocket, venue, symbols):
+        interval = 1 / self.rate
+        batch = max(1, int(self.rate / 100))
+        next_at = time.monotonic()
+        for n, (symbol, price) in enumerate(self.ticks(venue, symbols), start=1):
+            while self.paused:
+                await asyncio.sleep(0.05)
+                next_at = time.monotonic()
+            await websocket.send(json.dumps(self.message(venue, symbol, price)))
+            self.sent += 1
+            if n % batch == 0:
+                next_at += interval * batch
+                await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+
+async def check(args, server, url):
+    cache = TickerCache(max_age=1.0)
+    symbols = [f"SYM{n}USDT" for n in range(args.symbols)]
+    streams = [MexcStream(symbols[:30], cache, f"{url}/mexc"),
+               KrakenStream(['/'.join(split_pair(symbol)) for symbol in symbols], cache, f"{url}/kraken")]
+    tasks = [asyncio.create_task(stream.run()) for stream in streams]
+
+    lags = []
+    started = time.monotonic()
+    while time.monotonic() - started < args.seconds:
+        await asyncio.sleep(0.05)
+        ticker = cache.get(symbols[0], 'MEXC')
+        if ticker is not None and ticker.exchange_time:
+            lags.append(time.time() * 1000 - ticker.exchange_time)
+    elapsed = time.monotonic() - started
+
+    for stream in streams:
+        stats = stream.stats()
+        print(f"{stats['exchange']:7} {stats['updates'] / elapsed:>10,.0f} updates/s  "
+              f"symbols={stats['symbols']} connects={stats['connects']} errors={stats['errors']}")
+    if lags:
+        lags.sort()
+        print(f"MEXC exchange-to-cache lag: p50 {lags[len(lags) // 2]:.1f} ms, max {lags[-1]:.1f} ms")
+
+    reads = 200_000
+    read_started = time.perf_counter()
+    for n in range(reads):
+        cache.price(symbols[n % len(symbols)])
+    read_elapsed = time.perf_counter() - read_started
+    print(f"cache reads: {reads / read_elapsed:,.0f}/s ({read_elapsed / reads * 1e9:.0f} ns each)")
+
+    print(f"while streaming: {cache.stats()} fresh prices={len(cache.prices())}")
+    server.paused = True
+    await asyncio.sleep(1.2)
+    print(f"1.2 s after the feed stalled: {cache.stats()} fresh prices={len(cache.prices())}")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main(args):
+    recording = None
+    if args.file:
+        with open(args.file) as f:
+            recording = [json.loads(line) for line in f if line.strip()]
+    server = ReplayServer(args.rate, recording)
+    async with websockets.serve(server.handler, '127.0.0.1', args.port, max_size=2 ** 22) as websocket_server:
+        port = websocket_server.sockets[0].getsockname()[1]
+        url = f"ws://127.0.0.1:{port}"
+        if args.serve:
+            print(f"Replaying market data at {url}/mexc and {url}/kraken")
+            await asyncio.Future()
+        await check(args, server, url)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--serve', action='store_true', help="only run the replay server")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--file', help="JSONL recording to replay instead of a random walk")
+    parser.add_argument('--rate', type=int, default=2000, help="updates per second per connection")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,230 @@
+"""Local mock of the MEXC and Kraken REST endpoints used by src.exchanges, plus a client check.
+
+The server answers MEXC spot v3 (/api/v3/...) and Kraken (/0/...) requests from
+in-memory random-walk prices and orders. It verifies signatures against the
+secrets below, adds configurable latency, and answers 429 when a client exceeds
+`--server-rate` requests per second. Run it on its own with --serve, or (the
+default) start it in-process and drive the real clients against it. Without
+--serve, the script compares keep-alive sessions with a new connection per call
+and prints latency histograms and rate limiter stats.
+
+    python -m scripts.mock_exchange --calls 500
+    python -m scripts.mock_exchange --serve --port 8765
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+MEXC_KEY, MEXC_SECRET = 'mock-mexc-key', 'mock-mexc-secret'
+KRAKEN_KEY, KRAKEN_SECRET = 'mock-kraken-key', base64.b64encode(b'mock-kraken-secret').decode()
+SYMBOLS = {'BTCUSDT': 43000.0, 'ETHUSDT': 2300.0, 'SOLUSDT': 95.0, 'XBTUSD': 43000.0, 'ETHUSD': 2300.0}
+
+
+class MockExchangeState:
+    def __init__(self, latency=0.002, server_rate=None):
+        self.prices = dict(SYMBOLS)
+        self.orders = {}
+        self.order_ids = itertools.count(1)
+        self.latency = latency
+        self.server_rate = server_rate
+        self.lock = threading.Lock()
+        self.window = (0, 0)
+        self.requests = 0
+        self.connections = set()
+
+    def tick(self):
+        with self.lock:
+            for symbol in self.prices:
+                self.prices[symbol] *= 1 + random.gauss(0, 0.0005)
+
+    def admit(self) -> bool:
+        """Fixed one-second window rate limit across all clients"""
+        with self.lock:
+            self.requests += 1
+            if not self.server_rate:
+                return True
+            second = int(time.monotonic())
+            start, count = self.window
+            count = count + 1 if start == second else 1
+            self.window = (second, count)
+            return count <= self.server_rate
+
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, Nagle plus delayed
+    # ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    state: MockExchangeState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        state = self.state
+        state.connections.add(self.client_address)
+        if state.latency:
+            time.sleep(state.latency)
+        state.tick()
+        if not state.admit():
+            return self._reply(429, {'code': 429, 'msg': 'Too many requests'}, {'Retry-After': '1'})
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode() if length else ''
+        if url.path.startswith('/api/v3/'):
+            return self._mexc(method, url, body)
+        if url.path.startswith('/0/'):
+            return self._kraken(method, url, body)
+        self._reply(404, {'msg': 'not found'})
+
+    do_GET = lambda self: self._handle('GET')
+    do_POST = lambda self: self._handle('POST')
+    do_DELETE = lambda self: self._handle('DELETE')
+
+    # ---- MEXC ----
+
+    def _mexc(self, method, url, body):
+        state = self.state
+        params = dict(parse_qsl(url.query))
+        if url.path == '/api/v3/ticker/price':
+            if 'symbol' in params:
+                return self._reply(200, {'symbol': params['symbol'], 'price': f"{state.prices[params['symbol']]:.2f}"})
+            return self._reply(200, [{'symbol': s, 'price': f"{p:.2f}"} for s, p in state.prices.items()])
+        if url.path != '/api/v3/order':
+            return self._reply(404, {'code': 404, 'msg': 'not found'})
+        signed, _, signature = url.query.rpartition('&signature=')
+        expected = hmac.new(MEXC_SECRET.encode(), signed.encode(), hashlib.sha256).hexdigest()
+        if self.headers.get('X-MEXC-APIKEY') != MEXC_KEY or not hmac.compare_digest(signature, expected):
+            return self._reply(401, {'code': 602, 'msg': 'Signature for this request is not valid.'})
+        if method == 'POST':
+            order_id = str(next(state.order_ids))
+            state.orders[order_id] = dict(params, orderId=order_id, status='FILLED')
+            return self._reply(200, {'orderId': order_id, 'symbol': params['symbol'], 'status': 'FILLED'})
+        order = state.orders.get(params.get('orderId'))
+        if order is None:
+            return self._reply(400, {'code': -2013, 'msg': 'Order does not exist.'})
+        if method == 'DELETE':
+            order['status'] = 'CANCELED'
+        return self._reply(200, order)
+
+    # ---- Kraken ----
+
+    def _kraken(self, method, url, body):
+        state = self.state
+        if url.path == '/0/public/Ticker':
+            pairs = dict(parse_qsl(url.query)).get('pair')
+            pairs = pairs.split(',') if pairs else list(state.prices)
+            return self._reply(200, {'error': [], 'result': {
+                pair: {'c': [f"{state.prices[pair]:.1f}", '0.1']} for pair in pairs if pair in state.prices
+            }})
+        data = dict(parse_qsl(body))
+        message = url.path.encode() + hashlib.sha256((data.get('nonce', '') + body).encode()).digest()
+        expected = base64.b64encode(hmac.new(base64.b64decode(KRAKEN_SECRET), message, hashlib.sha512).digest())
+        if self.headers.get('API-Key') != KRAKEN_KEY or self.headers.get('API-Sign', '').encode() != expected:
+            return self._reply(200, {'error': ['EAPI:Invalid signature']})
+        if url.path == '/0/private/AddOrder':
+            txid = f"O{next(state.order_ids):05d}-MOCK"
+            state.orders[txid] = {'status': 'closed', 'descr': {'pair': data['pair'], 'type': data['type']}}
+            return self._reply(200, {'error': [], 'result': {'txid': [txid], 'descr': {'order': 'mock'}}})
+        if url.path == '/0/private/QueryOrders':
+            return self._reply(200, {'error': [], 'result': {
+                txid: state.orders[txid] for txid in data['txid'].split(',') if txid in state.orders}})
+        if url.path == '/0/private/CancelOrder':
+            found = state.orders.pop(data['txid'], None) is not None
+            return self._reply(200, {'error': [], 'result': {'count': int(found)}})
+        self._reply(404, {'error': ['EGeneral:Unknown method']})
+
+
+def serve(port=0, latency=0.002, server_rate=None):
+    """Start the mock server on a daemon thread; returns (server, base_url)"""
+    handler = type('Handler', (MockExchangeHandler,), {'state': MockExchangeState(latency, server_rate)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-exchange', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def exercise(client, symbol, calls, threads):
+    """Price lookups from several threads, then an order round trip"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda _: client.get_price(symbol), range(calls)))
+    elapsed = time.perf_counter() - started
+    order = client.open_position(symbol, 'LONG', '0.01', client_order_id='mock-1')
+    client.get_order(symbol, order['order_id'])
+    client.cancel_order(symbol, order['order_id'])
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--serve', action='store_true', help="only run the server until interrupted")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.002, help="seconds added to every response")
+    parser.add_argument('--server-rate', type=int, default=None, help="requests per second before 429s")
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = serve(args.port, args.latency, args.server_rate)
+    if args.serve:
+        print(f"Mock MEXC/Kraken listening on {base_url} (MEXC key {MEXC_KEY!r}, Kraken key {KRAKEN_KEY!r})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    import requests
+    from src.exchanges.kraken import Kraken
+    from src.exchanges.mexc import MEXC
+
+    for name, client, symbol in (
+        ('MEXC', MEXC(MEXC_KEY, MEXC_SECRET, base_url), 'BTCUSDT'),
+        ('KRAKEN', Kraken(KRAKEN_KEY, KRAKEN_SECRET, base_url), 'XBTUSD'),
+    ):
+        # Kraken's public limit is ~1/s; widen it so the comparison measures transport only
+        for bucket in client.buckets().values():
+            bucket.capacity = bucket._tokens = max(bucket.capacity, args.calls * 2)
+        keep_alive = exercise(client, symbol, args.calls, args.threads)
+        stats = client.stats()
+
+        def fresh_session(method, url, _headers=dict(client.session.headers), **kwargs):
+            # What the TypeScript clients do: a new connection for every call
+            with requests.Session() as session:
+                session.headers.update(_headers)
+                return session.request(method, url, **kwargs)
+        client.session.request = fresh_session
+        per_call = exercise(client, symbol, args.calls, args.threads)
+
+        print(f"{name}: keep-alive {args.calls / keep_alive:,.0f} calls/s, "
+              f"new connection per call {args.calls / per_call:,.0f} calls/s")
+        for endpoint, snapshot in stats['latency'].items():
+            print(f"  {endpoint:32} n={snapshot['count']:<5} p50={snapshot['p50_ms']:.2f}ms "
+                  f"p99={snapshot['p99_ms']:.2f}ms")
+        print(f"  buckets: {stats['buckets']}")
+        client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
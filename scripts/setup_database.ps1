@@ -124,8 +124,8 @@ if ($LASTEXITCODE -ne 0) {
 }
 
 # Run migrations (module)
-Write-Host "Running migrations (python -m src.database.migrations)..." -ForegroundColor Cyan
-python -m src.database.migrations
+Write-Host "Running migrations (python -m src.database.migration_runner)..." -ForegroundColor Cyan
+python -m src.database.migration_runner
 if ($LASTEXITCODE -ne 0) {
     Write-Host "Migrations failed. See errors above." -ForegroundColor Red
     exit 1
@@ -12,6 +12,27 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     
+    # Connection pool (used by DatabaseConnection in pooled mode)
+    DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'False').lower() == 'true'
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    
+    # In-process cache for reference tables (exchanges, sources, trading pairs)
+    REFERENCE_CACHE_TTL = float(os.getenv('REFERENCE_CACHE_TTL', 300))
+    REFERENCE_CACHE_SIZE = int(os.getenv('REFERENCE_CACHE_SIZE', 4096))
+    
+    # Monthly range partitions for signals, telegram_messages and exchange_events
+    PARTITIONING_ENABLED = os.getenv('PARTITIONING_ENABLED', 'False').lower() == 'true'
+    PARTITION_PREMAKE_MONTHS = int(os.getenv('PARTITION_PREMAKE_MONTHS', 3))
+    PARTITION_MAINTENANCE_INTERVAL = float(os.getenv('PARTITION_MAINTENANCE_INTERVAL', 3600))
+    # Months of history to keep per table (0 keeps everything); old partitions are dropped,
+    # or only detached when RETENTION_DETACH_ONLY is set
+    SIGNALS_RETENTION_MONTHS = int(os.getenv('SIGNALS_RETENTION_MONTHS', 0))
+    TELEGRAM_MESSAGES_RETENTION_MONTHS = int(os.getenv('TELEGRAM_MESSAGES_RETENTION_MONTHS', 0))
+    EXCHANGE_EVENTS_RETENTION_MONTHS = int(os.getenv('EXCHANGE_EVENTS_RETENTION_MONTHS', 0))
+    RETENTION_DETACH_ONLY = os.getenv('RETENTION_DETACH_ONLY', 'False').lower() == 'true'
+    
     # Database URL for SQLAlchemy
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     
@@ -20,14 +41,91 @@ class Config:
     TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH')
     TELEGRAM_PHONE = os.getenv('TELEGRAM_PHONE')
     TELEGRAM_GROUP_ID = os.getenv('TELEGRAM_GROUP_ID')
+    TELEGRAM_SESSION = os.getenv('TELEGRAM_SESSION', 'crypto_trading_bot')
+    
+    # Telegram ingestion pipeline (bounded per-group queues feeding parse/persist workers)
+    INGESTION_WORKERS = int(os.getenv('INGESTION_WORKERS', 4))
+    INGESTION_QUEUE_SIZE = int(os.getenv('INGESTION_QUEUE_SIZE', 1000))
+    INGESTION_GROUP_QUEUE_SIZE = int(os.getenv('INGESTION_GROUP_QUEUE_SIZE', 200))
+    INGESTION_OVERFLOW = os.getenv('INGESTION_OVERFLOW', 'drop_oldest')
+    INGESTION_PUT_TIMEOUT = float(os.getenv('INGESTION_PUT_TIMEOUT', 1.0))
+    INGESTION_STATS_INTERVAL = float(os.getenv('INGESTION_STATS_INTERVAL', 60))
+    # How long stop() lets the workers finish queued messages before spooling (or dropping) the rest
+    INGESTION_STOP_TIMEOUT = float(os.getenv('INGESTION_STOP_TIMEOUT', 10))
+    
+    # Duplicate suppression: a source's message with the same normalized content as one
+    # seen within DEDUP_TTL seconds is dropped before it reaches the database.
+    # DEDUP_STATE_PATH (optional) keeps the seen-set across restarts.
+    DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'True').lower() == 'true'
+    DEDUP_TTL = float(os.getenv('DEDUP_TTL', 21600))
+    DEDUP_MAX_ENTRIES = int(os.getenv('DEDUP_MAX_ENTRIES', 100000))
+    DEDUP_STATE_PATH = os.getenv('DEDUP_STATE_PATH', '')
+    DEDUP_SAVE_INTERVAL = float(os.getenv('DEDUP_SAVE_INTERVAL', 60))
+    
+    # On-disk spool (memory-mapped segments under SPOOL_DIR) for messages that cannot be
+    # saved while PostgreSQL is down; drained back in batches of SPOOL_DRAIN_BATCH
+    SPOOL_ENABLED = os.getenv('SPOOL_ENABLED', 'True').lower() == 'true'
+    SPOOL_DIR = os.getenv('SPOOL_DIR', 'data/spool')
+    SPOOL_SEGMENT_SIZE = int(os.getenv('SPOOL_SEGMENT_SIZE', 16 * 1024 * 1024))
+    SPOOL_MAX_BYTES = int(os.getenv('SPOOL_MAX_BYTES', 1024 * 1024 * 1024))
+    SPOOL_DRAIN_BATCH = int(os.getenv('SPOOL_DRAIN_BATCH', 1000))
+    SPOOL_RETRY_INTERVAL = float(os.getenv('SPOOL_RETRY_INTERVAL', 2))
+    # A live write that takes longer than this is abandoned and the message spooled,
+    # so a slow (not just down) database cannot stall the workers either
+    SPOOL_WRITE_TIMEOUT = float(os.getenv('SPOOL_WRITE_TIMEOUT', 5))
     
     # MEXC Exchange
     MEXC_API_KEY = os.getenv('MEXC_API_KEY')
     MEXC_API_SECRET = os.getenv('MEXC_API_SECRET')
+    MEXC_BASE_URL = os.getenv('MEXC_BASE_URL', 'https://api.mexc.com')
     
     # Kraken Exchange
     KRAKEN_API_KEY = os.getenv('KRAKEN_API_KEY')
     KRAKEN_API_SECRET = os.getenv('KRAKEN_API_SECRET')
+    KRAKEN_BASE_URL = os.getenv('KRAKEN_BASE_URL', 'https://api.kraken.com')
+    
+    # Exchange REST clients (keep-alive connections per exchange)
+    EXCHANGE_TIMEOUT = float(os.getenv('EXCHANGE_TIMEOUT', 10))
+    EXCHANGE_POOL_SIZE = int(os.getenv('EXCHANGE_POOL_SIZE', 10))
+    
+    # Write-behind position store: live position/trade state is kept in memory, every change
+    # is appended to a local journal, and changed rows are written in one transaction every
+    # POSITION_FLUSH_INTERVAL seconds
+    POSITION_STORE_ENABLED = os.getenv('POSITION_STORE_ENABLED', 'False').lower() == 'true'
+    POSITION_JOURNAL_PATH = os.getenv('POSITION_JOURNAL_PATH', 'data/positions.journal')
+    POSITION_FLUSH_INTERVAL = float(os.getenv('POSITION_FLUSH_INTERVAL', 1.0))
+    # How often the store picks up positions opened since it loaded
+    POSITION_RELOAD_INTERVAL = float(os.getenv('POSITION_RELOAD_INTERVAL', 10.0))
+    POSITION_JOURNAL_SYNC_INTERVAL = float(os.getenv('POSITION_JOURNAL_SYNC_INTERVAL', 0.2))
+    
+    # Order fan-out: a signal's orders go to every eligible exchange concurrently, each
+    # waited on for its exchange's timeout (<NAME>_ORDER_TIMEOUT, default ORDER_TIMEOUT)
+    ORDER_WORKERS = int(os.getenv('ORDER_WORKERS', 8))
+    ORDER_TIMEOUT = float(os.getenv('ORDER_TIMEOUT', 5))
+    MEXC_ORDER_TIMEOUT = float(os.getenv('MEXC_ORDER_TIMEOUT', ORDER_TIMEOUT))
+    KRAKEN_ORDER_TIMEOUT = float(os.getenv('KRAKEN_ORDER_TIMEOUT', ORDER_TIMEOUT))
+    
+    # Streaming market data for every pair in exchange_trading_pairs, kept in an
+    # in-memory ticker cache; prices older than MARKET_DATA_MAX_AGE seconds are stale
+    MARKET_DATA_ENABLED = os.getenv('MARKET_DATA_ENABLED', 'False').lower() == 'true'
+    MEXC_WS_URL = os.getenv('MEXC_WS_URL', 'wss://wbs.mexc.com/ws')
+    KRAKEN_WS_URL = os.getenv('KRAKEN_WS_URL', 'wss://ws.kraken.com/v2')
+    MARKET_DATA_MAX_AGE = float(os.getenv('MARKET_DATA_MAX_AGE', 10))
+    MARKET_DATA_IDLE_TIMEOUT = float(os.getenv('MARKET_DATA_IDLE_TIMEOUT', 60))
+    # Every MARKET_DATA_PUBLISH_INTERVAL seconds the cached prices are written to the
+    # monitored positions and to the signals of the last MARKET_DATA_SIGNAL_WINDOW_HOURS
+    MARKET_DATA_PUBLISH_INTERVAL = float(os.getenv('MARKET_DATA_PUBLISH_INTERVAL', 5))
+    MARKET_DATA_SIGNAL_WINDOW_HOURS = float(os.getenv('MARKET_DATA_SIGNAL_WINDOW_HOURS', 168))
+    
+    # Local OHLCV history: one memory-mapped column file per symbol and interval
+    CANDLE_STORE_DIR = os.getenv('CANDLE_STORE_DIR', 'data/candles')
+    
+    # Signal backtests: candles from the candle store at BACKTEST_INTERVAL, each signal
+    # followed for BACKTEST_HORIZON_HOURS, pairs spread over BACKTEST_WORKERS processes
+    # (0 = one per CPU)
+    BACKTEST_INTERVAL = os.getenv('BACKTEST_INTERVAL', '1m')
+    BACKTEST_HORIZON_HOURS = float(os.getenv('BACKTEST_HORIZON_HOURS', 168))
+    BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', 0))
     
     # Application
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
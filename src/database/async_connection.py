@@ -0,0 +1,95 @@
+import psycopg
+from contextlib import asynccontextmanager
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from src.config.index import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseConnection:
+    """Manages an asyncio PostgreSQL connection pool
+
+    Counterpart of DatabaseConnection for code running on an event loop (Telegram
+    ingestion, position monitoring). Queries use the same %s placeholders.
+    """
+    
+    def __init__(self):
+        self.config = Config()
+        self.pool = None
+    
+    def _conninfo(self):
+        return psycopg.conninfo.make_conninfo(
+            host=self.config.DB_HOST,
+            port=self.config.DB_PORT,
+            dbname=self.config.DB_NAME,
+            user=self.config.DB_USER,
+            password=self.config.DB_PASSWORD
+        )
+    
+    async def connect(self, min_size=None, max_size=None, timeout=None):
+        """Open the async connection pool"""
+        try:
+            self.pool = AsyncConnectionPool(
+                self._conninfo(),
+                min_size=min_size if min_size is not None else self.config.DB_POOL_MIN,
+                max_size=max_size if max_size is not None else self.config.DB_POOL_MAX,
+                timeout=timeout if timeout is not None else self.config.DB_POOL_TIMEOUT,
+                open=False
+            )
+            await self.pool.open(wait=True)
+            logger.info(f"Created async PostgreSQL connection pool "
+                        f"(min={self.pool.min_size}, max={self.pool.max_size})")
+            return self.pool
+        except (psycopg.Error, PoolTimeout) as e:
+            logger.error(f"Failed to connect to database: {e}")
+            raise
+    
+    async def disconnect(self):
+        """Close the async connection pool"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Closed async database connection pool")
+    
+    @asynccontextmanager
+    async def get_cursor(self):
+        """Async context manager for a database cursor on a pooled connection"""
+        async with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                await cursor.close()
+    
+    def pool_stats(self):
+        """Return connection pool statistics, or None when not connected"""
+        return self.pool.get_stats() if self.pool else None
+    
+    async def execute_query(self, query, params=None):
+        """Execute a SELECT query and return results"""
+        try:
+            async with self.get_cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+        except psycopg.Error as e:
+            logger.error(f"Failed to execute query: {e}")
+            raise
+    
+    async def execute_update(self, query, params=None):
+        """Execute INSERT, UPDATE, or DELETE query"""
+        try:
+            async with self.get_cursor() as cursor:
+                await cursor.execute(query, params)
+                return cursor.rowcount
+        except psycopg.Error as e:
+            logger.error(f"Failed to execute update: {e}")
+            raise
+
+# Global async database instance
+async_db = AsyncDatabaseConnection()
@@ -0,0 +1,324 @@
+import logging
+from typing import List, Dict, Optional
+from src.database.async_connection import async_db
+from src.database.rows import compile_row_mapper, cursor_columns
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTradeQueries:
+    """Async database queries for trades"""
+    
+    @staticmethod
+    async def create_trade(symbol, entry_price, quantity, position_type, exchange, exchange_order_id=None):
+        """Create a new trade record and return its ID"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                INSERT INTO trades (symbol, entry_price, quantity, position_type, exchange, exchange_order_id, status)
+                VALUES (%s, %s, %s, %s, %s, %s, 'OPEN')
+                RETURNING id
+            """, (symbol, entry_price, quantity, position_type, exchange, exchange_order_id))
+            result = await cursor.fetchone()
+            return result[0]
+    
+    @staticmethod
+    async def get_trade(trade_id):
+        """Get trade by ID"""
+        query = "SELECT * FROM trades WHERE id = %s;"
+        result = await async_db.execute_query(query, (trade_id,))
+        return result[0] if result else None
+    
+    @staticmethod
+    async def get_open_trades(exchange=None):
+        """Get all open trades, optionally filtered by exchange"""
+        if exchange:
+            query = "SELECT * FROM trades WHERE status = 'OPEN' AND exchange = %s;"
+            return await async_db.execute_query(query, (exchange,))
+        query = "SELECT * FROM trades WHERE status = 'OPEN';"
+        return await async_db.execute_query(query)
+    
+    @staticmethod
+    async def close_trade(trade_id, exit_price):
+        """Close a trade with exit price"""
+        query = """
+        UPDATE trades 
+        SET status = 'CLOSED', exit_price = %s, exit_time = CURRENT_TIMESTAMP,
+            profit_loss = (quantity * exit_price) - (quantity * entry_price),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s;
+        """
+        return await async_db.execute_update(query, (exit_price, trade_id))
+
+
+class AsyncMessageQueries:
+    """Async database queries for Telegram messages"""
+    
+    @staticmethod
+    async def save_message(message_text, message_date, sender_id, sender_name, group_id):
+        """Save a Telegram message and return its ID"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                INSERT INTO telegram_messages (message_text, message_date, sender_id, sender_name, group_id)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            """, (message_text, message_date, sender_id, sender_name, group_id))
+            result = await cursor.fetchone()
+            return result[0]
+    
+    @staticmethod
+    async def save_messages(messages):
+        """Save many Telegram messages in one transaction and return their IDs in order"""
+        if not messages:
+            return []
+        ids = []
+        async with async_db.get_cursor() as cursor:
+            await cursor.executemany("""
+                INSERT INTO telegram_messages (message_text, message_date, sender_id, sender_name, group_id)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            """, messages, returning=True)
+            while True:
+                ids.append((await cursor.fetchone())[0])
+                if not cursor.nextset():
+                    break
+        return ids
+    
+    @staticmethod
+    async def save_messages_with_signals(messages):
+        """Save messages and the signals parsed from them in one transaction
+
+        `messages` is a sequence of (message_text, message_date, sender_id, sender_name, group_id,
+        telegram_message_id, created_at, signals) tuples, where `signals` lists (creation_time,
+        source_uuid, fields) with create_signal keyword fields; a None created_at means now.
+        Messages with signals are saved as parsed. A message already stored under the same
+        (group_id, telegram_message_id, created_at) is skipped along with its signals, so
+        writing the same batch twice is harmless. Returns (messages saved, signals created).
+        """
+        if not messages:
+            return 0, 0
+        async with async_db.get_cursor() as cursor:
+            await cursor.executemany("""
+                INSERT INTO telegram_messages (message_text, message_date, sender_id, sender_name, group_id,
+                                               telegram_message_id, created_at, parsed)
+                VALUES (%s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP), %s)
+                ON CONFLICT DO NOTHING
+                RETURNING id
+            """, [(*message[:7], bool(message[7])) for message in messages], returning=True)
+            inserted = []
+            while True:
+                inserted.append(await cursor.fetchone() is not None)
+                if not cursor.nextset():
+                    break
+            signals = [(creation_time, source_uuid, fields.get('source_entry_price'), fields.get('current_price'),
+                        fields.get('tp1'), fields.get('tp2'), fields.get('tp3'), fields.get('tp4'), fields.get('sl'),
+                        fields.get('symbol'))
+                       for message, new in zip(messages, inserted) if new
+                       for creation_time, source_uuid, fields in message[7]]
+            if signals:
+                await cursor.executemany("""
+                    INSERT INTO signals (creation_time, source_uuid, source_entry_price,
+                                        current_price, tp1, tp2, tp3, tp4, sl, symbol)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, signals)
+        return sum(inserted), len(signals)
+    
+    @staticmethod
+    async def mark_message_parsed(message_id, trade_id=None):
+        """Mark a message as parsed"""
+        query = """
+        UPDATE telegram_messages
+        SET parsed = TRUE, trade_id = %s
+        WHERE id = %s;
+        """
+        return await async_db.execute_update(query, (trade_id, message_id))
+    
+    @staticmethod
+    async def get_unparsed_messages():
+        """Get all unparsed messages"""
+        query = "SELECT * FROM telegram_messages WHERE parsed = FALSE ORDER BY created_at ASC;"
+        return await async_db.execute_query(query)
+
+
+class AsyncPositionQueries:
+    """Async database queries for positions"""
+    
+    @staticmethod
+    async def create_position(trade_id, exchange, exchange_position_id, current_price):
+        """Create a position record and return its ID"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                INSERT INTO positions (trade_id, exchange, exchange_position_id, current_price, monitoring)
+                VALUES (%s, %s, %s, %s, TRUE)
+                RETURNING id
+            """, (trade_id, exchange, exchange_position_id, current_price))
+            result = await cursor.fetchone()
+            return result[0]
+    
+    @staticmethod
+    async def get_monitoring_positions():
+        """Get all positions being monitored"""
+        query = "SELECT * FROM positions WHERE monitoring = TRUE;"
+        return await async_db.execute_query(query)
+    
+    @staticmethod
+    async def update_position_price(position_id, current_price, profit_loss):
+        """Update position current price and P&L"""
+        query = """
+        UPDATE positions
+        SET current_price = %s, current_profit_loss = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s;
+        """
+        return await async_db.execute_update(query, (current_price, profit_loss, position_id))
+    
+    @staticmethod
+    async def update_position_prices(updates):
+        """Update current price and P&L for many positions in one statement"""
+        if not updates:
+            return 0
+        ids, prices, pnls = zip(*updates)
+        query = """
+        UPDATE positions p
+        SET current_price = v.current_price, current_profit_loss = v.profit_loss,
+            updated_at = CURRENT_TIMESTAMP
+        FROM unnest(%s::integer[], %s::numeric[], %s::numeric[]) AS v(id, current_price, profit_loss)
+        WHERE p.id = v.id;
+        """
+        return await async_db.execute_update(query, (list(ids), list(prices), list(pnls)))
+    
+    @staticmethod
+    async def apply_price_snapshot(prices):
+        """Reprice every monitored position from one {(exchange, symbol): price} snapshot"""
+        if not prices:
+            return 0
+        exchanges, symbols, values = zip(*((exchange, symbol, price) for (exchange, symbol), price in prices.items()))
+        query = """
+        UPDATE positions p
+        SET current_price = v.price,
+            current_profit_loss = (v.price - t.entry_price) * t.quantity
+                * CASE WHEN t.position_type = 'SHORT' THEN -1 ELSE 1 END,
+            updated_at = CURRENT_TIMESTAMP
+        FROM trades t, unnest(%s::varchar[], %s::varchar[], %s::numeric[]) AS v(exchange, symbol, price)
+        WHERE p.trade_id = t.id AND t.symbol = v.symbol AND upper(p.exchange) = v.exchange
+          AND p.monitoring = TRUE;
+        """
+        return await async_db.execute_update(query, (list(exchanges), list(symbols), list(values)))
+    
+    @staticmethod
+    async def close_position(position_id):
+        """Close a position"""
+        query = """
+        UPDATE positions
+        SET monitoring = FALSE, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s;
+        """
+        return await async_db.execute_update(query, (position_id,))
+
+
+class AsyncSourceQueries:
+    """Async query operations for sources table"""
+    
+    @staticmethod
+    async def get_all_sources() -> List[Dict]:
+        """Get all sources, ordered by Telegram group"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, uuid, name, exchange_uuid, telegram_group_id,
+                       message_sample_short, message_sample_long, created_at, updated_at
+                FROM sources
+                ORDER BY telegram_group_id, name
+            """)
+            results = await cursor.fetchall()
+            mapper = compile_row_mapper(cursor_columns(cursor))
+            return [mapper(result) for result in results]
+
+
+class AsyncSignalQueries:
+    """Async query operations for signals table"""
+    
+    @staticmethod
+    async def create_signal(creation_time, source_uuid: str, source_entry_price: float = None,
+                            current_price: float = None, tp1: float = None, tp2: float = None,
+                            tp3: float = None, tp4: float = None, sl: float = None,
+                            symbol: str = None) -> int:
+        """Create a new signal and return its ID"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                INSERT INTO signals (creation_time, source_uuid, source_entry_price,
+                                    current_price, tp1, tp2, tp3, tp4, sl, symbol)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (creation_time, source_uuid, source_entry_price, current_price,
+                  tp1, tp2, tp3, tp4, sl, symbol))
+            result = await cursor.fetchone()
+            signal_id = result[0]
+            logger.info(f"Created signal with ID: {signal_id}")
+            return signal_id
+    
+    @staticmethod
+    async def get_signal(signal_id: int) -> Optional[Dict]:
+        """Get signal by ID"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+                FROM signals WHERE id = %s
+            """, (signal_id,))
+            result = await cursor.fetchone()
+            if result:
+                return compile_row_mapper(cursor_columns(cursor))(result)
+        return None
+    
+    @staticmethod
+    async def get_signals_by_source(source_uuid: str, limit: int = 100) -> List[Dict]:
+        """Get signals from a specific source"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+                FROM signals
+                WHERE source_uuid = %s
+                ORDER BY creation_time DESC
+                LIMIT %s
+            """, (source_uuid, limit))
+            results = await cursor.fetchall()
+            mapper = compile_row_mapper(cursor_columns(cursor))
+            return [mapper(result) for result in results]
+    
+    @staticmethod
+    async def update_signal_price(signal_id: int, current_price: float):
+        """Update current price for a signal"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                UPDATE signals
+                SET current_price = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (current_price, signal_id))
+            logger.debug(f"Updated signal {signal_id} current price to {current_price}")
+    
+    @staticmethod
+    async def update_signal_prices(prices: Dict[int, float]) -> int:
+        """Update current price for many signals ({signal_id: price}) in one statement"""
+        if not prices:
+            return 0
+        signal_ids, values = zip(*prices.items())
+        return await async_db.execute_update("""
+            UPDATE signals s
+            SET current_price = v.current_price, updated_at = CURRENT_TIMESTAMP
+            FROM unnest(%s::integer[], %s::numeric[]) AS v(id, current_price)
+            WHERE s.id = v.id
+        """, (list(signal_ids), list(values)))
+    
+    @staticmethod
+    async def get_recent_signals(limit: int = 50) -> List[Dict]:
+        """Get most recent signals"""
+        async with async_db.get_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+                FROM signals
+                ORDER BY creation_time DESC
+                LIMIT %s
+            """, (limit,))
+            results = await cursor.fetchall()
+            mapper = compile_row_mapper(cursor_columns(cursor))
+            return [mapper(result) for result in results]
@@ -0,0 +1,361 @@
+import argparse
+import itertools
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from src.config.index import Config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'OHLCV\x00\x00\x01'
+# Magic, candle interval in ms, row capacity, rows written. The columns follow at
+# HEADER_SIZE, each `capacity` rows long, in COLUMNS order.
+HEADER = struct.Struct('<8sqQQ')
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 24
+HEADER_SIZE = 64
+COLUMNS = ('times', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = (np.int64,) + (np.float64,) * 5
+INITIAL_CAPACITY = 1 << 16
+
+_INTERVAL = re.compile(r"(\d+)([smhdw])")
+_UNIT_MS = {'s': 1000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+_SERIES_FILE = re.compile(r"(.+)_(\d+[smhdw])\.ohlcv$")
+
+
+class Candles(NamedTuple):
+    """OHLCV columns: open time (epoch ms, ascending), open, high, low, close, volume"""
+    times: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.times)
+
+
+def interval_ms(interval: str) -> int:
+    """'1m' -> 60000, '4h' -> 14400000"""
+    match = _INTERVAL.fullmatch(interval)
+    if not match:
+        raise ValueError(f"Invalid candle interval {interval!r}; expected e.g. '1m', '15m', '4h', '1d'")
+    return int(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+def _parse_csv_rows(lines: List[str]) -> Candles:
+    # Volume is optional; files without it get NaN volumes
+    width = min(lines[0].count(',') + 1, 6)
+    if width < 5:
+        raise ValueError(f"Expected at least 5 kline columns (open time, open, high, low, close), got {width}")
+    data = np.loadtxt(lines, delimiter=',', usecols=range(width), ndmin=2)
+    times = data[:, 0].astype(np.int64)
+    # Newer kline exports stamp candles in microseconds
+    if len(times) and times[0] > 10 ** 14:
+        times //= 1000
+    volume = data[:, 5].copy() if width == 6 else np.full(len(times), np.nan)
+    return Candles(times, *(data[:, n].copy() for n in range(1, 5)), volume)
+
+
+def iter_csv(path: str, chunk_rows: int = 1_000_000) -> Iterator[Candles]:
+    """Candles from a kline CSV (open time, open, high, low, close[, volume, ...]) in chunks
+
+    A header line is skipped; open times may be epoch milliseconds or microseconds.
+    Without a volume column the volumes are NaN.
+    """
+    with open(path) as f:
+        first = f.readline()
+        lines = itertools.chain([first] if first[:1].isdigit() else [], f)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                return
+            yield _parse_csv_rows(chunk)
+
+
+def read_csv(path: str) -> Candles:
+    """A whole kline CSV as Candles, sorted by open time"""
+    chunks = list(iter_csv(path))
+    if not chunks:
+        return Candles(np.empty(0, np.int64), *(np.empty(0) for _ in range(5)))
+    candles = Candles(*(np.concatenate(column) for column in zip(*chunks)))
+    order = np.argsort(candles.times, kind='stable')
+    return Candles(*(column[order] for column in candles))
+
+
+class CandleSeries:
+    """One symbol and interval in a memory-mapped, columnar file
+
+    The file holds a header and one fixed-capacity region per column, so each
+    column is a contiguous array mapped straight from the page cache: `range`
+    finds the rows by binary search on the open times and returns views, with
+    no copying or parsing. `append` writes past the last row and then bumps the
+    row count in the header, so a reader never sees a partly written candle. When
+    the capacity runs out the file is rewritten with twice the room and swapped
+    in. Readers in other processes see appends as they happen and call `refresh`
+    after a rewrite.
+
+    Series are append-only: candles older than the last one are ignored, and a
+    candle with the last one's open time replaces it (a still-forming candle being
+    updated). Writes are thread-safe; with `sync` they are msynced before the count moves.
+    Reads take no lock: the mapping and its column views are swapped in as one
+    tuple, so a reader racing a rewrite uses either the old file or the new one.
+    """
+
+    def __init__(self, path: str, interval_ms: Optional[int] = None, readonly: bool = False, sync: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self.sync = sync
+        self._lock = threading.Lock()
+        # (mmap, column views), replaced as a whole by _open
+        self._mapping = None
+        if not os.path.exists(path):
+            if readonly or interval_ms is None:
+                raise FileNotFoundError(path)
+            self._write_file(path, interval_ms, INITIAL_CAPACITY, [], 0)
+        self._open()
+        if interval_ms is not None and interval_ms != self.interval_ms:
+            raise ValueError(f"{path} holds {self.interval_ms} ms candles, not {interval_ms} ms")
+
+    @staticmethod
+    def _write_file(path: str, interval_ms: int, capacity: int, columns: List[np.ndarray], count: int):
+        """Write a complete series file under a temporary name and move it into place"""
+        temporary = path + '.tmp'
+        with open(temporary, 'w+b') as f:
+            f.truncate(HEADER_SIZE + capacity * 8 * len(COLUMNS))
+            mapped = mmap.mmap(f.fileno(), 0)
+            mapped[:HEADER.size] = HEADER.pack(MAGIC, interval_ms, capacity, count)
+            for n, values in enumerate(columns):
+                start = HEADER_SIZE + n * capacity * 8
+                mapped[start:start + count * 8] = values[:count].tobytes()
+            mapped.flush()
+            mapped.close()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def _open(self):
+        with open(self.path, 'rb' if self.readonly else 'r+b') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE)
+            inode = os.fstat(f.fileno()).st_ino
+        magic, interval, capacity, _ = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a candle series file")
+        columns = [np.frombuffer(mapped, dtype, capacity, HEADER_SIZE + n * capacity * 8)
+                   for n, dtype in enumerate(DTYPES)]
+        previous = self._mapping
+        self._inode, self.interval_ms, self.capacity = inode, interval, capacity
+        self._mapping = (mapped, columns)
+        if previous is not None:
+            self._release(previous[0])
+
+    @staticmethod
+    def _release(mapped: mmap.mmap):
+        # Column views (ours, or handed out by `range`) keep a mapping alive until they are dropped
+        try:
+            mapped.close()
+        except BufferError:
+            pass
+
+    @property
+    def _map(self) -> mmap.mmap:
+        return self._mapping[0]
+
+    @property
+    def _columns(self) -> List[np.ndarray]:
+        return self._mapping[1]
+
+    def __len__(self):
+        return COUNT.unpack_from(self._mapping[0], COUNT_OFFSET)[0]
+
+    def refresh(self) -> bool:
+        """Pick up a file the writer has rewritten since this reader opened it"""
+        if os.stat(self.path).st_ino == self._inode:
+            return False
+        with self._lock:
+            self._open()
+        return True
+
+    def append(self, candles: Candles) -> int:
+        """Add candles newer than the stored ones; returns how many rows were written"""
+        if self.readonly:
+            raise PermissionError(f"{self.path} is open read-only")
+        times = np.asarray(candles.times, dtype=np.int64)
+        columns = [np.asarray(values, dtype=dtype) for values, dtype in zip(candles, DTYPES)]
+        if len(times) > 1 and (np.diff(times) <= 0).any():
+            # Sort, keeping the last of any candles sharing an open time
+            order = np.argsort(times, kind='stable')
+            times = times[order]
+            keep = np.append(times[1:] != times[:-1], True)
+            columns = [values[order][keep] for values in columns]
+            times = columns[0]
+        with self._lock:
+            count = len(self)
+            row = count
+            if count:
+                last = self._columns[0][count - 1]
+                newer = times >= last
+                columns = [values[newer] for values in columns]
+                if len(columns[0]) and columns[0][0] == last:
+                    row = count - 1
+            end = row + len(columns[0])
+            if end <= row:
+                return 0
+            if end > self.capacity:
+                self._grow(end, count)
+            for target, values in zip(self._columns, columns):
+                target[row:end] = values
+            if self.sync:
+                self._map.flush()
+            COUNT.pack_into(self._map, COUNT_OFFSET, end)
+            if self.sync:
+                self._map.flush(0, mmap.PAGESIZE)
+            return end - row
+
+    def _grow(self, needed: int, count: int):
+        capacity = max(needed, self.capacity * 2)
+        self._write_file(self.path, self.interval_ms, capacity, self._columns, count)
+        self._open()
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Candles:
+        """Zero-copy views of the candles opening in [start, end) (epoch ms; None for unbounded)"""
+        mapped, columns = self._mapping
+        count = COUNT.unpack_from(mapped, COUNT_OFFSET)[0]
+        times = columns[0][:count]
+        low = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+        high = count if end is None else int(np.searchsorted(times, end, 'left'))
+        return Candles(*(column[low:high] for column in columns))
+
+    def flush(self):
+        if not self.readonly:
+            self._map.flush()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            mapped, self._mapping = self._map, None
+            self._release(mapped)
+
+
+class CandleStore:
+    """Candle series under one directory: <directory>/<SYMBOL>_<interval>.ohlcv
+
+    Methods take an interval such as '1m' or '1h', defaulting to the store's.
+    `load` returns a symbol's full series at the default interval, so a store is
+    a backtest candle source. A store pickles as its settings only, and each
+    process maps the files itself.
+    """
+
+    def __init__(self, directory: str = None, interval: str = '1m', readonly: bool = False, sync: bool = False):
+        self.directory = directory or Config.CANDLE_STORE_DIR
+        self.interval = interval
+        self.readonly = readonly
+        self.sync = sync
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._lock = threading.Lock()
+        if not readonly:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def __getstate__(self):
+        return {'directory': self.directory, 'interval': self.interval, 'readonly': self.readonly,
+                'sync': self.sync}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def path(self, symbol: str, interval: Optional[str] = None) -> str:
+        return os.path.join(self.directory, f"{symbol}_{interval or self.interval}.ohlcv")
+
+    def series(self, symbol: str, interval: Optional[str] = None, create: bool = False) -> Optional[CandleSeries]:
+        """The open series for a symbol, or None if it has no file and `create` is not set"""
+        interval = interval or self.interval
+        key = (symbol, interval)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    path = self.path(symbol, interval)
+                    if not create and not os.path.exists(path):
+                        return None
+                    series = self._series[key] = CandleSeries(path, interval_ms(interval), self.readonly, self.sync)
+        return series
+
+    def append(self, symbol: str, candles: Candles, interval: Optional[str] = None) -> int:
+        return self.series(symbol, interval, create=True).append(candles)
+
+    def range(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None,
+              interval: Optional[str] = None) -> Optional[Candles]:
+        """Zero-copy candles opening in [start, end) (epoch ms), or None for an unknown symbol"""
+        series = self.series(symbol, interval)
+        return None if series is None else series.range(start, end)
+
+    def load(self, symbol: str) -> Optional[Candles]:
+        return self.range(symbol)
+
+    def load_csv(self, path: str, symbol: str, interval: Optional[str] = None, chunk_rows: int = 1_000_000) -> int:
+        """Bulk load a kline CSV into a series; rows already stored are skipped"""
+        series = self.series(symbol, interval, create=True)
+        loaded = 0
+        for candles in iter_csv(path, chunk_rows):
+            loaded += series.append(candles)
+        series.flush()
+        return loaded
+
+    def symbols(self, interval: Optional[str] = None) -> List[str]:
+        interval = interval or self.interval
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(match.group(1) for match in map(_SERIES_FILE.match, os.listdir(self.directory))
+                      if match and match.group(2) == interval)
+
+    def stats(self) -> Dict:
+        sizes = {}
+        for name in sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []:
+            match = _SERIES_FILE.match(name)
+            if match:
+                series = self.series(match.group(1), match.group(2))
+                candles = series.range()
+                sizes[name] = {'candles': len(candles), 'capacity': series.capacity,
+                               'first': int(candles.times[0]) if len(candles) else None,
+                               'last': int(candles.times[-1]) if len(candles) else None}
+        return sizes
+
+    def close(self):
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load kline CSVs into the candle store or list its series")
+    parser.add_argument('command', choices=['load', 'info'])
+    parser.add_argument('files', nargs='*', help="CSV files named <SYMBOL>_<interval>.csv (load)")
+    parser.add_argument('--dir', default=Config.CANDLE_STORE_DIR)
+    parser.add_argument('--symbol', help="symbol for a single CSV not named after it")
+    parser.add_argument('--interval', help="interval for a single CSV not named after it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = CandleStore(args.dir, readonly=args.command == 'info')
+    try:
+        if args.command == 'load':
+            for path in args.files:
+                match = re.match(r"(.+)_(\d+[smhdw])\.csv$", os.path.basename(path))
+                symbol = args.symbol or (match and match.group(1))
+                interval = args.interval or (match and match.group(2))
+                if not symbol or not interval:
+                    parser.error(f"{path}: name it <SYMBOL>_<interval>.csv or pass --symbol and --interval")
+                rows = store.load_csv(path, symbol, interval)
+                logger.info(f"Loaded {rows} candles from {path} into {symbol} {interval}")
+        else:
+            for name, info in store.stats().items():
+                print(f"{name}: {info['candles']} candles, {info['first']} .. {info['last']}")
+    finally:
+        store.close()
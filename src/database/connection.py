@@ -1,27 +1,171 @@
 import psycopg2
+import psycopg2.pool
+import threading
+import time
 from contextlib import contextmanager
 from src.config.index import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    """Raised when no pooled connection becomes available within the acquire timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with blocking checkout and usage stats"""
+    
+    def __init__(self, minconn, maxconn, timeout, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size: min={minconn}, max={maxconn}")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._connect_kwargs = connect_kwargs
+        self._idle = []
+        self._in_use = set()
+        self._opening = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._acquires = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        for _ in range(minconn):
+            self._idle.append(self._new_connection())
+    
+    def _new_connection(self):
+        return psycopg2.connect(**self._connect_kwargs)
+    
+    def getconn(self, timeout=None):
+        """Check out a connection, blocking up to `timeout` seconds if the pool is exhausted"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise psycopg2.pool.PoolError("connection pool is closed")
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if len(self._in_use) + self._opening < self.maxconn:
+                        # Reserve the slot before connecting so concurrent callers respect maxconn
+                        conn = None
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a database connection "
+                            f"({len(self._in_use)}/{self.maxconn} in use)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            if conn is not None:
+                self._in_use.add(id(conn))
+
+        if conn is None:
+            try:
+                conn = self._new_connection()
+            finally:
+                with self._cond:
+                    self._opening -= 1
+                    if conn is not None:
+                        self._in_use.add(id(conn))
+                    else:
+                        self._cond.notify()
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._acquires += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+    
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool"""
+        with self._cond:
+            self._in_use.discard(id(conn))
+            if self._closed or close or conn.closed or len(self._idle) >= self.maxconn:
+                if not conn.closed:
+                    conn.close()
+            else:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._idle.append(conn)
+            self._cond.notify()
+    
+    def closeall(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._cond.notify_all()
+    
+    def stats(self):
+        """Return a snapshot of pool usage"""
+        with self._cond:
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'acquires': self._acquires,
+                'timeouts': self._timeouts,
+                'total_wait_time': self._total_wait,
+                'avg_wait_time': self._total_wait / self._acquires if self._acquires else 0.0,
+                'max_wait_time': self._max_wait,
+            }
+
+
 class DatabaseConnection:
     """Manages PostgreSQL database connections"""
     
     def __init__(self):
         self.config = Config()
         self.conn = None
+        self.pool = None
+        self._local = threading.local()
+    
+    def _connect_kwargs(self):
+        return dict(
+            host=self.config.DB_HOST,
+            port=self.config.DB_PORT,
+            database=self.config.DB_NAME,
+            user=self.config.DB_USER,
+            password=self.config.DB_PASSWORD
+        )
     
-    def connect(self):
-        """Establish a connection to the PostgreSQL database"""
+    def connect(self, pooled=None, min_size=None, max_size=None, timeout=None):
+        """Establish a connection (or a connection pool) to the PostgreSQL database
+
+        Pooled mode is enabled by `pooled=True` or the DB_POOL_ENABLED setting; pool
+        sizing and the acquire timeout default to DB_POOL_MIN/DB_POOL_MAX/DB_POOL_TIMEOUT.
+        """
+        if pooled is None:
+            pooled = self.config.DB_POOL_ENABLED
         try:
-            self.conn = psycopg2.connect(
-                host=self.config.DB_HOST,
-                port=self.config.DB_PORT,
-                database=self.config.DB_NAME,
-                user=self.config.DB_USER,
-                password=self.config.DB_PASSWORD
-            )
+            if pooled:
+                self.pool = ConnectionPool(
+                    min_size if min_size is not None else self.config.DB_POOL_MIN,
+                    max_size if max_size is not None else self.config.DB_POOL_MAX,
+                    timeout if timeout is not None else self.config.DB_POOL_TIMEOUT,
+                    **self._connect_kwargs()
+                )
+                logger.info(f"Created PostgreSQL connection pool "
+                            f"(min={self.pool.minconn}, max={self.pool.maxconn})")
+                return self.pool
+            self.conn = psycopg2.connect(**self._connect_kwargs())
             logger.info("Successfully connected to PostgreSQL database")
             return self.conn
         except psycopg2.Error as e:
@@ -30,23 +174,71 @@ class DatabaseConnection:
     
     def disconnect(self):
         """Close the database connection"""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            logger.info("Closed database connection pool")
         if self.conn:
             self.conn.close()
             logger.info("Disconnected from database")
     
     @contextmanager
-    def get_cursor(self):
-        """Context manager for database cursor"""
-        cursor = self.conn.cursor()
+    def connection(self):
+        """Pin one connection to the current thread for the duration of the block
+
+        Every `get_cursor` call made inside the block (e.g. during one Flask request)
+        reuses the same pooled connection. Without a pool this yields the shared connection.
+        """
+        if self.pool is None or getattr(self._local, 'conn', None) is not None:
+            yield self.conn if self.pool is None else self._local.conn
+            return
+        conn = self.pool.getconn()
+        self._local.conn = conn
         try:
-            yield cursor
-            self.conn.commit()
-        except Exception as e:
-            self.conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
+            yield conn
         finally:
-            cursor.close()
+            self._local.conn = None
+            self.pool.putconn(conn)
+    
+    @contextmanager
+    def get_cursor(self):
+        """Context manager for database cursor"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def get_server_cursor(self, name, itersize=1000):
+        """Context manager for a server-side (named) cursor that fetches rows in batches
+
+        Rows are streamed `itersize` at a time, so memory stays flat for large result sets.
+        In pooled mode the cursor gets its own connection; on the shared connection, avoid
+        other queries until the block exits, as their commit would close the cursor.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor(name=name)
+            cursor.itersize = itersize
+            try:
+                yield cursor
+                # A named cursor must be closed before the transaction that owns it ends
+                cursor.close()
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+    
+    def pool_stats(self):
+        """Return connection pool statistics, or None when not running in pooled mode"""
+        return self.pool.stats() if self.pool else None
     
     def execute_query(self, query, params=None):
         """Execute a SELECT query and return results"""
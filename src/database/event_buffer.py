@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from src.database.queries import ExchangeEventQueries
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeEventBuffer:
+    """Write-behind logger for exchange_events
+
+    `log` only appends to memory and returns, so order paths never wait on the
+    database. A background thread writes pending events with one multi-row INSERT
+    once `max_size` are pending or the oldest has waited `max_delay` seconds. Each
+    event keeps the time it was logged as created_at. While the database is
+    unreachable, pending events are kept up to `max_pending`, after which the
+    oldest are dropped.
+    """
+
+    def __init__(self, max_size: int = 200, max_delay: float = 0.5, max_pending: int = 100_000):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._pending = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name="exchange-events", daemon=True)
+        self._thread.start()
+
+    def log(self, trade_id, event_type, event_data, exchange):
+        """Queue an event; never blocks on the database"""
+        row = (trade_id, event_type, event_data, exchange, datetime.now())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ExchangeEventBuffer is closed")
+            self._pending.append(row)
+            self.logged += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self.max_size:
+                self._cond.notify()
+
+    def _take_batch(self):
+        batch, self._pending = self._pending, []
+        self._oldest = None
+        return batch
+
+    def flush(self):
+        """Write all pending events now"""
+        with self._cond:
+            batch = self._take_batch()
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        with self._flush_lock:
+            try:
+                ExchangeEventQueries.log_events(batch)
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Failed to write {len(batch)} exchange events: {e}")
+                self._requeue(batch)
+                return
+            self.written += len(batch)
+
+    def _requeue(self, batch):
+        with self._cond:
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+                logger.warning(f"Dropped {overflow} exchange events while the database was unavailable")
+            if self._pending and self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.max_size:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                closed = self._closed
+                batch = self._take_batch()
+            self._write(batch)
+            if closed:
+                return
+
+    def close(self, timeout: float = 10.0):
+        """Write pending events and stop the background writer
+
+        A failed final write is retried for up to `timeout` seconds; events still
+        unwritten after that are counted as dropped.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(min(0.5, max(deadline - time.monotonic(), 0)))
+            self.flush()
+        with self._cond:
+            lost = len(self._take_batch())
+        if lost:
+            self.dropped += lost
+            logger.error(f"Dropped {lost} exchange events that could not be written before closing")
+        logger.info(f"Exchange event buffer closed after writing {self.written} events")
+
+    def stats(self):
+        return {
+            'logged': self.logged,
+            'written': self.written,
+            'pending': len(self._pending),
+            'dropped': self.dropped,
+            'failed_batches': self.failed_batches,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,161 @@
+import json
+import logging
+import select
+import threading
+import psycopg2
+import psycopg2.extensions
+from src.database.cache import reference_cache
+from src.database.connection import db
+from src.database.queries_signals import (
+    ExchangeQueries, SourceQueries, TradingPairQueries, ExchangeTradingPairQueries
+)
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CHANNEL = 'reference_changes'
+
+# op passed to handlers (with table None) after a reconnect, when any change may have been missed
+RESYNC = 'RESYNC'
+
+
+class NotificationListener:
+    """Background LISTEN loop on a dedicated autocommit connection
+
+    `channel` is one channel name or a list of them. Subclasses implement
+    `dispatch(payload, channel)` for each notification and may override `on_connect()`,
+    which runs after every (re)connect before notifications are read.
+    """
+
+    def __init__(self, channel, reconnect_delay: float = 5.0):
+        self.channels = [channel] if isinstance(channel, str) else list(channel)
+        self.reconnect_delay = reconnect_delay
+        self.notifications = 0
+        self._conn = None
+        self._ready = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def connected(self):
+        """True while the LISTEN connection is up, i.e. no notification can be missed"""
+        return self.running and self._ready
+
+    def start(self):
+        """Start listening in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"listen-{'+'.join(self.channels)}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening and close the listener connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self):
+        self._conn = psycopg2.connect(**db._connect_kwargs())
+        self._conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cursor:
+            for channel in self.channels:
+                cursor.execute(f"LISTEN {channel};")
+        logger.info(f"Listening for notifications on {', '.join(self.channels)}")
+
+    def on_connect(self):
+        """Hook run after each (re)connect; notifications may have been missed while down"""
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                self.on_connect()
+                self._ready = True
+                while not self._stop.is_set():
+                    if select.select([self._conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    self._conn.poll()
+                    while self._conn.notifies:
+                        notify = self._conn.notifies.pop(0)
+                        self.notifications += 1
+                        self.dispatch(notify.payload, notify.channel)
+            except psycopg2.Error as e:
+                logger.error(f"Listener on {', '.join(self.channels)} lost its connection: {e}")
+                self._stop.wait(self.reconnect_delay)
+            except Exception:
+                # Anything else (a bad payload in dispatch, a select error) must not end the
+                # thread and leave every dependent cache stale; reconnect and carry on
+                logger.exception(f"Listener on {', '.join(self.channels)} failed; reconnecting")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                self._ready = False
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+    def dispatch(self, payload: str, channel: str):
+        raise NotImplementedError
+
+
+class ReferenceChangeListener(NotificationListener):
+    """Applies reference table changes published via LISTEN/NOTIFY to in-process state
+
+    Every notification evicts the affected reference_cache entries and is then passed
+    to the handlers registered with `subscribe`, as (table, op, old_row, new_row).
+    After a reconnect the handlers get (None, RESYNC, None, None) and must reload
+    everything they derived from the reference tables.
+    """
+
+    def __init__(self, channel: str = REFERENCE_CHANNEL, reconnect_delay: float = 5.0):
+        super().__init__(channel, reconnect_delay)
+        self.handlers = []
+        self._connects = 0
+
+    def subscribe(self, handler):
+        """Register a callable invoked as handler(table, op, old_row, new_row) for each change"""
+        self.handlers.append(handler)
+        return handler
+
+    def on_connect(self):
+        # Changes may have been missed while disconnected
+        reference_cache.clear()
+        self._connects += 1
+        if self._connects > 1:
+            self._notify(None, RESYNC, None, None)
+
+    def dispatch(self, payload: str, channel: str = REFERENCE_CHANNEL):
+        """Apply one notification payload"""
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed reference change payload: {payload!r}")
+            return
+        table, op = change.get('table'), change.get('op')
+        old_row, new_row = change.get('old'), change.get('new')
+        for row in (old_row, new_row):
+            if not row:
+                continue
+            if table == 'exchanges':
+                ExchangeQueries.invalidate_cache(row['uuid'])
+            elif table == 'sources':
+                SourceQueries.invalidate_cache(row['uuid'])
+            elif table == 'trading_pairs':
+                TradingPairQueries.invalidate_cache(row['uuid'])
+            elif table == 'exchange_trading_pairs':
+                ExchangeTradingPairQueries.invalidate_cache()
+        self._notify(table, op, old_row, new_row)
+
+    def _notify(self, table, op, old_row, new_row):
+        for handler in self.handlers:
+            try:
+                handler(table, op, old_row, new_row)
+            except Exception as e:
+                logger.error(f"Reference change handler {handler!r} failed: {e}")
+
+
+# Global listener instance
+reference_listener = ReferenceChangeListener()
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from src.database.queries import MessageQueries
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBuffer:
+    """Buffered writer for Telegram messages
+
+    Messages are accumulated in memory and written with one multi-row INSERT once
+    `max_size` messages are pending or the oldest one has waited `max_delay` seconds.
+    `add` returns a Future that resolves to the generated message ID.
+    """
+
+    def __init__(self, max_size: int = 500, max_delay: float = 0.25):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.flushed_batches = 0
+        self.flushed_messages = 0
+        self._thread = threading.Thread(target=self._run, name="message-buffer", daemon=True)
+        self._thread.start()
+
+    def add(self, message_text, message_date, sender_id, sender_name, group_id) -> Future:
+        """Queue a message for insertion and return a Future for its ID"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MessageBuffer is closed")
+            self._pending.append(((message_text, message_date, sender_id, sender_name, group_id), future))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self.max_size:
+                self._cond.notify()
+        return future
+
+    def save_message(self, message_text, message_date, sender_id, sender_name, group_id) -> int:
+        """Queue a message and block until it has been written, returning its ID"""
+        return self.add(message_text, message_date, sender_id, sender_name, group_id).result()
+
+    def _take_batch(self):
+        batch, self._pending = self._pending, []
+        self._oldest = None
+        return batch
+
+    def flush(self):
+        """Write all pending messages now"""
+        with self._cond:
+            batch = self._take_batch()
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        with self._flush_lock:
+            try:
+                ids = MessageQueries.save_messages([row for row, _ in batch])
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} buffered messages: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            for (_, future), message_id in zip(batch, ids):
+                future.set_result(message_id)
+            self.flushed_batches += 1
+            self.flushed_messages += len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.max_size:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                closed = self._closed
+                batch = self._take_batch()
+            self._write(batch)
+            if closed:
+                return
+
+    def close(self):
+        """Flush pending messages and stop the background writer"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        logger.info(f"Message buffer closed after {self.flushed_messages} messages "
+                    f"in {self.flushed_batches} batches")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import re
+import time
+from src.database.connection import db
+from src.database.migrations import ADD_TELEGRAM_MESSAGE_KEY, CORE_TABLES_SQL
+from src.database.migrations_extended import LEVERAGE_AND_TP_SQL
+from src.database.migrations_indexes import HOT_PATH_INDEXES_SQL
+from src.database.migrations_signals import (
+    ADD_SIGNAL_SYMBOL, SIGNAL_TABLES_SQL, REFERENCE_CHANGE_FUNCTION, REFERENCE_CHANGE_TRIGGERS,
+    SIGNAL_CHANGE_NOTIFICATIONS
+)
+
+logger = logging.getLogger(__name__)
+
+# Index names built by a migration's CREATE INDEX CONCURRENTLY statements
+CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(\w+)\"?", re.IGNORECASE)
+
+# Arbitrary key for pg_advisory_lock, so concurrent deploys apply migrations one at a time
+MIGRATION_LOCK_ID = 72_465_310
+
+CREATE_SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    duration_ms DECIMAL(12, 3)
+);
+"""
+
+
+class MigrationError(Exception):
+    """Raised when the recorded schema history does not match the migrations in the code"""
+
+
+class Migration:
+    """One ordered schema change, made of SQL statements applied together
+
+    Transactional migrations are batched into a single transaction with every other
+    pending transactional migration. Set `transactional=False` for statements that
+    cannot run inside a transaction block (e.g. CREATE INDEX CONCURRENTLY); those run
+    one statement at a time in autocommit mode and must be idempotent.
+    """
+
+    def __init__(self, version, name, statements, transactional=True):
+        self.version = version
+        self.name = name
+        self.statements = list(statements)
+        self.transactional = transactional
+
+    @property
+    def checksum(self):
+        digest = hashlib.sha256()
+        for statement in self.statements:
+            digest.update(statement.strip().encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.name!r})"
+
+
+# Append new migrations to the end; never edit or reorder one that has been applied
+MIGRATIONS = [
+    Migration(1, 'core_tables', CORE_TABLES_SQL),
+    Migration(2, 'leverage_and_tp_levels', LEVERAGE_AND_TP_SQL),
+    Migration(3, 'signal_tables', SIGNAL_TABLES_SQL),
+    Migration(4, 'reference_change_notifications', [REFERENCE_CHANGE_FUNCTION] + REFERENCE_CHANGE_TRIGGERS),
+    Migration(5, 'signal_change_notifications', [SIGNAL_CHANGE_NOTIFICATIONS]),
+    Migration(6, 'hot_path_indexes', HOT_PATH_INDEXES_SQL, transactional=False),
+    Migration(7, 'signal_symbol', [ADD_SIGNAL_SYMBOL]),
+    Migration(8, 'telegram_message_key', [ADD_TELEGRAM_MESSAGE_KEY]),
+]
+
+
+def _validate(migrations):
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)):
+        raise MigrationError(f"Migration versions must be unique and ascending: {versions}")
+
+
+def applied_migrations(cursor):
+    """Return {version: (name, checksum)} for every migration recorded in schema_version"""
+    cursor.execute("SELECT version, name, checksum FROM schema_version ORDER BY version;")
+    return {version: (name, checksum) for version, name, checksum in cursor.fetchall()}
+
+
+def pending_migrations(applied, migrations=None):
+    """Return the migrations not yet applied, after checking the applied ones are unchanged"""
+    migrations = MIGRATIONS if migrations is None else migrations
+    known = {migration.version: migration for migration in migrations}
+    for version, (name, checksum) in applied.items():
+        migration = known.get(version)
+        if migration is None:
+            raise MigrationError(f"Database has migration {version} ({name}) which is not defined in the code")
+        if migration.checksum != checksum:
+            raise MigrationError(
+                f"Checksum mismatch for applied migration {version} ({name}); "
+                f"add a new migration instead of editing an applied one"
+            )
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+def _apply(cursor, migration):
+    """Run one migration's statements and record it, returning its duration in ms"""
+    started = time.perf_counter()
+    for statement in migration.statements:
+        cursor.execute(statement)
+    duration_ms = (time.perf_counter() - started) * 1000
+    cursor.execute(
+        "INSERT INTO schema_version (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s);",
+        (migration.version, migration.name, migration.checksum, round(duration_ms, 3))
+    )
+    logger.info(f"Applied migration {migration.version} ({migration.name}) in {duration_ms:.1f} ms")
+    return duration_ms
+
+
+def _apply_batch(conn, batch):
+    """Apply consecutive transactional migrations in one transaction (all or nothing)"""
+    timings = []
+    try:
+        with conn.cursor() as cursor:
+            for migration in batch:
+                timings.append((migration.version, migration.name, _apply(cursor, migration)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return timings
+
+
+def _drop_invalid_indexes(cursor, migration):
+    """Drop indexes of `migration` left INVALID by an interrupted CREATE INDEX CONCURRENTLY
+
+    Otherwise CREATE INDEX CONCURRENTLY IF NOT EXISTS would skip them on retry. Only
+    the plain indexes this migration builds are considered: other invalid indexes may
+    be another session's build in progress, and partitioned ones can't be dropped
+    concurrently (nor built that way).
+    """
+    names = sorted({name for statement in migration.statements for name in CONCURRENT_INDEX.findall(statement)})
+    if not names:
+        return
+    cursor.execute("""
+        SELECT quote_ident(n.nspname) || '.' || quote_ident(c.relname)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE NOT i.indisvalid AND c.relkind = 'i' AND n.nspname = current_schema()
+          AND c.relname = ANY(%s);
+    """, (names,))
+    for (index,) in cursor.fetchall():
+        logger.warning(f"Dropping invalid index {index} left by an interrupted build")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index};")
+
+
+def _apply_autocommit(conn, migration):
+    """Apply a non-transactional migration one statement at a time"""
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            _drop_invalid_indexes(cursor, migration)
+            return (migration.version, migration.name, _apply(cursor, migration))
+    finally:
+        conn.autocommit = False
+
+
+def migrate(migrations=None):
+    """Apply all pending migrations and return [(version, name, duration_ms)] for each one applied
+
+    Holds a session advisory lock for the whole run, so concurrent deploys wait for
+    each other instead of racing. Already-applied migrations are skipped without
+    running any of their DDL.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    _validate(migrations)
+    started = time.perf_counter()
+    timings = []
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+            cursor.execute(CREATE_SCHEMA_VERSION_TABLE)
+        conn.commit()
+        try:
+            with conn.cursor() as cursor:
+                pending = pending_migrations(applied_migrations(cursor), migrations)
+            conn.commit()
+            if not pending:
+                logger.info("Database schema is up to date")
+                return timings
+
+            batch = []
+            for migration in pending:
+                if migration.transactional:
+                    batch.append(migration)
+                    continue
+                if batch:
+                    timings.extend(_apply_batch(conn, batch))
+                    batch = []
+                timings.append(_apply_autocommit(conn, migration))
+            if batch:
+                timings.extend(_apply_batch(conn, batch))
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+            conn.commit()
+    logger.info(f"Applied {len(timings)} migration(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return timings
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db.connect()
+    try:
+        migrate()
+    finally:
+        db.disconnect()
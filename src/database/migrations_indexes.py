@@ -0,0 +1,40 @@
+# Partial and composite indexes for the hot read paths. Built CONCURRENTLY so live
+# tables keep accepting writes, which means each statement must run on its own
+# outside a transaction (see Migration.transactional).
+
+# TradeQueries.get_open_trades: status = 'OPEN' [AND exchange = %s]
+CREATE_TRADES_OPEN_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_trades_open_exchange
+    ON trades(exchange) WHERE status = 'OPEN';
+"""
+
+# MessageQueries.get_unparsed_messages: parsed = FALSE ORDER BY created_at
+CREATE_MESSAGES_UNPARSED_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_telegram_messages_unparsed
+    ON telegram_messages(created_at) WHERE parsed = FALSE;
+"""
+
+# PositionQueries.get_monitoring_positions and the price snapshot join on trade_id
+CREATE_POSITIONS_MONITORING_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_positions_monitoring_trade_id
+    ON positions(trade_id) WHERE monitoring = TRUE;
+"""
+
+# SignalQueries.get_signals_by_source and source-filtered pages: source_uuid = %s ORDER BY creation_time DESC, id DESC
+CREATE_SIGNALS_SOURCE_CREATION_TIME_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_signals_source_creation_time_id
+    ON signals(source_uuid, creation_time, id);
+"""
+
+# Superseded by the composite index above, which serves the same lookups
+DROP_SIGNALS_SOURCE_UUID_INDEX = """
+DROP INDEX CONCURRENTLY IF EXISTS idx_signals_source_uuid;
+"""
+
+HOT_PATH_INDEXES_SQL = [
+    CREATE_TRADES_OPEN_INDEX,
+    CREATE_MESSAGES_UNPARSED_INDEX,
+    CREATE_POSITIONS_MONITORING_INDEX,
+    CREATE_SIGNALS_SOURCE_CREATION_TIME_INDEX,
+    DROP_SIGNALS_SOURCE_UUID_INDEX,
+]
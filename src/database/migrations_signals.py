@@ -3,112 +3,202 @@ from src.database.connection import db
 
 logger = logging.getLogger(__name__)
 
+CREATE_EXCHANGES_TABLE = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    api_key VARCHAR(500) NOT NULL,
+    uuid VARCHAR(36) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_exchanges_uuid ON exchanges(uuid);
+CREATE INDEX IF NOT EXISTS idx_exchanges_name ON exchanges(name);
+"""
+
+CREATE_SOURCES_TABLE = """
+CREATE TABLE IF NOT EXISTS sources (
+    id SERIAL PRIMARY KEY,
+    uuid VARCHAR(36) UNIQUE NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    exchange_uuid VARCHAR(36) NOT NULL,
+    telegram_group_id BIGINT NOT NULL,
+    message_sample_short TEXT,
+    message_sample_long TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (exchange_uuid) REFERENCES exchanges(uuid) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_sources_exchange_uuid ON sources(exchange_uuid);
+CREATE INDEX IF NOT EXISTS idx_sources_telegram_group_id ON sources(telegram_group_id);
+CREATE INDEX IF NOT EXISTS idx_sources_uuid ON sources(uuid);
+"""
+
+CREATE_TRADING_PAIRS_TABLE = """
+CREATE TABLE IF NOT EXISTS trading_pairs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    uuid VARCHAR(36) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_trading_pairs_uuid ON trading_pairs(uuid);
+CREATE INDEX IF NOT EXISTS idx_trading_pairs_name ON trading_pairs(name);
+"""
+
+CREATE_EXCHANGE_TRADING_PAIRS_TABLE = """
+CREATE TABLE IF NOT EXISTS exchange_trading_pairs (
+    id SERIAL PRIMARY KEY,
+    trading_pair_uuid VARCHAR(36) NOT NULL,
+    exchange_name VARCHAR(100) NOT NULL,
+    exchange_uuid VARCHAR(36) NOT NULL,
+    max_leverage INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (trading_pair_uuid) REFERENCES trading_pairs(uuid) ON DELETE CASCADE,
+    FOREIGN KEY (exchange_uuid) REFERENCES exchanges(uuid) ON DELETE CASCADE,
+    UNIQUE(trading_pair_uuid, exchange_uuid)
+);
+CREATE INDEX IF NOT EXISTS idx_exchange_trading_pairs_trading_pair ON exchange_trading_pairs(trading_pair_uuid);
+CREATE INDEX IF NOT EXISTS idx_exchange_trading_pairs_exchange ON exchange_trading_pairs(exchange_uuid);
+"""
+
+CREATE_SIGNALS_TABLE = """
+CREATE TABLE IF NOT EXISTS signals (
+    id SERIAL PRIMARY KEY,
+    creation_time TIMESTAMP NOT NULL,
+    source_uuid VARCHAR(36) NOT NULL,
+    source_entry_price DECIMAL(18, 8),
+    current_price DECIMAL(18, 8),
+    tp1 DECIMAL(18, 8),
+    tp2 DECIMAL(18, 8),
+    tp3 DECIMAL(18, 8),
+    tp4 DECIMAL(18, 8),
+    sl DECIMAL(18, 8),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_uuid) REFERENCES sources(uuid) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_signals_creation_time ON signals(creation_time);
+CREATE INDEX IF NOT EXISTS idx_signals_source_uuid ON signals(source_uuid);
+CREATE INDEX IF NOT EXISTS idx_signals_creation_time_id ON signals(creation_time, id);
+"""
+
+# The traded pair of a signal in trades.symbol form ('BTCUSDT'), set by the parser
+ADD_SIGNAL_SYMBOL = """
+ALTER TABLE signals ADD COLUMN IF NOT EXISTS symbol VARCHAR(20);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol_creation_time ON signals(symbol, creation_time);
+"""
+
+SIGNAL_CHANGE_NOTIFICATIONS = """
+CREATE OR REPLACE FUNCTION notify_signal_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('signal_changes', json_build_object(
+        'op', TG_OP,
+        'signal', CASE WHEN TG_OP = 'DELETE' THEN to_jsonb(OLD) ELSE to_jsonb(NEW) END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS signals_notify_change ON signals;
+CREATE TRIGGER signals_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON signals
+    FOR EACH ROW EXECUTE FUNCTION notify_signal_change();
+CREATE INDEX IF NOT EXISTS idx_signals_updated_at_id ON signals(updated_at, id);
+"""
+
+REFERENCE_TABLES = ['exchanges', 'sources', 'trading_pairs', 'exchange_trading_pairs']
+
+# Large and secret columns are stripped to stay well under the 8000 byte payload limit
+REFERENCE_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_reference_change() RETURNS trigger AS $$
+DECLARE
+    stripped TEXT[] := ARRAY['api_key', 'message_sample_short', 'message_sample_long'];
+    old_row JSONB;
+    new_row JSONB;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_row := to_jsonb(OLD) - stripped;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_row := to_jsonb(NEW) - stripped;
+    END IF;
+    PERFORM pg_notify('reference_changes', json_build_object(
+        'table', TG_TABLE_NAME, 'op', TG_OP, 'old', old_row, 'new', new_row
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+REFERENCE_CHANGE_TRIGGERS = [f"""
+DROP TRIGGER IF EXISTS {table}_notify_change ON {table};
+CREATE TRIGGER {table}_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION notify_reference_change();
+""" for table in REFERENCE_TABLES]
+
+SIGNAL_TABLES_SQL = [
+    CREATE_EXCHANGES_TABLE,
+    CREATE_SOURCES_TABLE,
+    CREATE_TRADING_PAIRS_TABLE,
+    CREATE_EXCHANGE_TRADING_PAIRS_TABLE,
+    CREATE_SIGNALS_TABLE,
+]
+
 
 def create_exchanges():
     """Create exchanges table to track multiple exchanges and their API credentials"""
     with db.get_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS exchanges (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100) UNIQUE NOT NULL,
-                api_key VARCHAR(500) NOT NULL,
-                uuid VARCHAR(36) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE INDEX IF NOT EXISTS idx_exchanges_uuid ON exchanges(uuid);
-            CREATE INDEX IF NOT EXISTS idx_exchanges_name ON exchanges(name);
-        """)
+        cursor.execute(CREATE_EXCHANGES_TABLE)
     logger.info("Created 'exchanges' table")
 
 
 def create_sources():
     """Create sources table to track Telegram groups and their signal sources"""
     with db.get_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sources (
-                id SERIAL PRIMARY KEY,
-                uuid VARCHAR(36) UNIQUE NOT NULL,
-                name VARCHAR(255) NOT NULL,
-                exchange_uuid VARCHAR(36) NOT NULL,
-                telegram_group_id BIGINT NOT NULL,
-                message_sample_short TEXT,
-                message_sample_long TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (exchange_uuid) REFERENCES exchanges(uuid) ON DELETE CASCADE
-            );
-            CREATE INDEX IF NOT EXISTS idx_sources_exchange_uuid ON sources(exchange_uuid);
-            CREATE INDEX IF NOT EXISTS idx_sources_telegram_group_id ON sources(telegram_group_id);
-            CREATE INDEX IF NOT EXISTS idx_sources_uuid ON sources(uuid);
-        """)
+        cursor.execute(CREATE_SOURCES_TABLE)
     logger.info("Created 'sources' table")
 
 
 def create_trading_pairs():
     """Create trading_pairs table to track unique trading pairs"""
     with db.get_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trading_pairs (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100) UNIQUE NOT NULL,
-                uuid VARCHAR(36) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE INDEX IF NOT EXISTS idx_trading_pairs_uuid ON trading_pairs(uuid);
-            CREATE INDEX IF NOT EXISTS idx_trading_pairs_name ON trading_pairs(name);
-        """)
+        cursor.execute(CREATE_TRADING_PAIRS_TABLE)
     logger.info("Created 'trading_pairs' table")
 
 
 def create_exchange_trading_pairs():
     """Create exchange_trading_pairs table to map trading pairs to exchanges with their max leverage"""
     with db.get_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS exchange_trading_pairs (
-                id SERIAL PRIMARY KEY,
-                trading_pair_uuid VARCHAR(36) NOT NULL,
-                exchange_name VARCHAR(100) NOT NULL,
-                exchange_uuid VARCHAR(36) NOT NULL,
-                max_leverage INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (trading_pair_uuid) REFERENCES trading_pairs(uuid) ON DELETE CASCADE,
-                FOREIGN KEY (exchange_uuid) REFERENCES exchanges(uuid) ON DELETE CASCADE,
-                UNIQUE(trading_pair_uuid, exchange_uuid)
-            );
-            CREATE INDEX IF NOT EXISTS idx_exchange_trading_pairs_trading_pair ON exchange_trading_pairs(trading_pair_uuid);
-            CREATE INDEX IF NOT EXISTS idx_exchange_trading_pairs_exchange ON exchange_trading_pairs(exchange_uuid);
-        """)
+        cursor.execute(CREATE_EXCHANGE_TRADING_PAIRS_TABLE)
     logger.info("Created 'exchange_trading_pairs' table")
 
 
 def create_signals():
     """Create signals table to track trading signals from sources"""
     with db.get_cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS signals (
-                id SERIAL PRIMARY KEY,
-                creation_time TIMESTAMP NOT NULL,
-                source_uuid VARCHAR(36) NOT NULL,
-                source_entry_price DECIMAL(18, 8),
-                current_price DECIMAL(18, 8),
-                tp1 DECIMAL(18, 8),
-                tp2 DECIMAL(18, 8),
-                tp3 DECIMAL(18, 8),
-                tp4 DECIMAL(18, 8),
-                sl DECIMAL(18, 8),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (source_uuid) REFERENCES sources(uuid) ON DELETE CASCADE
-            );
-            CREATE INDEX IF NOT EXISTS idx_signals_creation_time ON signals(creation_time);
-            CREATE INDEX IF NOT EXISTS idx_signals_source_uuid ON signals(source_uuid);
-        """)
+        cursor.execute(CREATE_SIGNALS_TABLE)
     logger.info("Created 'signals' table")
 
 
+
+def create_reference_change_notifications():
+    """Publish row changes on the reference tables on the 'reference_changes' NOTIFY channel"""
+    with db.get_cursor() as cursor:
+        cursor.execute(REFERENCE_CHANGE_FUNCTION)
+        for trigger in REFERENCE_CHANGE_TRIGGERS:
+            cursor.execute(trigger)
+    logger.info("Created reference table change notification triggers")
+
+
+def create_signal_change_notifications():
+    """Publish inserted, updated and deleted signals on the 'signal_changes' NOTIFY channel"""
+    with db.get_cursor() as cursor:
+        cursor.execute(SIGNAL_CHANGE_NOTIFICATIONS)
+    logger.info("Created signal change notification trigger")
+
+
 def migrate_signals():
     """Run all signal-related migrations"""
     try:
@@ -117,6 +207,8 @@ def migrate_signals():
         create_trading_pairs()
         create_exchange_trading_pairs()
         create_signals()
+        create_reference_change_notifications()
+        create_signal_change_notifications()
         logger.info("All signal tables created successfully")
     except Exception as e:
         logger.error(f"Migration failed: {e}")
@@ -124,9 +216,11 @@ def migrate_signals():
 
 
 if __name__ == "__main__":
+    # The runner applies every versioned migration, including the ones this module no longer covers
+    from src.database.migration_runner import migrate
     logging.basicConfig(level=logging.INFO)
     db.connect()
     try:
-        migrate_signals()
+        migrate()
     finally:
         db.disconnect()
@@ -0,0 +1,268 @@
+import argparse
+import logging
+import re
+import threading
+from datetime import date, datetime
+from src.config.index import Config
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+# Append-only tables that can be range partitioned by month, and their partition key
+PARTITION_KEYS = {
+    'signals': 'creation_time',
+    'telegram_messages': 'created_at',
+    'exchange_events': 'created_at',
+}
+
+RETENTION_SETTINGS = {
+    'signals': 'SIGNALS_RETENTION_MONTHS',
+    'telegram_messages': 'TELEGRAM_MESSAGES_RETENTION_MONTHS',
+    'exchange_events': 'EXCHANGE_EVENTS_RETENTION_MONTHS',
+}
+
+_BOUND_PATTERN = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month `offset` months after the month containing `day`"""
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _parse_bound(value: str):
+    if value == 'MINVALUE':
+        return None
+    return date.fromisoformat(value.strip("'")[:10])
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);", (table,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions(cursor, table: str):
+    """Return [(name, lower, upper)] for the table's range partitions, oldest first
+
+    `lower` is None for a partition starting at MINVALUE. The DEFAULT partition is skipped.
+    """
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s);
+    """, (table,))
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND_PATTERN.search(bound)
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda partition: partition[2])
+
+
+def ensure_partitions(table: str, months_ahead: int = None, today: date = None):
+    """Create the monthly partitions from the current month through `months_ahead` months ahead
+
+    Months already covered by an existing partition (including the legacy one made by
+    `convert_table`) are skipped; earlier months after the newest partition are filled in. A month whose rows already landed in the DEFAULT
+    partition can't be created and raises. Returns the names of the partitions created.
+    """
+    months_ahead = Config.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    today = today or date.today()
+    created = []
+    last = month_start(today, months_ahead)
+    with db.get_cursor() as cursor:
+        covered = max((upper for _, _, upper in list_partitions(cursor, table)), default=None)
+        # Continue from the end of the existing range, filling any months missed while
+        # maintenance was not running
+        month = covered or month_start(today)
+        while month <= last:
+            name = partition_name(table, month)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);",
+                (month, month_start(month, 1))
+            )
+            created.append(name)
+            month = month_start(month, 1)
+    if created:
+        logger.info(f"Ensured partitions {', '.join(created)}")
+    return created
+
+
+def convert_table(table: str, today: date = None):
+    """Convert an existing table into a partitioned table with the same name, in one transaction
+
+    The current table is kept as the partition for everything before the next month
+    boundary after its newest row, so no rows are copied. Its indexes, foreign keys and
+    triggers are recreated on the parent, reusing the existing indexes where they match.
+    Returns False if the table is already partitioned.
+    """
+    key = PARTITION_KEYS[table]
+    legacy = f"{table}_legacy"
+    today = today or date.today()
+    with db.get_cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return False
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;")
+
+        cursor.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass AND NOT i.indisprimary;
+        """, (table,))
+        indexes = cursor.fetchall()
+        cursor.execute("""
+            SELECT tgname, pg_get_triggerdef(oid)
+            FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal;
+        """, (table,))
+        triggers = cursor.fetchall()
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'f');
+        """, (table,))
+        constraints = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id');", (table,))
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT max({key}) FROM {table};")
+        newest = cursor.fetchone()[0]
+        boundary = month_start(max(newest.date() if newest else today, today), 1 if newest else 0)
+
+        # Range partition keys can't be NULL
+        cursor.execute(f"UPDATE {table} SET {key} = CURRENT_TIMESTAMP WHERE {key} IS NULL;")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL;")
+
+        # Free the index, constraint and trigger names for the new parent
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {name} ON {table};")
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {name}_legacy;")
+        for name, definition in constraints:
+            if definition.startswith('PRIMARY KEY'):
+                # Replaced by the parent's (id, key) primary key when the table is attached
+                cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name};")
+            else:
+                cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {name} TO {name}_legacy;")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy};")
+
+        cursor.execute(f"""
+            CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)
+            PARTITION BY RANGE ({key});
+        """)
+        # Unique constraints on a partitioned table must include the partition key
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {key});")
+        for name, definition in constraints:
+            if definition.startswith('FOREIGN KEY'):
+                cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition};")
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id;")
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s);",
+            (boundary,)
+        )
+        # Executed against the new parent, these attach the matching legacy indexes
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for _, definition in triggers:
+            cursor.execute(definition)
+        # Catches rows beyond the pre-made partitions instead of failing the insert
+        cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;")
+    logger.info(f"Converted '{table}' to monthly partitions on {key} (history before {boundary} in {legacy})")
+    ensure_partitions(table, today=today)
+    return True
+
+
+def apply_retention(table: str, keep_months: int, detach_only: bool = False, today: date = None):
+    """Detach (and unless `detach_only`, drop) partitions entirely older than `keep_months` months
+
+    Runs in time independent of the number of rows, unlike DELETE. Returns the names
+    of the partitions removed.
+    """
+    if keep_months <= 0:
+        return []
+    cutoff = month_start(today or date.today(), -keep_months)
+    removed = []
+    with db.get_cursor() as cursor:
+        expired = [name for name, _, upper in list_partitions(cursor, table) if upper <= cutoff]
+    for name in expired:
+        with db.get_cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name};")
+            if not detach_only:
+                cursor.execute(f"DROP TABLE {name};")
+        removed.append(name)
+        logger.info(f"{'Detached' if detach_only else 'Dropped'} partition {name} (older than {cutoff})")
+    return removed
+
+
+def maintain_partitions(today: date = None):
+    """Pre-create upcoming partitions and apply retention for every partitioned table"""
+    summary = {}
+    with db.get_cursor() as cursor:
+        tables = [table for table in PARTITION_KEYS if is_partitioned(cursor, table)]
+    for table in tables:
+        keep_months = getattr(Config, RETENTION_SETTINGS[table])
+        summary[table] = {
+            'created': ensure_partitions(table, today=today),
+            'removed': apply_retention(table, keep_months, Config.RETENTION_DETACH_ONLY, today),
+        }
+    return summary
+
+
+class PartitionMaintainer:
+    """Runs `maintain_partitions` in a background thread every `interval` seconds"""
+
+    def __init__(self, interval: float = None):
+        self.interval = Config.PARTITION_MAINTENANCE_INTERVAL if interval is None else interval
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='partition-maintenance', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                maintain_partitions()
+                self.last_run = datetime.now()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+            self._stop.wait(self.interval)
+
+
+# Global maintainer instance, started by the application when partitioning is enabled
+partition_maintainer = PartitionMaintainer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the high-volume tables")
+    parser.add_argument('command', choices=['convert', 'maintain'],
+                        help="convert: partition any unpartitioned table, then maintain; "
+                             "maintain: create upcoming partitions and apply retention")
+    parser.add_argument('--table', choices=sorted(PARTITION_KEYS), action='append',
+                        help="limit `convert` to this table (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db.connect()
+    try:
+        if args.command == 'convert':
+            for table in args.table or PARTITION_KEYS:
+                if not convert_table(table):
+                    logger.info(f"'{table}' is already partitioned")
+        maintain_partitions()
+    finally:
+        db.disconnect()
@@ -1,6 +1,8 @@
 import logging
 from datetime import datetime
+from psycopg2.extras import Json, execute_values
 from src.database.connection import db
+from src.database.rows import fetch_dicts
 
 logger = logging.getLogger(__name__)
 
@@ -62,12 +64,29 @@ class MessageQueries:
         result = db.execute_update(query, (message_text, message_date, sender_id, sender_name, group_id))
         return result
     
+    @staticmethod
+    def save_messages(messages):
+        """Save many Telegram messages in one multi-row INSERT and return their IDs in order
+
+        `messages` is a sequence of (message_text, message_date, sender_id, sender_name, group_id) tuples.
+        """
+        if not messages:
+            return []
+        query = """
+        INSERT INTO telegram_messages (message_text, message_date, sender_id, sender_name, group_id)
+        VALUES %s
+        RETURNING id;
+        """
+        with db.get_cursor() as cursor:
+            rows = execute_values(cursor, query, messages, page_size=len(messages), fetch=True)
+        return [row[0] for row in rows]
+    
     @staticmethod
     def mark_message_parsed(message_id, trade_id=None):
         """Mark a message as parsed"""
         query = """
         UPDATE telegram_messages
-        SET parsed = TRUE, trade_id = %s, created_at = CURRENT_TIMESTAMP
+        SET parsed = TRUE, trade_id = %s
         WHERE id = %s;
         """
         return db.execute_update(query, (trade_id, message_id))
@@ -98,6 +117,41 @@ class PositionQueries:
         query = "SELECT * FROM positions WHERE monitoring = TRUE;"
         return db.execute_query(query)
     
+    @staticmethod
+    def get_monitoring_details():
+        """Get monitored positions with their trade's symbol, side, sizing, stop loss and pending TPs
+
+        `tp_ids` and `tp_prices` list the trade's PENDING take_profit_levels rows in TP order,
+        nearest the entry first: ascending prices for a LONG, descending for a SHORT.
+        `tp_numbers` holds their TP numbers, counted over all of the trade's levels, so
+        TP2 is still 2 after TP1 has filled.
+        """
+        query = """
+        SELECT p.id AS position_id, p.trade_id, p.exchange, p.current_price,
+               t.symbol, t.position_type, t.entry_price, t.quantity, t.leverage, t.stop_loss,
+               COALESCE(array_agg(tp.id ORDER BY tp.tp_number) FILTER (WHERE tp.id IS NOT NULL), '{}') AS tp_ids,
+               COALESCE(array_agg(tp.price ORDER BY tp.tp_number) FILTER (WHERE tp.id IS NOT NULL), '{}') AS tp_prices,
+               COALESCE(array_agg(tp.tp_number ORDER BY tp.tp_number)
+                        FILTER (WHERE tp.id IS NOT NULL), '{}') AS tp_numbers
+        FROM positions p
+        JOIN trades t ON t.id = p.trade_id
+        LEFT JOIN (
+            SELECT l.id, l.trade_id, l.price, l.status,
+                   row_number() OVER (PARTITION BY l.trade_id
+                                      ORDER BY CASE WHEN lt.position_type = 'SHORT' THEN -l.price ELSE l.price END,
+                                               l.id) AS tp_number
+            FROM take_profit_levels l
+            JOIN trades lt ON lt.id = l.trade_id
+            WHERE l.trade_id IN (SELECT trade_id FROM positions WHERE monitoring = TRUE)
+        ) tp ON tp.trade_id = t.id AND tp.status = 'PENDING'
+        WHERE p.monitoring = TRUE
+        GROUP BY p.id, t.id
+        ORDER BY p.id;
+        """
+        with db.get_cursor() as cursor:
+            cursor.execute(query)
+            return fetch_dicts(cursor)
+    
     @staticmethod
     def update_position_price(position_id, current_price, profit_loss):
         """Update position current price and P&L"""
@@ -108,6 +162,113 @@ class PositionQueries:
         """
         return db.execute_update(query, (current_price, profit_loss, position_id))
     
+    @staticmethod
+    def update_position_prices(updates):
+        """Update current price and P&L for many positions in one statement
+
+        `updates` is a sequence of (position_id, current_price, profit_loss) tuples.
+        """
+        if not updates:
+            return 0
+        ids, prices, pnls = zip(*updates)
+        query = """
+        UPDATE positions p
+        SET current_price = v.current_price, current_profit_loss = v.profit_loss,
+            updated_at = CURRENT_TIMESTAMP
+        FROM unnest(%s::integer[], %s::numeric[], %s::numeric[]) AS v(id, current_price, profit_loss)
+        WHERE p.id = v.id;
+        """
+        return db.execute_update(query, (list(ids), list(prices), list(pnls)))
+    
+    @staticmethod
+    def apply_price_snapshot(prices, exclude_position_ids=None):
+        """Reprice every monitored position from one {(exchange, symbol): price} snapshot
+
+        Each position takes the price of its own exchange (the upper-cased name, as
+        market data reports it). P&L is computed in SQL from the trade's entry price, quantity and side, so a
+        whole monitoring tick costs a single round trip and commit. Positions in
+        `exclude_position_ids` (e.g. the ones a PositionStore prices) are left alone.
+        """
+        if not prices:
+            return 0
+        exchanges, symbols, values = zip(*((exchange, symbol, price) for (exchange, symbol), price in prices.items()))
+        query = """
+        UPDATE positions p
+        SET current_price = v.price,
+            current_profit_loss = (v.price - t.entry_price) * t.quantity
+                * CASE WHEN t.position_type = 'SHORT' THEN -1 ELSE 1 END,
+            updated_at = CURRENT_TIMESTAMP
+        FROM trades t, unnest(%s::varchar[], %s::varchar[], %s::numeric[]) AS v(exchange, symbol, price)
+        WHERE p.trade_id = t.id AND t.symbol = v.symbol AND upper(p.exchange) = v.exchange
+          AND p.monitoring = TRUE
+          AND p.id <> ALL(%s::integer[]);
+        """
+        return db.execute_update(query, (list(exchanges), list(symbols), list(values),
+                                         list(exclude_position_ids or ())))
+    
+    @staticmethod
+    def get_position_states():
+        """Live state of monitored positions and of open trades, with each trade's fields
+
+        One row per position; this is what PositionStore keeps in memory.
+        """
+        query = """
+        SELECT p.id AS position_id, p.trade_id, p.exchange, p.current_price, p.current_profit_loss,
+               p.monitoring, t.symbol, t.position_type, t.entry_price, t.quantity, t.status,
+               t.exit_price, t.exit_time, t.profit_loss, t.stop_loss
+        FROM positions p
+        JOIN trades t ON t.id = p.trade_id
+        WHERE p.monitoring = TRUE OR t.status = 'OPEN'
+        ORDER BY p.id;
+        """
+        with db.get_cursor() as cursor:
+            cursor.execute(query)
+            return fetch_dicts(cursor)
+    
+    @staticmethod
+    def write_states(positions, trades):
+        """Write coalesced position and trade state in one transaction
+        
+        `positions` is a sequence of (position_id, current_price, profit_loss, monitoring) and
+        `trades` of (trade_id, status, exit_price, exit_time, profit_loss, stop_loss) tuples.
+        Only rows that are still live are written (positions still monitored, trades still
+        OPEN), so a close made elsewhere is never reverted; monitoring can only be switched
+        off, and an OPEN trade only has its stop loss written.
+        """
+        with db.get_cursor() as cursor:
+            if positions:
+                ids, prices, pnls, monitoring = zip(*positions)
+                cursor.execute("""
+                UPDATE positions p
+                SET current_price = v.current_price, current_profit_loss = v.profit_loss,
+                    monitoring = v.monitoring, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::integer[], %s::numeric[], %s::numeric[], %s::boolean[])
+                    AS v(id, current_price, profit_loss, monitoring)
+                WHERE p.id = v.id AND p.monitoring = TRUE;
+                """, (list(ids), list(prices), list(pnls), list(monitoring)))
+            closed = [trade for trade in trades if trade[1] != 'OPEN']
+            if closed:
+                ids, statuses, exit_prices, exit_times, pnls, stop_losses = zip(*closed)
+                cursor.execute("""
+                UPDATE trades t
+                SET status = v.status, exit_price = v.exit_price, exit_time = v.exit_time,
+                    profit_loss = v.profit_loss, stop_loss = v.stop_loss, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::integer[], %s::varchar[], %s::numeric[], %s::timestamp[], %s::numeric[],
+                            %s::numeric[]) AS v(id, status, exit_price, exit_time, profit_loss, stop_loss)
+                WHERE t.id = v.id AND t.status = 'OPEN';
+                """, (list(ids), list(statuses), list(exit_prices), list(exit_times), list(pnls),
+                      list(stop_losses)))
+            still_open = [(trade[0], trade[5]) for trade in trades if trade[1] == 'OPEN']
+            if still_open:
+                ids, stop_losses = zip(*still_open)
+                cursor.execute("""
+                UPDATE trades t
+                SET stop_loss = v.stop_loss, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::integer[], %s::numeric[]) AS v(id, stop_loss)
+                WHERE t.id = v.id AND t.status = 'OPEN';
+                """, (list(ids), list(stop_losses)))
+        return len(positions) + len(trades)
+    
     @staticmethod
     def close_position(position_id):
         """Close a position"""
@@ -129,3 +290,41 @@ class ExchangeEventQueries:
         VALUES (%s, %s, %s, %s);
         """
         return db.execute_update(query, (trade_id, event_type, event_data, exchange))
+    
+    @staticmethod
+    def log_events(events):
+        """Log many exchange events in one multi-row INSERT
+        
+        `events` is a sequence of (trade_id, event_type, event_data, exchange, created_at)
+        tuples; dict event_data is stored as JSON.
+        """
+        if not events:
+            return 0
+        rows = [(trade_id, event_type, Json(data) if isinstance(data, dict) else data, exchange, created_at)
+                for trade_id, event_type, data, exchange, created_at in events]
+        query = """
+        INSERT INTO exchange_events (trade_id, event_type, event_data, exchange, created_at)
+        VALUES %s;
+        """
+        with db.get_cursor() as cursor:
+            execute_values(cursor, query, rows, page_size=len(rows))
+        return len(rows)
+    
+    @staticmethod
+    def get_order_latency(since):
+        """Signal-to-ack latency percentiles (ms) per exchange for orders placed since `since`"""
+        query = """
+        SELECT exchange,
+               COUNT(*) AS orders,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY (event_data->>'signal_to_ack_ms')::float) AS p50_ms,
+               percentile_cont(0.99) WITHIN GROUP (ORDER BY (event_data->>'signal_to_ack_ms')::float) AS p99_ms,
+               AVG((event_data->>'signal_to_submit_ms')::float) AS mean_queue_ms,
+               AVG((event_data->>'submit_to_ack_ms')::float) AS mean_exchange_ms
+        FROM exchange_events
+        WHERE event_type = 'ORDER_PLACED' AND created_at >= %s
+        GROUP BY exchange
+        ORDER BY exchange;
+        """
+        with db.get_cursor() as cursor:
+            cursor.execute(query, (since,))
+            return fetch_dicts(cursor)
@@ -1,10 +1,34 @@
+import base64
+import json
 import logging
+from datetime import datetime
+from src.database.cache import reference_cache
 from src.database.connection import db
-from typing import List, Dict, Optional
+from src.database.rows import compile_row_mapper, cursor_columns, fetch_dict, fetch_dicts
+from typing import Iterator, List, Dict, Optional, Tuple
 import uuid as uuid_lib
 
 logger = logging.getLogger(__name__)
 
+SIGNAL_COLUMNS = ['id', 'creation_time', 'source_uuid', 'source_entry_price', 'current_price',
+                  'tp1', 'tp2', 'tp3', 'tp4', 'sl', 'symbol', 'created_at', 'updated_at']
+
+
+def encode_page_cursor(creation_time: datetime, signal_id: int) -> str:
+    """Encode the (creation_time, id) keyset position as an opaque page token"""
+    payload = json.dumps([creation_time.isoformat(), signal_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_page_cursor(token: str) -> Tuple[datetime, int]:
+    """Decode a page token produced by encode_page_cursor, raising ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        creation_time, signal_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(creation_time), int(signal_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid page cursor: {token!r}") from e
+
 
 class ExchangeQueries:
     """Query operations for exchanges table"""
@@ -25,22 +49,20 @@ class ExchangeQueries:
     
     @staticmethod
     def get_exchange(exchange_uuid: str) -> Optional[Dict]:
-        """Get exchange by UUID"""
+        """Get exchange by UUID (cached)"""
+        cached = reference_cache.get(('exchange', exchange_uuid))
+        if cached is not None:
+            return dict(cached)
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, name, api_key, uuid, created_at, updated_at
                 FROM exchanges WHERE uuid = %s
             """, (exchange_uuid,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'name': result[1],
-                    'api_key': result[2],
-                    'uuid': result[3],
-                    'created_at': result[4],
-                    'updated_at': result[5]
-                }
+            exchange = fetch_dict(cursor)
+            if exchange:
+                reference_cache.set(('exchange', exchange_uuid), exchange,
+                                    tags=(f"exchange:{exchange_uuid}",))
+                return dict(exchange)
         return None
     
     @staticmethod
@@ -51,18 +73,13 @@ class ExchangeQueries:
                 SELECT id, name, api_key, uuid, created_at, updated_at
                 FROM exchanges ORDER BY name
             """)
-            results = cursor.fetchall()
-            exchanges = []
-            for result in results:
-                exchanges.append({
-                    'id': result[0],
-                    'name': result[1],
-                    'api_key': result[2],
-                    'uuid': result[3],
-                    'created_at': result[4],
-                    'updated_at': result[5]
-                })
+            exchanges = fetch_dicts(cursor)
             return exchanges
+    
+    @staticmethod
+    def invalidate_cache(exchange_uuid: str):
+        """Drop cached entries for an exchange and everything that cascades from it"""
+        reference_cache.invalidate(f"exchange:{exchange_uuid}", 'sources', 'exchange_trading_pairs')
 
 
 class SourceQueries:
@@ -84,32 +101,45 @@ class SourceQueries:
                   message_sample_short, message_sample_long))
             result = cursor.fetchone()
             logger.info(f"Created source: {name} with UUID: {source_uuid}")
-            return source_uuid
+        SourceQueries.invalidate_cache(source_uuid)
+        return source_uuid
     
     @staticmethod
     def get_source(source_uuid: str) -> Optional[Dict]:
-        """Get source by UUID"""
+        """Get source by UUID (cached)"""
+        cached = reference_cache.get(('source', source_uuid))
+        if cached is not None:
+            return dict(cached)
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, uuid, name, exchange_uuid, telegram_group_id,
                        message_sample_short, message_sample_long, created_at, updated_at
                 FROM sources WHERE uuid = %s
             """, (source_uuid,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'uuid': result[1],
-                    'name': result[2],
-                    'exchange_uuid': result[3],
-                    'telegram_group_id': result[4],
-                    'message_sample_short': result[5],
-                    'message_sample_long': result[6],
-                    'created_at': result[7],
-                    'updated_at': result[8]
-                }
+            source = fetch_dict(cursor)
+            if source:
+                reference_cache.set(('source', source_uuid), source,
+                                    tags=(f"source:{source_uuid}", f"exchange:{source['exchange_uuid']}"))
+                return dict(source)
         return None
     
+    @staticmethod
+    def get_sources_by_telegram_group(telegram_group_id: int) -> List[Dict]:
+        """Get all sources listening to a Telegram group (cached)"""
+        cached = reference_cache.get(('sources_by_group', telegram_group_id))
+        if cached is not None:
+            return [dict(source) for source in cached]
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, uuid, name, exchange_uuid, telegram_group_id,
+                       message_sample_short, message_sample_long, created_at, updated_at
+                FROM sources WHERE telegram_group_id = %s ORDER BY name
+            """, (telegram_group_id,))
+            sources = fetch_dicts(cursor)
+        # Tagged with the whole table: creating or moving any source can change membership
+        reference_cache.set(('sources_by_group', telegram_group_id), sources, tags=('sources',))
+        return [dict(source) for source in sources]
+    
     @staticmethod
     def get_sources_by_exchange(exchange_uuid: str) -> List[Dict]:
         """Get all sources for an exchange"""
@@ -119,21 +149,13 @@ class SourceQueries:
                        message_sample_short, message_sample_long, created_at, updated_at
                 FROM sources WHERE exchange_uuid = %s ORDER BY name
             """, (exchange_uuid,))
-            results = cursor.fetchall()
-            sources = []
-            for result in results:
-                sources.append({
-                    'id': result[0],
-                    'uuid': result[1],
-                    'name': result[2],
-                    'exchange_uuid': result[3],
-                    'telegram_group_id': result[4],
-                    'message_sample_short': result[5],
-                    'message_sample_long': result[6],
-                    'created_at': result[7],
-                    'updated_at': result[8]
-                })
+            sources = fetch_dicts(cursor)
             return sources
+    
+    @staticmethod
+    def invalidate_cache(source_uuid: str):
+        """Drop cached entries for a source, including Telegram group lookups"""
+        reference_cache.invalidate(f"source:{source_uuid}", 'sources')
 
 
 class TradingPairQueries:
@@ -155,21 +177,36 @@ class TradingPairQueries:
     
     @staticmethod
     def get_trading_pair(pair_uuid: str) -> Optional[Dict]:
-        """Get trading pair by UUID"""
+        """Get trading pair by UUID (cached)"""
+        cached = reference_cache.get(('trading_pair', pair_uuid))
+        if cached is not None:
+            return dict(cached)
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, name, uuid, created_at, updated_at
                 FROM trading_pairs WHERE uuid = %s
             """, (pair_uuid,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'name': result[1],
-                    'uuid': result[2],
-                    'created_at': result[3],
-                    'updated_at': result[4]
-                }
+            pair = fetch_dict(cursor)
+            if pair:
+                reference_cache.set(('trading_pair', pair_uuid), pair, tags=(f"trading_pair:{pair_uuid}",))
+                return dict(pair)
+        return None
+    
+    @staticmethod
+    def get_trading_pair_by_name(name: str) -> Optional[Dict]:
+        """Get trading pair by its unique name (cached)"""
+        cached = reference_cache.get(('trading_pair_by_name', name))
+        if cached is not None:
+            return dict(cached)
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, name, uuid, created_at, updated_at
+                FROM trading_pairs WHERE name = %s
+            """, (name,))
+            pair = fetch_dict(cursor)
+            if pair:
+                reference_cache.set(('trading_pair_by_name', name), pair, tags=(f"trading_pair:{pair['uuid']}",))
+                return dict(pair)
         return None
     
     @staticmethod
@@ -180,17 +217,13 @@ class TradingPairQueries:
                 SELECT id, name, uuid, created_at, updated_at
                 FROM trading_pairs ORDER BY name
             """)
-            results = cursor.fetchall()
-            pairs = []
-            for result in results:
-                pairs.append({
-                    'id': result[0],
-                    'name': result[1],
-                    'uuid': result[2],
-                    'created_at': result[3],
-                    'updated_at': result[4]
-                })
+            pairs = fetch_dicts(cursor)
             return pairs
+    
+    @staticmethod
+    def invalidate_cache(pair_uuid: str):
+        """Drop cached entries for a trading pair, by UUID and by name"""
+        reference_cache.invalidate(f"trading_pair:{pair_uuid}")
 
 
 class ExchangeTradingPairQueries:
@@ -210,34 +243,49 @@ class ExchangeTradingPairQueries:
             result = cursor.fetchone()
             pair_id = result[0]
             logger.info(f"Created exchange trading pair mapping with ID: {pair_id}")
-            return pair_id
+        ExchangeTradingPairQueries.invalidate_cache()
+        return pair_id
     
     @staticmethod
     def get_pairs_by_exchange(exchange_uuid: str) -> List[Dict]:
-        """Get all trading pairs available on an exchange"""
+        """Get all trading pairs available on an exchange (cached)"""
+        cached = reference_cache.get(('exchange_pairs', exchange_uuid))
+        if cached is not None:
+            return [dict(pair) for pair in cached]
         with db.get_cursor() as cursor:
             cursor.execute("""
-                SELECT etp.id, etp.trading_pair_uuid, tp.name, etp.exchange_name,
+                SELECT etp.id, etp.trading_pair_uuid, tp.name AS pair_name, etp.exchange_name,
                        etp.exchange_uuid, etp.max_leverage, etp.created_at, etp.updated_at
                 FROM exchange_trading_pairs etp
                 JOIN trading_pairs tp ON etp.trading_pair_uuid = tp.uuid
                 WHERE etp.exchange_uuid = %s
                 ORDER BY tp.name
             """, (exchange_uuid,))
-            results = cursor.fetchall()
-            pairs = []
-            for result in results:
-                pairs.append({
-                    'id': result[0],
-                    'trading_pair_uuid': result[1],
-                    'pair_name': result[2],
-                    'exchange_name': result[3],
-                    'exchange_uuid': result[4],
-                    'max_leverage': result[5],
-                    'created_at': result[6],
-                    'updated_at': result[7]
-                })
-            return pairs
+            pairs = fetch_dicts(cursor)
+        tags = ['exchange_trading_pairs', f"exchange:{exchange_uuid}"]
+        tags.extend(f"trading_pair:{pair['trading_pair_uuid']}" for pair in pairs)
+        reference_cache.set(('exchange_pairs', exchange_uuid), pairs, tags=tags)
+        return [dict(pair) for pair in pairs]
+    
+    @staticmethod
+    def get_all_pairs() -> List[Dict]:
+        """Get every exchange-trading pair mapping with the pair name (cached)"""
+        cached = reference_cache.get(('exchange_pairs', None))
+        if cached is not None:
+            return [dict(pair) for pair in cached]
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT etp.id, etp.trading_pair_uuid, tp.name AS pair_name, etp.exchange_name,
+                       etp.exchange_uuid, etp.max_leverage, etp.created_at, etp.updated_at
+                FROM exchange_trading_pairs etp
+                JOIN trading_pairs tp ON etp.trading_pair_uuid = tp.uuid
+                ORDER BY etp.exchange_name, tp.name
+            """)
+            pairs = fetch_dicts(cursor)
+        tags = ['exchange_trading_pairs']
+        tags.extend(f"trading_pair:{pair['trading_pair_uuid']}" for pair in pairs)
+        reference_cache.set(('exchange_pairs', None), pairs, tags=tags)
+        return [dict(pair) for pair in pairs]
     
     @staticmethod
     def get_exchanges_for_pair(trading_pair_uuid: str) -> List[Dict]:
@@ -250,18 +298,7 @@ class ExchangeTradingPairQueries:
                 WHERE etp.trading_pair_uuid = %s
                 ORDER BY etp.exchange_name
             """, (trading_pair_uuid,))
-            results = cursor.fetchall()
-            exchanges = []
-            for result in results:
-                exchanges.append({
-                    'id': result[0],
-                    'trading_pair_uuid': result[1],
-                    'exchange_name': result[2],
-                    'exchange_uuid': result[3],
-                    'max_leverage': result[4],
-                    'created_at': result[5],
-                    'updated_at': result[6]
-                })
+            exchanges = fetch_dicts(cursor)
             return exchanges
     
     @staticmethod
@@ -274,6 +311,12 @@ class ExchangeTradingPairQueries:
                 WHERE trading_pair_uuid = %s AND exchange_uuid = %s
             """, (max_leverage, trading_pair_uuid, exchange_uuid))
             logger.info(f"Updated max leverage to {max_leverage}x for pair {trading_pair_uuid} on exchange {exchange_uuid}")
+        ExchangeTradingPairQueries.invalidate_cache()
+    
+    @staticmethod
+    def invalidate_cache():
+        """Drop cached exchange-trading pair mappings"""
+        reference_cache.invalidate('exchange_trading_pairs')
 
 
 class SignalQueries:
@@ -282,16 +325,16 @@ class SignalQueries:
     @staticmethod
     def create_signal(creation_time, source_uuid: str, source_entry_price: float = None,
                      current_price: float = None, tp1: float = None, tp2: float = None,
-                     tp3: float = None, tp4: float = None, sl: float = None) -> int:
+                     tp3: float = None, tp4: float = None, sl: float = None, symbol: str = None) -> int:
         """Create a new signal and return its ID"""
         with db.get_cursor() as cursor:
             cursor.execute("""
                 INSERT INTO signals (creation_time, source_uuid, source_entry_price,
-                                    current_price, tp1, tp2, tp3, tp4, sl)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                    current_price, tp1, tp2, tp3, tp4, sl, symbol)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id
             """, (creation_time, source_uuid, source_entry_price, current_price,
-                  tp1, tp2, tp3, tp4, sl))
+                  tp1, tp2, tp3, tp4, sl, symbol))
             result = cursor.fetchone()
             signal_id = result[0]
             logger.info(f"Created signal with ID: {signal_id}")
@@ -303,26 +346,10 @@ class SignalQueries:
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, creation_time, source_uuid, source_entry_price, current_price,
-                       tp1, tp2, tp3, tp4, sl, created_at, updated_at
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
                 FROM signals WHERE id = %s
             """, (signal_id,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'creation_time': result[1],
-                    'source_uuid': result[2],
-                    'source_entry_price': result[3],
-                    'current_price': result[4],
-                    'tp1': result[5],
-                    'tp2': result[6],
-                    'tp3': result[7],
-                    'tp4': result[8],
-                    'sl': result[9],
-                    'created_at': result[10],
-                    'updated_at': result[11]
-                }
-        return None
+            return fetch_dict(cursor)
     
     @staticmethod
     def get_signals_by_source(source_uuid: str, limit: int = 100) -> List[Dict]:
@@ -330,29 +357,13 @@ class SignalQueries:
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, creation_time, source_uuid, source_entry_price, current_price,
-                       tp1, tp2, tp3, tp4, sl, created_at, updated_at
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
                 FROM signals
                 WHERE source_uuid = %s
                 ORDER BY creation_time DESC
                 LIMIT %s
             """, (source_uuid, limit))
-            results = cursor.fetchall()
-            signals = []
-            for result in results:
-                signals.append({
-                    'id': result[0],
-                    'creation_time': result[1],
-                    'source_uuid': result[2],
-                    'source_entry_price': result[3],
-                    'current_price': result[4],
-                    'tp1': result[5],
-                    'tp2': result[6],
-                    'tp3': result[7],
-                    'tp4': result[8],
-                    'sl': result[9],
-                    'created_at': result[10],
-                    'updated_at': result[11]
-                })
+            signals = fetch_dicts(cursor)
             return signals
     
     @staticmethod
@@ -364,7 +375,75 @@ class SignalQueries:
                 SET current_price = %s, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
             """, (current_price, signal_id))
-            logger.info(f"Updated signal {signal_id} current price to {current_price}")
+            logger.debug(f"Updated signal {signal_id} current price to {current_price}")
+    
+    @staticmethod
+    def update_signal_prices_by_symbol(prices: Dict[str, float], since: datetime) -> int:
+        """Set current_price from a {symbol: price} snapshot on the signals created since `since`"""
+        if not prices:
+            return 0
+        symbols, values = zip(*prices.items())
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE signals s
+                SET current_price = v.current_price, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::varchar[], %s::numeric[]) AS v(symbol, current_price)
+                WHERE s.symbol = v.symbol AND s.creation_time >= %s
+                  AND s.current_price IS DISTINCT FROM v.current_price
+            """, (list(symbols), list(values), since))
+            logger.debug(f"Updated current price for {cursor.rowcount} signals")
+            return cursor.rowcount
+    
+    @staticmethod
+    def update_signal_prices(prices: Dict[int, float]) -> int:
+        """Update current price for many signals ({signal_id: price}) in one statement"""
+        if not prices:
+            return 0
+        signal_ids, values = zip(*prices.items())
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE signals s
+                SET current_price = v.current_price, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::integer[], %s::numeric[]) AS v(id, current_price)
+                WHERE s.id = v.id
+            """, (list(signal_ids), list(values)))
+            logger.debug(f"Updated current price for {cursor.rowcount} signals")
+            return cursor.rowcount
+    
+    @staticmethod
+    def get_symbol_backfill_page(after_id: int = 0, limit: int = 1000) -> List[Tuple]:
+        """(signal id, message_text) for the next `limit` signals without a symbol, after `after_id`
+
+        Each signal is matched to the messages of its source's group whose message_date
+        equals its creation_time (both are the Telegram message date). A signal comes back
+        once per candidate message, or once with a None text when nothing matches.
+        """
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT s.id, m.message_text
+                FROM (SELECT id, source_uuid, creation_time FROM signals
+                      WHERE symbol IS NULL AND id > %s ORDER BY id LIMIT %s) s
+                LEFT JOIN sources src ON src.uuid = s.source_uuid
+                LEFT JOIN telegram_messages m
+                    ON m.group_id = src.telegram_group_id AND m.message_date = s.creation_time
+                ORDER BY s.id
+            """, (after_id, limit))
+            return cursor.fetchall()
+    
+    @staticmethod
+    def set_signal_symbols(symbols: Dict[int, str]) -> int:
+        """Set the symbol of many signals ({signal_id: symbol}) that have none yet"""
+        if not symbols:
+            return 0
+        signal_ids, values = zip(*symbols.items())
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE signals s
+                SET symbol = v.symbol, updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::integer[], %s::varchar[]) AS v(id, symbol)
+                WHERE s.id = v.id AND s.symbol IS NULL
+            """, (list(signal_ids), list(values)))
+            return cursor.rowcount
     
     @staticmethod
     def get_recent_signals(limit: int = 50) -> List[Dict]:
@@ -372,26 +451,116 @@ class SignalQueries:
         with db.get_cursor() as cursor:
             cursor.execute("""
                 SELECT id, creation_time, source_uuid, source_entry_price, current_price,
-                       tp1, tp2, tp3, tp4, sl, created_at, updated_at
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
                 FROM signals
                 ORDER BY creation_time DESC
                 LIMIT %s
             """, (limit,))
-            results = cursor.fetchall()
-            signals = []
-            for result in results:
-                signals.append({
-                    'id': result[0],
-                    'creation_time': result[1],
-                    'source_uuid': result[2],
-                    'source_entry_price': result[3],
-                    'current_price': result[4],
-                    'tp1': result[5],
-                    'tp2': result[6],
-                    'tp3': result[7],
-                    'tp4': result[8],
-                    'sl': result[9],
-                    'created_at': result[10],
-                    'updated_at': result[11]
-                })
+            signals = fetch_dicts(cursor)
             return signals
+    
+    @staticmethod
+    def get_signals_page(limit: int = 100, cursor: Optional[str] = None,
+                         source_uuid: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of signals, newest first, using keyset pagination on (creation_time, id)
+
+        Returns the signals and the token for the next page (None on the last page).
+        """
+        conditions = []
+        params = []
+        if source_uuid:
+            conditions.append("source_uuid = %s")
+            params.append(source_uuid)
+        if cursor:
+            conditions.append("(creation_time, id) < (%s, %s)")
+            params.extend(decode_page_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit + 1)
+        with db.get_cursor() as cur:
+            cur.execute(f"""
+                SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+                FROM signals
+                {where}
+                ORDER BY creation_time DESC, id DESC
+                LIMIT %s
+            """, params)
+            signals = fetch_dicts(cur)
+        next_cursor = None
+        if len(signals) > limit:
+            signals = signals[:limit]
+            last = signals[-1]
+            next_cursor = encode_page_cursor(last['creation_time'], last['id'])
+        return signals, next_cursor
+    
+    @staticmethod
+    def get_signals_changed_since(updated_at: datetime, signal_id: int, limit: int = 1000) -> List[Dict]:
+        """Get signals inserted or updated after the (updated_at, id) position, oldest change first"""
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                       tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+                FROM signals
+                WHERE (updated_at, id) > (%s, %s)
+                ORDER BY updated_at, id
+                LIMIT %s
+            """, (updated_at, signal_id, limit))
+            return fetch_dicts(cursor)
+    
+    @staticmethod
+    def iter_signals(source_uuid: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream signals, newest first, through a server-side cursor
+
+        Only `batch_size` rows are held in memory at a time regardless of table size.
+        """
+        query = """
+            SELECT id, creation_time, source_uuid, source_entry_price, current_price,
+                   tp1, tp2, tp3, tp4, sl, symbol, created_at, updated_at
+            FROM signals
+        """
+        params = None
+        if source_uuid:
+            query += " WHERE source_uuid = %s"
+            params = (source_uuid,)
+        query += " ORDER BY creation_time DESC, id DESC"
+        with db.get_server_cursor(f"signals_export_{uuid_lib.uuid4().hex}", batch_size) as cursor:
+            cursor.execute(query, params)
+            mapper = None
+            for result in cursor:
+                if mapper is None:
+                    # A named cursor only has a description once the first batch is fetched
+                    mapper = compile_row_mapper(cursor_columns(cursor))
+                yield mapper(result)
+
+    @staticmethod
+    def get_signal_levels(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          source_uuid: Optional[str] = None) -> List[Tuple]:
+        """Entry, take profits and stop of every signal with a known pair, for backtesting
+
+        Signals stored before the symbol column existed are skipped until
+        scripts.backfill_signal_symbols has filled it in from their messages.
+
+        Returns plain tuples (id, creation_time in epoch milliseconds, source_uuid, symbol,
+        entry, tp1, tp2, tp3, tp4, sl) ordered by symbol and time, with prices as floats
+        (None when missing) so hundreds of thousands of rows load without Decimal or dict overhead.
+        """
+        conditions = ["symbol IS NOT NULL", "source_entry_price IS NOT NULL"]
+        params = []
+        if start:
+            conditions.append("creation_time >= %s")
+            params.append(start)
+        if end:
+            conditions.append("creation_time < %s")
+            params.append(end)
+        if source_uuid:
+            conditions.append("source_uuid = %s")
+            params.append(source_uuid)
+        with db.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id, (EXTRACT(EPOCH FROM creation_time) * 1000)::bigint, source_uuid, symbol,
+                       source_entry_price::float8, tp1::float8, tp2::float8, tp3::float8, tp4::float8, sl::float8
+                FROM signals
+                WHERE {' AND '.join(conditions)}
+                ORDER BY symbol, creation_time
+            """, params)
+            return cursor.fetchall()
@@ -0,0 +1,44 @@
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_mappers: Dict[Tuple[str, ...], Callable] = {}
+
+
+def compile_row_mapper(columns: Sequence[str]) -> Callable[[Sequence], Dict]:
+    """Return a function turning one result row into a dict keyed by `columns`
+
+    The mapper is built (and the column names checked for duplicates, which a dict
+    would silently collapse) once per column list and reused by every later query
+    with the same columns.
+    """
+    key = tuple(columns)
+    mapper = _mappers.get(key)
+    if mapper is None:
+        if len(set(key)) != len(key):
+            raise ValueError(f"Duplicate column names in result: {key}")
+        mapper = _mappers[key] = lambda row: dict(zip(key, row))
+    return mapper
+
+
+def cursor_columns(cursor) -> List[str]:
+    """Column names of the cursor's current result (works for psycopg2 and psycopg 3)"""
+    return [column[0] for column in cursor.description]
+
+
+def fetch_dict(cursor) -> Optional[Dict]:
+    """Fetch one row from the cursor as a dict, or None when there are no more rows"""
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return compile_row_mapper(cursor_columns(cursor))(row)
+
+
+def fetch_dicts(cursor) -> List[Dict]:
+    """Fetch all remaining rows from the cursor as dicts"""
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    mapper = compile_row_mapper(cursor_columns(cursor))
+    return [mapper(row) for row in rows]
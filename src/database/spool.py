@@ -0,0 +1,212 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record header: payload length, CRC32 of the payload. A zero length marks the
+# unwritten (zero-filled) rest of a segment.
+HEADER = struct.Struct('<II')
+# Checkpoint file: segment number and offset of the first record not yet drained
+CHECKPOINT = struct.Struct('<QQ')
+
+Position = Tuple[int, int]
+
+
+class SpoolFull(Exception):
+    """Appending would take the spool past its disk budget"""
+
+
+class Spool:
+    """Durable FIFO of byte records in memory-mapped, fixed-size segment files
+
+    Segments (<directory>/00000001.seg, ...) are preallocated to `segment_size`
+    and mapped; `append` copies a length+CRC header and the payload into the map
+    and msyncs the touched pages, so a record is on disk when the call returns
+    (with `sync=False` the OS writes it back on its own schedule). A reader takes
+    batches from the checkpointed position with `read` and moves the checkpoint
+    with `commit`, which also deletes fully drained segments. Disk use is
+    bounded by `max_bytes`; past it, `append` raises SpoolFull.
+
+    On open, the write position is found by walking the last segment until the
+    first empty or corrupt header, so a record torn by a crash is dropped and
+    overwritten. Delivery is at-least-once: a crash between handing a batch on
+    and `commit` replays that batch. Thread-safe.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 16 * 1024 * 1024,
+                 max_bytes: int = 1024 * 1024 * 1024, sync: bool = True):
+        if segment_size < mmap.PAGESIZE:
+            raise ValueError(f"segment_size must be at least {mmap.PAGESIZE} bytes")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_segments = max(2, max_bytes // segment_size)
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self.appended = 0
+        self.drained = 0
+        self.rejected = 0
+        os.makedirs(directory, exist_ok=True)
+
+        segments = self._segments()
+        self._read_position = self._load_checkpoint() or ((segments[0], 0) if segments else (1, 0))
+        for number in segments:
+            if number < self._read_position[0]:
+                os.remove(self._segment_path(number))
+        segments = [number for number in segments if number >= self._read_position[0]]
+        self._write_segment = segments[-1] if segments else self._read_position[0]
+        self._write_offset = self._scan_end(self._write_segment)
+        self.pending = len(self._read(self._read_position, None)[0])
+        if self.pending:
+            logger.info(f"Spool {directory} holds {self.pending} undrained record(s)")
+
+    # ---- files ----
+
+    def _segments(self) -> List[int]:
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory)
+                      if name.endswith('.seg') and name[:-4].isdigit())
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number:08d}.seg")
+
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.directory, 'checkpoint')
+
+    def _map(self, number: int) -> mmap.mmap:
+        mapped = self._maps.get(number)
+        if mapped is None:
+            path = self._segment_path(number)
+            with open(path, 'a+b') as f:
+                if os.fstat(f.fileno()).st_size < self.segment_size:
+                    f.truncate(self.segment_size)
+                mapped = self._maps[number] = mmap.mmap(f.fileno(), self.segment_size)
+        return mapped
+
+    def _load_checkpoint(self) -> Optional[Position]:
+        try:
+            with open(self._checkpoint_path(), 'rb') as f:
+                return CHECKPOINT.unpack(f.read(CHECKPOINT.size))
+        except (FileNotFoundError, struct.error):
+            return None
+
+    def _save_checkpoint(self, position: Position):
+        path = self._checkpoint_path()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(CHECKPOINT.pack(*position))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _scan_end(self, number: int) -> int:
+        """Offset just past the last intact record of a segment"""
+        mapped = self._map(number)
+        offset = 0
+        while offset + HEADER.size <= self.segment_size:
+            length, crc = HEADER.unpack_from(mapped, offset)
+            end = offset + HEADER.size + length
+            if not length or end > self.segment_size or zlib.crc32(mapped[offset + HEADER.size:end]) != crc:
+                break
+            offset = end
+        # Clear a torn record so readers stop here
+        if offset + HEADER.size <= self.segment_size:
+            mapped[offset:offset + HEADER.size] = bytes(HEADER.size)
+        return offset
+
+    def _msync(self, mapped: mmap.mmap, start: int, end: int):
+        aligned = start - start % mmap.PAGESIZE
+        mapped.flush(aligned, end - aligned)
+
+    # ---- writing ----
+
+    def append(self, payload: bytes):
+        """Write one record; durable on return when `sync` is set"""
+        size = HEADER.size + len(payload)
+        if size > self.segment_size:
+            raise ValueError(f"Record of {len(payload)} bytes does not fit a {self.segment_size} byte segment")
+        with self._lock:
+            if self._write_offset + size > self.segment_size:
+                if self._write_segment - self._read_position[0] + 1 >= self.max_segments:
+                    self.rejected += 1
+                    raise SpoolFull(f"Spool {self.directory} is at its limit of {self.max_segments} segments")
+                self._write_segment += 1
+                self._write_offset = 0
+            mapped = self._map(self._write_segment)
+            start = self._write_offset
+            body = start + HEADER.size
+            mapped[body:body + len(payload)] = payload
+            # The header goes last, so a reader never sees a length before its payload
+            HEADER.pack_into(mapped, start, len(payload), zlib.crc32(payload))
+            if self.sync:
+                self._msync(mapped, start, body + len(payload))
+            self._write_offset = body + len(payload)
+            self.appended += 1
+            self.pending += 1
+
+    # ---- reading ----
+
+    def _read(self, position: Position, limit: Optional[int]) -> Tuple[List[bytes], Position]:
+        segment, offset = position
+        records = []
+        while limit is None or len(records) < limit:
+            mapped = self._map(segment)
+            length = crc = 0
+            if offset + HEADER.size <= self.segment_size:
+                length, crc = HEADER.unpack_from(mapped, offset)
+            end = offset + HEADER.size + length
+            if length and end <= self.segment_size:
+                payload = mapped[offset + HEADER.size:end]
+                if zlib.crc32(payload) == crc:
+                    records.append(payload)
+                    offset = end
+                    continue
+                logger.error(f"Spool segment {segment} is corrupt at offset {offset}; skipping the rest of it")
+            if segment >= self._write_segment:
+                break
+            segment, offset = segment + 1, 0
+        return records, (segment, offset)
+
+    def read(self, limit: int = 1000) -> Tuple[List[bytes], Position]:
+        """Up to `limit` records from the checkpoint on, and the position after them (for `commit`)"""
+        with self._lock:
+            return self._read(self._read_position, limit)
+
+    def commit(self, position: Position, count: int):
+        """Record that the `count` records before `position` are drained, and delete spent segments"""
+        with self._lock:
+            self._save_checkpoint(position)
+            for number in range(self._read_position[0], position[0]):
+                mapped = self._maps.pop(number, None)
+                if mapped is not None:
+                    mapped.close()
+                try:
+                    os.remove(self._segment_path(number))
+                except FileNotFoundError:
+                    pass
+            self._read_position = position
+            self.pending = max(0, self.pending - count)
+            self.drained += count
+
+    def stats(self) -> Dict:
+        with self._lock:
+            segments = self._write_segment - self._read_position[0] + 1
+            return {
+                'pending': self.pending,
+                'appended': self.appended,
+                'drained': self.drained,
+                'rejected': self.rejected,
+                'segments': segments,
+                'disk_bytes': segments * self.segment_size,
+                'max_bytes': self.max_segments * self.segment_size,
+            }
+
+    def close(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.flush()
+                mapped.close()
+            self._maps.clear()
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from src.config.index import Config
+from src.exchanges.rate_limit import TokenBucket
+from src.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Order side for opening a position of each type, and the side that closes it
+OPEN_SIDE = {'LONG': 'BUY', 'SHORT': 'SELL'}
+CLOSE_SIDE = {'LONG': 'SELL', 'SHORT': 'BUY'}
+
+
+class ExchangeError(Exception):
+    """An exchange rejected a request or could not be reached"""
+
+    def __init__(self, exchange: str, message: str, status: int = None, code=None):
+        super().__init__(f"{exchange}: {message}")
+        self.exchange = exchange
+        self.status = status
+        self.code = code
+
+
+class RateLimitError(ExchangeError):
+    """The exchange answered 429/418 (or its own rate limit error code)"""
+
+    def __init__(self, exchange: str, message: str, retry_after: float = None, **kwargs):
+        super().__init__(exchange, message, **kwargs)
+        self.retry_after = retry_after
+
+
+class BaseExchange:
+    """Common interface and transport for the exchange clients
+
+    Each client keeps one requests.Session, so calls reuse pooled keep-alive
+    connections instead of paying a TCP and TLS handshake each time. Every request
+    first takes its weight from the venue's token bucket(s), and its latency is
+    recorded per endpoint. Subclasses implement signing and the venue-specific
+    endpoints behind `get_price`, `get_prices`, `place_order`, `get_order` and
+    `cancel_order`. Clients are thread-safe and meant to be shared; see
+    `src.exchanges.registry.get_exchange`.
+    """
+
+    name = 'BASE'
+
+    def __init__(self, api_key: str = None, api_secret: str = None, base_url: str = None,
+                 timeout: float = None, pool_size: int = None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout or Config.EXCHANGE_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or Config.EXCHANGE_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self._latency_lock = threading.Lock()
+        self.errors = 0
+        self.rate_limited = 0
+
+    # ---- transport ----
+
+    def buckets(self) -> Dict[str, TokenBucket]:
+        """The rate limit buckets of this client by name"""
+        raise NotImplementedError
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            with self._latency_lock:
+                histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    def _send(self, method: str, path: str, bucket: TokenBucket, weight: float, query: str = None,
+              prepare: Callable[[], Dict] = None, **kwargs) -> requests.Response:
+        """Rate limit, send and time one request; raises ExchangeError on transport errors and 429s
+
+        `query` is appended to the URL verbatim, for venues that sign the exact query string.
+        `prepare` is called once the rate limiter lets the request through and returns more
+        request arguments (`query`, `data`, `headers`, ...), so nonces, timestamps and
+        signatures are made right before sending rather than before a throttling wait.
+        """
+        if weight:
+            bucket.acquire(weight)
+        if prepare is not None:
+            prepared = prepare()
+            query = prepared.pop('query', query)
+            kwargs.update(prepared)
+        endpoint = f"{method} {path}"
+        url = f"{self.base_url}{path}?{query}" if query else self.base_url + path
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.errors += 1
+            raise ExchangeError(self.name, f"{endpoint} failed: {e}") from e
+        finally:
+            self._histogram(endpoint).record(time.perf_counter() - started)
+        if response.status_code in (418, 429):
+            self.rate_limited += 1
+            retry_after = float(response.headers.get('Retry-After') or 1)
+            bucket.penalize(retry_after)
+            raise RateLimitError(self.name, f"{endpoint} rate limited", retry_after=retry_after,
+                                 status=response.status_code)
+        return response
+
+    # ---- interface ----
+
+    def get_price(self, symbol: str) -> Decimal:
+        """Last traded price of one symbol"""
+        raise NotImplementedError
+
+    def get_prices(self, symbols: List[str] = None) -> Dict[str, Decimal]:
+        """Last traded prices by symbol (all listed symbols when `symbols` is None)"""
+        raise NotImplementedError
+
+    def place_order(self, symbol: str, side: str, quantity, price=None, client_order_id: str = None) -> Dict:
+        """Place a 'BUY'/'SELL' order, limit when `price` is given, market otherwise"""
+        raise NotImplementedError
+
+    def get_order(self, symbol: str, order_id: str) -> Dict:
+        raise NotImplementedError
+
+    def cancel_order(self, symbol: str, order_id: str) -> bool:
+        raise NotImplementedError
+
+    def open_position(self, symbol: str, position_type: str, quantity, price=None,
+                      client_order_id: str = None) -> Dict:
+        """Open a LONG or SHORT position"""
+        return self.place_order(symbol, OPEN_SIDE[position_type.upper()], quantity, price, client_order_id)
+
+    def close_position(self, symbol: str, position_type: str, quantity) -> Dict:
+        """Close a LONG or SHORT position at market"""
+        return self.place_order(symbol, CLOSE_SIDE[position_type.upper()], quantity)
+
+    def _order(self, order_id, symbol, side=None, status=None, raw=None) -> Dict:
+        """Normalized order dict returned by every client"""
+        return {'exchange': self.name, 'order_id': str(order_id), 'symbol': symbol, 'side': side,
+                'status': status, 'raw': raw}
+
+    def stats(self) -> Dict:
+        return {
+            'exchange': self.name,
+            'errors': self.errors,
+            'rate_limited': self.rate_limited,
+            'buckets': {name: bucket.stats() for name, bucket in self.buckets().items()},
+            'latency': {endpoint: histogram.snapshot() for endpoint, histogram in sorted(self.latency.items())},
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value))
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List
+from urllib.parse import urlencode
+from src.config.index import Config
+from src.exchanges.base import BaseExchange, ExchangeError, RateLimitError, to_decimal
+from src.exchanges.rate_limit import TokenBucket
+
+# Kraken's private REST counter (Starter tier): at most 15, decaying by 0.33 per
+# second; most calls add 1, ledger and trade history queries add 2
+KRAKEN_PRIVATE_COUNTER = 15
+KRAKEN_PRIVATE_DECAY = 0.33
+KRAKEN_PRIVATE_COSTS = {
+    '/0/private/Ledgers': 2,
+    '/0/private/QueryLedgers': 2,
+    '/0/private/TradesHistory': 2,
+    # AddOrder/CancelOrder are governed by the per-pair trading limiter, not the REST counter
+    '/0/private/AddOrder': 0,
+    '/0/private/CancelOrder': 0,
+}
+# Orders placed and cancelled count against a separate per-pair trading rate
+KRAKEN_TRADING_COUNTER = 60
+KRAKEN_TRADING_DECAY = 1.0
+# Public market data: about one call per second, with a small burst
+KRAKEN_PUBLIC_BURST = 5
+KRAKEN_PUBLIC_RATE = 1.0
+
+
+class Kraken(BaseExchange):
+    """Kraken spot REST client (nonce + HMAC-SHA512 API-Sign)"""
+
+    name = 'KRAKEN'
+
+    def __init__(self, api_key: str = None, api_secret: str = None, base_url: str = None, **kwargs):
+        super().__init__(api_key or Config.KRAKEN_API_KEY, api_secret or Config.KRAKEN_API_SECRET,
+                         base_url or Config.KRAKEN_BASE_URL, **kwargs)
+        self.public_bucket = TokenBucket(KRAKEN_PUBLIC_BURST, KRAKEN_PUBLIC_RATE, 'KRAKEN public')
+        self.private_bucket = TokenBucket(KRAKEN_PRIVATE_COUNTER, KRAKEN_PRIVATE_DECAY, 'KRAKEN private')
+        self.trading_buckets: Dict[str, TokenBucket] = {}
+        self._nonce = 0
+        self._nonce_lock = threading.Lock()
+
+    def buckets(self) -> Dict[str, TokenBucket]:
+        buckets = {'public': self.public_bucket, 'private': self.private_bucket}
+        buckets.update((f"trading:{pair}", bucket) for pair, bucket in list(self.trading_buckets.items()))
+        return buckets
+
+    def _trading_bucket(self, pair: str) -> TokenBucket:
+        bucket = self.trading_buckets.get(pair)
+        if bucket is None:
+            bucket = self.trading_buckets.setdefault(
+                pair, TokenBucket(KRAKEN_TRADING_COUNTER, KRAKEN_TRADING_DECAY, f"KRAKEN trading {pair}"))
+        return bucket
+
+    def _next_nonce(self) -> str:
+        # Strictly increasing even when two threads sign within the same millisecond
+        with self._nonce_lock:
+            self._nonce = max(self._nonce + 1, int(time.time() * 1000))
+            return str(self._nonce)
+
+    def _sign(self, path: str, data: Dict) -> Dict:
+        if not self.api_key or not self.api_secret:
+            raise ExchangeError(self.name, "KRAKEN_API_KEY/KRAKEN_API_SECRET are not set")
+        nonce = data['nonce']
+        message = path.encode() + hashlib.sha256((nonce + urlencode(data)).encode()).digest()
+        signature = hmac.new(base64.b64decode(self.api_secret), message, hashlib.sha512)
+        return {'API-Key': self.api_key, 'API-Sign': base64.b64encode(signature.digest()).decode()}
+
+    def _public(self, method: str, params: Dict) -> Dict:
+        path = f"/0/public/{method}"
+        response = self._send('GET', path, self.public_bucket, 1, params=params)
+        return self._result(path, response)
+
+    def _private(self, method: str, data: Dict, pair: str = None) -> Dict:
+        path = f"/0/private/{method}"
+        data = {key: value for key, value in data.items() if value is not None}
+        cost = KRAKEN_PRIVATE_COSTS.get(path, 1)
+        if pair is not None and path in ('/0/private/AddOrder', '/0/private/CancelOrder'):
+            self._trading_bucket(pair).acquire(1)
+
+        def prepare():
+            # The nonce is taken after every rate limit wait, so requests leave in nonce order
+            signed = dict(data, nonce=self._next_nonce())
+            return {'data': signed, 'headers': self._sign(path, signed)}
+
+        response = self._send('POST', path, self.private_bucket, cost, prepare=prepare)
+        return self._result(path, response)
+
+    def _result(self, path: str, response) -> Dict:
+        try:
+            payload = response.json()
+        except ValueError:
+            self.errors += 1
+            raise ExchangeError(self.name, f"{path}: HTTP {response.status_code} {response.text[:200]}",
+                                status=response.status_code)
+        errors = payload.get('error') or []
+        if errors:
+            self.errors += 1
+            message = ', '.join(errors)
+            if any('Rate limit exceeded' in error or 'Too many requests' in error for error in errors):
+                self.rate_limited += 1
+                raise RateLimitError(self.name, f"{path}: {message}", status=response.status_code, code=errors[0])
+            raise ExchangeError(self.name, f"{path}: {message}", status=response.status_code, code=errors[0])
+        if response.status_code >= 400:
+            self.errors += 1
+            raise ExchangeError(self.name, f"{path}: HTTP {response.status_code}", status=response.status_code)
+        return payload.get('result', {})
+
+    def get_price(self, symbol: str) -> Decimal:
+        prices = self.get_prices([symbol])
+        if symbol not in prices:
+            raise ExchangeError(self.name, f"No ticker for {symbol}")
+        return prices[symbol]
+
+    def get_prices(self, symbols: List[str] = None) -> Dict[str, Decimal]:
+        """Last trade prices; Kraken may answer under its own pair names (XXBTZUSD for XBTUSD)"""
+        result = self._public('Ticker', {'pair': ','.join(symbols)} if symbols else {})
+        prices = {pair: to_decimal(ticker['c'][0]) for pair, ticker in result.items()}
+        if symbols and len(symbols) == 1 and len(prices) == 1:
+            return {symbols[0]: next(iter(prices.values()))}
+        return prices
+
+    def place_order(self, symbol: str, side: str, quantity, price=None, client_order_id: str = None) -> Dict:
+        data = {
+            'pair': symbol,
+            'type': side.lower(),
+            'ordertype': 'limit' if price is not None else 'market',
+            'volume': str(quantity),
+            'price': None if price is None else str(price),
+            'cl_ord_id': client_order_id,
+        }
+        result = self._private('AddOrder', data, pair=symbol)
+        return self._order(result['txid'][0], symbol, side, 'NEW', result)
+
+    def get_order(self, symbol: str, order_id: str) -> Dict:
+        result = self._private('QueryOrders', {'txid': order_id})
+        order = result.get(order_id)
+        if order is None:
+            raise ExchangeError(self.name, f"Unknown order {order_id}")
+        side = order.get('descr', {}).get('type', '').upper() or None
+        return self._order(order_id, symbol, side, order.get('status', '').upper() or None, order)
+
+    def cancel_order(self, symbol: str, order_id: str) -> bool:
+        result = self._private('CancelOrder', {'txid': order_id}, pair=symbol)
+        return bool(result.get('count'))
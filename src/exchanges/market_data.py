@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+import websockets
+from src.config.index import Config
+from src.database.listener import reference_listener
+from src.database.queries_signals import ExchangeTradingPairQueries
+from src.exchanges.ticker_cache import TickerCache, normalize_symbol, ticker_cache
+
+logger = logging.getLogger(__name__)
+
+# Quote assets recognized when a pair name has no separator ('BTCUSDT')
+QUOTE_ASSETS = ('USDT', 'USDC', 'USD', 'EUR', 'BTC', 'ETH')
+
+
+def split_pair(name: str) -> Tuple[str, str]:
+    """('BTC', 'USDT') from 'BTC/USDT', 'BTC-USDT' or 'BTCUSDT'"""
+    for separator in '/-_':
+        if separator in name:
+            base, quote = name.upper().split(separator, 1)
+            return base, quote
+    name = name.upper()
+    for quote in QUOTE_ASSETS:
+        if name.endswith(quote) and len(name) > len(quote):
+            return name[:-len(quote)], quote
+    raise ValueError(f"Cannot split trading pair {name!r} into base and quote")
+
+
+class MarketDataStream:
+    """One websocket connection subscribed to a set of symbols on one exchange
+
+    Trade or ticker updates go straight into the TickerCache. The connection is
+    re-established with exponential backoff when it drops or when nothing arrives
+    for `idle_timeout` seconds, and the subscription is replayed each time.
+    Subclasses provide the venue's URL, subscription, ping and message parsing.
+    """
+
+    exchange = None
+    # Streams one connection may carry; more symbols get more connections
+    max_symbols = None
+    ping_interval = 20.0
+
+    def __init__(self, symbols: Iterable[str], cache: TickerCache = ticker_cache, url: str = None,
+                 idle_timeout: float = None):
+        self.symbols = sorted(set(symbols))
+        self.cache = cache
+        self.url = url or self.default_url()
+        self.idle_timeout = idle_timeout or Config.MARKET_DATA_IDLE_TIMEOUT
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.updates = 0
+        self.errors = 0
+        self.last_message_at = None
+        self._websocket = None
+
+    @classmethod
+    def default_url(cls) -> str:
+        raise NotImplementedError
+
+    def subscribe_messages(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def ping_message(self) -> Optional[Dict]:
+        return None
+
+    def parse(self, message) -> Iterable[Tuple[str, float, Optional[int]]]:
+        """(symbol, price, exchange time in ms) updates carried by one decoded message"""
+        raise NotImplementedError
+
+    async def run(self):
+        """Stream until cancelled, reconnecting as needed"""
+        backoff = 1.0
+        while True:
+            received = self.messages
+            try:
+                await self._stream()
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.messages > received:
+                    # The connection carried data, so this is a new failure, not another failed retry
+                    backoff = 1.0
+                self.errors += 1
+                logger.warning(f"{self.exchange} market data stream failed: {e}; reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self.connected = False
+                self._websocket = None
+
+    async def _stream(self):
+        async with websockets.connect(self.url, max_size=2 ** 22, close_timeout=2) as websocket:
+            self._websocket = websocket
+            self.connected = True
+            self.connects += 1
+            for message in self.subscribe_messages():
+                await websocket.send(orjson.dumps(message).decode())
+            logger.info(f"{self.exchange} market data: subscribed to {len(self.symbols)} symbol(s) at {self.url}")
+            pinger = asyncio.create_task(self._ping(websocket)) if self.ping_message() else None
+            try:
+                while True:
+                    raw = await asyncio.wait_for(websocket.recv(), self.idle_timeout)
+                    self.messages += 1
+                    self.last_message_at = time.monotonic()
+                    try:
+                        message = orjson.loads(raw)
+                    except orjson.JSONDecodeError:
+                        continue
+                    for symbol, price, exchange_time in self.parse(message):
+                        self.cache.update(self.exchange, symbol, price, exchange_time)
+                        self.updates += 1
+            except asyncio.TimeoutError:
+                raise ConnectionError(f"no data for {self.idle_timeout:.0f}s")
+            finally:
+                if pinger is not None:
+                    pinger.cancel()
+
+    async def _ping(self, websocket):
+        payload = orjson.dumps(self.ping_message()).decode()
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await websocket.send(payload)
+
+    async def close(self):
+        """Drop the current connection; `run` reconnects with the current symbols"""
+        if self._websocket is not None:
+            await self._websocket.close()
+
+    def stats(self) -> Dict:
+        return {
+            'exchange': self.exchange,
+            'symbols': len(self.symbols),
+            'connected': self.connected,
+            'connects': self.connects,
+            'messages': self.messages,
+            'updates': self.updates,
+            'errors': self.errors,
+            'idle_s': round(time.monotonic() - self.last_message_at, 3) if self.last_message_at else None,
+        }
+
+
+class MexcStream(MarketDataStream):
+    """MEXC spot v3 public trade stream (spot@public.deals.v3.api@<SYMBOL>)"""
+
+    exchange = 'MEXC'
+    max_symbols = 30
+
+    @classmethod
+    def default_url(cls) -> str:
+        return Config.MEXC_WS_URL
+
+    def subscribe_messages(self) -> List[Dict]:
+        return [{'method': 'SUBSCRIPTION',
+                 'params': [f"spot@public.deals.v3.api@{normalize_symbol(symbol)}" for symbol in self.symbols]}]
+
+    def ping_message(self) -> Optional[Dict]:
+        return {'method': 'PING'}
+
+    def parse(self, message):
+        deals = message.get('d', {}).get('deals') if isinstance(message, dict) else None
+        if not deals:
+            return ()
+        last = deals[-1]
+        return ((message['s'], float(last['p']), last.get('t')),)
+
+
+class KrakenStream(MarketDataStream):
+    """Kraken websocket v2 ticker channel"""
+
+    exchange = 'KRAKEN'
+
+    @classmethod
+    def default_url(cls) -> str:
+        return Config.KRAKEN_WS_URL
+
+    def subscribe_messages(self) -> List[Dict]:
+        return [{'method': 'subscribe', 'params': {
+            'channel': 'ticker', 'symbol': ['/'.join(split_pair(symbol)) for symbol in self.symbols]}}]
+
+    def ping_message(self) -> Optional[Dict]:
+        return {'method': 'ping'}
+
+    def parse(self, message):
+        if not isinstance(message, dict) or message.get('channel') != 'ticker':
+            return ()
+        return ((ticker['symbol'], float(ticker['last']), None)
+                for ticker in message.get('data', ()) if ticker.get('last') is not None)
+
+
+STREAM_CLASSES = {
+    'MEXC': MexcStream,
+    'KRAKEN': KrakenStream,
+}
+
+
+class MarketDataService:
+    """Streams prices for every pair in exchange_trading_pairs into the shared ticker cache
+
+    One connection per exchange (MEXC caps a connection at 30 streams, so larger
+    MEXC sets are split). The service runs its own event loop on a background
+    thread, and restarts the streams when exchange_trading_pairs or trading_pairs
+    change.
+    """
+
+    def __init__(self, cache: TickerCache = ticker_cache, urls: Dict[str, str] = None):
+        self.cache = cache
+        self.urls = urls or {}
+        self.streams: List[MarketDataStream] = []
+        self._loop = None
+        self._reload = None
+        self._task = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load_symbols(self) -> Dict[str, List[str]]:
+        """exchange name -> pair names, for the exchanges we can stream"""
+        symbols: Dict[str, List[str]] = {}
+        for pair in ExchangeTradingPairQueries.get_all_pairs():
+            exchange = pair['exchange_name'].upper()
+            if exchange in STREAM_CLASSES:
+                symbols.setdefault(exchange, []).append(pair['pair_name'])
+        return symbols
+
+    def build_streams(self, symbols: Dict[str, List[str]]) -> List[MarketDataStream]:
+        streams = []
+        for exchange, names in symbols.items():
+            cls = STREAM_CLASSES[exchange]
+            size = cls.max_symbols or len(names)
+            for start in range(0, len(names), size):
+                streams.append(cls(names[start:start + size], self.cache, self.urls.get(exchange)))
+        return streams
+
+    async def run(self, symbols: Dict[str, List[str]] = None):
+        """Stream until cancelled; reloads the pairs from the database when they change"""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._reload = asyncio.Event()
+        if self._stop.is_set():
+            # stop() ran before the loop existed and had nothing to cancel
+            return
+        while True:
+            current = symbols if symbols is not None else await self._load_symbols_retrying()
+            self.streams = self.build_streams(current)
+            tasks = [asyncio.create_task(stream.run()) for stream in self.streams]
+            try:
+                await self._reload.wait()
+                self._reload.clear()
+                logger.info("Trading pairs changed, resubscribing market data streams")
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _load_symbols_retrying(self) -> Dict[str, List[str]]:
+        # The database may not be reachable yet at startup; keep trying instead of ending the service
+        backoff = 1.0
+        while True:
+            try:
+                return await asyncio.to_thread(self.load_symbols)
+            except Exception as e:
+                logger.warning(f"Loading market data pairs failed: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def on_reference_change(self, table, op, old_row, new_row):
+        """reference_listener handler (runs on the listener thread); a resync (table None) reloads too"""
+        if table in ('exchange_trading_pairs', 'trading_pairs', None) and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._reload.set)
+
+    def start(self):
+        """Run the streams on a background thread"""
+        reference_listener.subscribe(self.on_reference_change)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_thread, name='market-data', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Cancel the streams and wait for the background thread to finish"""
+        self._stop.set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # the loop already closed
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run_thread(self):
+        try:
+            asyncio.run(self.run())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Market data service stopped: {e}")
+        finally:
+            self._loop = self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            'cache': self.cache.stats(),
+            'streams': [stream.stats() for stream in self.streams],
+        }
+
+
+# Global market data service, started by the application when enabled
+market_data = MarketDataService()
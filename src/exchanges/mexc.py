@@ -0,0 +1,102 @@
+import hashlib
+import hmac
+import time
+from decimal import Decimal
+from typing import Dict, List
+from urllib.parse import urlencode
+from src.config.index import Config
+from src.exchanges.base import BaseExchange, ExchangeError, to_decimal
+from src.exchanges.rate_limit import TokenBucket
+
+# MEXC spot v3 limits are weight based: 500 weight per 10 seconds per IP for market
+# data and per account (UID) for trading endpoints, tracked independently
+MEXC_WEIGHT_PER_10S = 500
+# (method, path) -> (bucket, weight); ticker/price costs 2 without a symbol
+MEXC_WEIGHTS = {
+    ('GET', '/api/v3/ping'): ('ip', 1),
+    ('GET', '/api/v3/ticker/price'): ('ip', 1),
+    ('POST', '/api/v3/order'): ('uid', 1),
+    ('GET', '/api/v3/order'): ('uid', 2),
+    ('DELETE', '/api/v3/order'): ('uid', 1),
+}
+
+
+class MEXC(BaseExchange):
+    """MEXC spot v3 REST client (HMAC-SHA256 signed query strings)"""
+
+    name = 'MEXC'
+
+    def __init__(self, api_key: str = None, api_secret: str = None, base_url: str = None, **kwargs):
+        super().__init__(api_key or Config.MEXC_API_KEY, api_secret or Config.MEXC_API_SECRET,
+                         base_url or Config.MEXC_BASE_URL, **kwargs)
+        self.ip_bucket = TokenBucket(MEXC_WEIGHT_PER_10S, MEXC_WEIGHT_PER_10S / 10, 'MEXC ip')
+        self.uid_bucket = TokenBucket(MEXC_WEIGHT_PER_10S, MEXC_WEIGHT_PER_10S / 10, 'MEXC uid')
+        self.session.headers['Content-Type'] = 'application/json'
+        if self.api_key:
+            self.session.headers['X-MEXC-APIKEY'] = self.api_key
+
+    def buckets(self) -> Dict[str, TokenBucket]:
+        return {'ip': self.ip_bucket, 'uid': self.uid_bucket}
+
+    def _sign(self, params: Dict) -> str:
+        if not self.api_key or not self.api_secret:
+            raise ExchangeError(self.name, "MEXC_API_KEY/MEXC_API_SECRET are not set")
+        params = dict(params, timestamp=int(time.time() * 1000), recvWindow=5000)
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    def _request(self, method: str, path: str, params: Dict = None, signed: bool = False, weight: int = None):
+        bucket_name, default_weight = MEXC_WEIGHTS.get((method, path), ('ip', 1))
+        bucket = self.uid_bucket if bucket_name == 'uid' else self.ip_bucket
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        if signed:
+            # Timestamped after any rate limit wait, so the request arrives inside recvWindow
+            response = self._send(method, path, bucket, weight or default_weight,
+                                  prepare=lambda: {'query': self._sign(params)})
+        else:
+            response = self._send(method, path, bucket, weight or default_weight, query=urlencode(params))
+        return self._payload(method, path, response)
+
+    def _payload(self, method, path, response):
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+        if response.status_code >= 400 or (isinstance(payload, dict) and payload.get('code') not in (None, 0, 200)):
+            self.errors += 1
+            message = payload.get('msg') if isinstance(payload, dict) else response.text[:200]
+            raise ExchangeError(self.name, f"{method} {path}: {message}", status=response.status_code,
+                                code=payload.get('code') if isinstance(payload, dict) else None)
+        return payload
+
+    def get_price(self, symbol: str) -> Decimal:
+        payload = self._request('GET', '/api/v3/ticker/price', {'symbol': symbol})
+        return to_decimal(payload['price'])
+
+    def get_prices(self, symbols: List[str] = None) -> Dict[str, Decimal]:
+        payload = self._request('GET', '/api/v3/ticker/price', weight=2)
+        prices = {ticker['symbol']: to_decimal(ticker['price']) for ticker in payload}
+        if symbols is not None:
+            prices = {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+        return prices
+
+    def place_order(self, symbol: str, side: str, quantity, price=None, client_order_id: str = None) -> Dict:
+        params = {
+            'symbol': symbol,
+            'side': side,
+            'type': 'LIMIT' if price is not None else 'MARKET',
+            'quantity': str(quantity),
+            'price': None if price is None else str(price),
+            'newClientOrderId': client_order_id,
+        }
+        payload = self._request('POST', '/api/v3/order', params, signed=True)
+        return self._order(payload['orderId'], symbol, side, payload.get('status', 'NEW'), payload)
+
+    def get_order(self, symbol: str, order_id: str) -> Dict:
+        payload = self._request('GET', '/api/v3/order', {'symbol': symbol, 'orderId': order_id}, signed=True)
+        return self._order(payload['orderId'], symbol, payload.get('side'), payload.get('status'), payload)
+
+    def cancel_order(self, symbol: str, order_id: str) -> bool:
+        self._request('DELETE', '/api/v3/order', {'symbol': symbol, 'orderId': order_id}, signed=True)
+        return True
@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Dict
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request would have to wait longer than allowed for rate limit budget"""
+
+
+class TokenBucket:
+    """Weight-based token bucket shared by every thread calling one exchange
+
+    The bucket holds up to `capacity` weight and refills at `refill_rate` weight per
+    second. `acquire` reserves the weight immediately, letting the balance go into
+    debt, and sleeps until the debt is repaid, so concurrent callers are served in
+    arrival order without busy waiting. `penalize` empties the bucket, e.g. after
+    the venue answered 429 with a Retry-After.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, name: str = None):
+        if capacity <= 0 or refill_rate <= 0:
+            raise ValueError("capacity and refill_rate must be positive")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.name = name
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def acquire(self, weight: float = 1, timeout: float = None) -> float:
+        """Take `weight` from the bucket, sleeping until it is available; returns the wait"""
+        if weight > self.capacity:
+            raise ValueError(f"Weight {weight} exceeds the bucket capacity {self.capacity}")
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (weight - self._tokens) / self.refill_rate)
+            if timeout is not None and wait > timeout:
+                raise RateLimitTimeout(f"{self.name or 'rate limit'}: {wait:.2f}s wait exceeds {timeout:.2f}s")
+            self._tokens -= weight
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+                self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float):
+        """Put the bucket `seconds` worth of refill into debt"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.refill_rate
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def stats(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'refill_rate': self.refill_rate,
+            'available': round(self.available(), 3),
+            'acquired': self.acquired,
+            'throttled': self.throttled,
+            'waited_s': round(self.waited, 3),
+        }
@@ -0,0 +1,35 @@
+import threading
+from typing import Dict
+from src.exchanges.base import BaseExchange
+from src.exchanges.kraken import Kraken
+from src.exchanges.mexc import MEXC
+
+# trades.exchange / exchanges.name -> client class
+EXCHANGE_CLASSES = {
+    'MEXC': MEXC,
+    'KRAKEN': Kraken,
+}
+
+_clients: Dict[str, BaseExchange] = {}
+_lock = threading.Lock()
+
+
+def get_exchange(name: str) -> BaseExchange:
+    """Shared client for an exchange, so its connection pool and rate limits are process-wide"""
+    key = name.upper()
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                if key not in EXCHANGE_CLASSES:
+                    raise ValueError(f"Unsupported exchange {name!r}, expected one of {list(EXCHANGE_CLASSES)}")
+                client = _clients[key] = EXCHANGE_CLASSES[key]()
+    return client
+
+
+def close_exchanges():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,106 @@
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from src.config.index import Config
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'btc/usdt', 'BTC-USDT' and 'BTCUSDT' all become 'BTCUSDT', the trades.symbol form"""
+    return symbol.replace('/', '').replace('-', '').replace('_', '').upper()
+
+
+class Ticker(NamedTuple):
+    exchange: str
+    symbol: str
+    price: float
+    # Exchange event time in epoch milliseconds, when the venue sends one
+    exchange_time: Optional[int]
+    # time.monotonic() when the update was received
+    received_at: float
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.received_at
+
+
+class TickerCache:
+    """Latest price per (exchange, symbol), written by the market-data streams
+
+    Each update replaces an immutable Ticker in a dict, which is atomic under the
+    GIL, so reads take no lock and never block the writer: the monitor, P&L code
+    and signal price updates can read on every tick without network calls.
+    Symbols are normalized to the trades.symbol form. Readers pass `max_age` (or
+    rely on MARKET_DATA_MAX_AGE) to get None instead of a stale price.
+    """
+
+    def __init__(self, max_age: float = None):
+        self.max_age = Config.MARKET_DATA_MAX_AGE if max_age is None else max_age
+        self._tickers: Dict[Tuple[str, str], Ticker] = {}
+        # symbol -> most recently updated ticker on any exchange
+        self._latest: Dict[str, Ticker] = {}
+        self.updates = 0
+
+    def update(self, exchange: str, symbol: str, price: float, exchange_time: int = None):
+        ticker = Ticker(exchange, normalize_symbol(symbol), float(price), exchange_time, time.monotonic())
+        self._tickers[(exchange, ticker.symbol)] = ticker
+        self._latest[ticker.symbol] = ticker
+        self.updates += 1
+
+    def get(self, symbol: str, exchange: str = None, max_age: float = None) -> Optional[Ticker]:
+        """The latest ticker for a symbol (on `exchange`, or on any exchange); None if missing or stale"""
+        symbol = normalize_symbol(symbol)
+        ticker = self._latest.get(symbol) if exchange is None else self._tickers.get((exchange, symbol))
+        if ticker is None:
+            return None
+        max_age = self.max_age if max_age is None else max_age
+        if max_age and time.monotonic() - ticker.received_at > max_age:
+            return None
+        return ticker
+
+    def price(self, symbol: str, exchange: str = None, max_age: float = None) -> Optional[float]:
+        ticker = self.get(symbol, exchange, max_age)
+        return None if ticker is None else ticker.price
+
+    def prices(self, exchange: str = None, max_age: float = None) -> Dict[str, float]:
+        """{symbol: price} of every fresh ticker, for TriggerIndex.on_prices, PositionBook.set_prices
+        and the PriceFeed (src.trading.price_feed)"""
+        max_age = self.max_age if max_age is None else max_age
+        oldest = time.monotonic() - max_age if max_age else float('-inf')
+        tickers = self._latest.values() if exchange is None else (
+            ticker for (venue, _), ticker in list(self._tickers.items()) if venue == exchange)
+        return {ticker.symbol: ticker.price for ticker in list(tickers) if ticker.received_at >= oldest}
+
+    def exchange_prices(self, max_age: float = None) -> Dict[Tuple[str, str], float]:
+        """{(exchange, symbol): price} of every fresh ticker, for pricing positions on their own venue"""
+        max_age = self.max_age if max_age is None else max_age
+        oldest = time.monotonic() - max_age if max_age else float('-inf')
+        return {key: ticker.price for key, ticker in list(self._tickers.items()) if ticker.received_at >= oldest}
+
+    def stale(self, max_age: float = None) -> List[Tuple[str, str, float]]:
+        """(exchange, symbol, age) of every ticker older than `max_age`"""
+        max_age = self.max_age if max_age is None else max_age
+        now = time.monotonic()
+        return [(exchange, symbol, now - ticker.received_at)
+                for (exchange, symbol), ticker in list(self._tickers.items())
+                if now - ticker.received_at > max_age]
+
+    def remove(self, exchange: str, symbol: str):
+        symbol = normalize_symbol(symbol)
+        self._tickers.pop((exchange, symbol), None)
+        latest = self._latest.get(symbol)
+        if latest is not None and latest.exchange == exchange:
+            del self._latest[symbol]
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        ages = sorted(now - ticker.received_at for ticker in list(self._tickers.values()))
+        return {
+            'tickers': len(ages),
+            'updates': self.updates,
+            'stale': sum(1 for age in ages if self.max_age and age > self.max_age),
+            'max_age_s': round(ages[-1], 3) if ages else None,
+            'median_age_s': round(ages[len(ages) // 2], 3) if ages else None,
+        }
+
+
+# Global ticker cache, fed by src.exchanges.market_data
+ticker_cache = TickerCache()
@@ -1,7 +1,17 @@
+import asyncio
 import logging
 import os
+import signal
+import time
 from src.config.index import Config
 from src.database.connection import db
+from src.database.listener import reference_listener
+from src.database.partitioning import partition_maintainer
+from src.exchanges.market_data import market_data
+from src.parser.signal_parser import signal_parsers
+from src.telegram.ingestion import run_ingestion
+from src.trading.position_store import position_store
+from src.trading.price_feed import price_feed
 
 # Configure logging
 logging.basicConfig(
@@ -15,19 +25,73 @@ def main():
     """Main application entry point"""
     logger.info("Starting Crypto Trading Bot...")
     
-    # Connect to database
+    # Connect to database; background threads that write through it need a pool so
+    # each gets its own connection
     try:
-        db.connect()
+        db.connect(pooled=Config.DB_POOL_ENABLED or Config.POSITION_STORE_ENABLED or Config.PARTITIONING_ENABLED
+                   or Config.MARKET_DATA_ENABLED)
         logger.info("Database connected successfully")
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         return
     
-    # TODO: Initialize Telegram client
-    # TODO: Initialize exchange clients
-    # TODO: Start monitoring loop
-    
-    logger.info("Application started successfully")
+    # Background components in start order; stopped in reverse on the way out
+    started = []
+    try:
+        # Keep cached reference data in sync with edits made through the web API
+        reference_listener.subscribe(signal_parsers.on_reference_change)
+        started.append(reference_listener.start())
+        
+        # Keep upcoming monthly partitions created and apply the retention settings
+        if Config.PARTITIONING_ENABLED:
+            started.append(partition_maintainer.start())
+        
+        # Stream prices for every configured trading pair into the shared ticker cache
+        if Config.MARKET_DATA_ENABLED:
+            started.append(market_data.start())
+        
+        # Rebuild live position state from the last flush plus the journal, then write behind
+        if Config.POSITION_STORE_ENABLED:
+            started.append(position_store.start())
+        
+        # Write the streamed prices to monitored positions and recent signals
+        if Config.MARKET_DATA_ENABLED:
+            started.append(price_feed.start(store=position_store if Config.POSITION_STORE_ENABLED else None))
+        
+        # TODO: Initialize exchange clients
+        # TODO: Start monitoring loop
+        
+        logger.info("Application started successfully")
+        
+        # Ingest messages from every source's Telegram group until the client disconnects
+        if Config.TELEGRAM_API_ID and Config.TELEGRAM_API_HASH:
+            asyncio.run(run_ingestion(parser=signal_parsers.parse))
+        else:
+            logger.warning("TELEGRAM_API_ID/TELEGRAM_API_HASH not set, Telegram ingestion disabled")
+            # The components run on daemon threads; keep the process up while any besides the
+            # reference listener (which only serves the others) is running
+            if len(started) > 1:
+                logger.info("Running background services until interrupted")
+                while True:
+                    time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        # The price feed stops before the position store, whose final flush then has the last prices
+        for component in reversed(started):
+            try:
+                component.stop()
+            except Exception as e:
+                logger.error(f"Stopping {type(component).__name__} failed: {e}")
+        db.disconnect()
+        logger.info("Application stopped")
+
+
+def _terminate(signum, frame):
+    # Shut down like Ctrl-C, so main() stops every component in its finally block
+    raise KeyboardInterrupt
+
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _terminate)
     main()
@@ -0,0 +1,69 @@
+import bisect
+import threading
+from typing import Dict, Iterable
+
+# Bucket upper bounds in milliseconds: 0.1 ms to ~105 s in steps of ~x1.26 (10 per decade)
+DEFAULT_BUCKETS_MS = tuple(round(0.1 * 10 ** (i / 10), 4) for i in range(61))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles
+
+    Recording is O(log buckets) with constant memory, so it can sit on hot paths.
+    Percentiles are reported as the upper bound of the bucket they fall in.
+    Thread-safe.
+    """
+
+    def __init__(self, buckets_ms: Iterable[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(buckets_ms)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Record one observation, given in seconds"""
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.bounds, ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += ms
+            if ms > self._max:
+                self._max = ms
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate latency in ms below which `fraction` of observations fall"""
+        with self._lock:
+            return self._percentile(fraction)
+
+    def _percentile(self, fraction):
+        if not self._count:
+            return 0.0
+        rank = fraction * self._count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self._max) if index < len(self.bounds) else self._max
+        return self._max
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._count = 0
+            self._total = 0.0
+            self._max = 0.0
+
+    def snapshot(self) -> Dict:
+        """Return count, mean, p50/p90/p99 and max, all latencies in ms"""
+        with self._lock:
+            return {
+                'count': self._count,
+                'mean_ms': self._total / self._count if self._count else 0.0,
+                'p50_ms': self._percentile(0.5),
+                'p90_ms': self._percentile(0.9),
+                'p99_ms': self._percentile(0.99),
+                'max_ms': self._max,
+            }
@@ -0,0 +1,319 @@
+import hashlib
+import logging
+import re
+import threading
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields produced for SignalQueries.create_signal
+PRICE_FIELDS = ('source_entry_price', 'tp1', 'tp2', 'tp3', 'tp4', 'sl')
+SIGNAL_FIELDS = PRICE_FIELDS + ('symbol',)
+MAX_TAKE_PROFITS = 4
+
+# A price: not part of a word (TP1, 1000PEPE), a percentage or a leverage (10x)
+NUMBER_PATTERN = r"(?<![\w.,])\d+(?:[.,]\d+)*(?![\w%]|[.,]\d|\s*%)"
+NUMBER = re.compile(NUMBER_PATTERN)
+# Several prices on one line: "100 - 102", "1.2 / 1.3 / 1.4", "5, 6 and 7"
+NUMBER_LIST_PATTERN = (rf"{NUMBER_PATTERN}(?:[^\S\n]*(?:[-–/|~,]|to|and)?[^\S\n]*\$?{NUMBER_PATTERN})*")
+NUMBER_LIST = re.compile(NUMBER_LIST_PATTERN)
+# A single digit numbering a target rather than pricing it: the "1" in "TP 1: 43000"
+TP_INDEX = re.compile(r"[1-9][^\S\n]*[:)\].\-=]")
+# A list item holding one price: "1) 0.52", "- 0.52", "• 0.52 (5%)" or just "0.52"
+LIST_ITEM_PATTERN = rf"[^\S\n]*(?:[-•*]|\d[).:\]])?[^\S\n]*[^\w\n]{{0,6}}?{NUMBER_PATTERN}[^\n]*"
+LIST_LINE = re.compile(LIST_ITEM_PATTERN)
+ENUMERATOR = re.compile(r"^[^\S\n]*(?:[-•*]|\d[).:\]])", re.MULTILINE)
+
+KEYWORDS = {
+    'sl': r"stop[\s-]*loss|stoploss|stop|sl|invalidation",
+    'tp': r"take[\s-]*profits?|targets?|tgts?|tp",
+    'entry': r"entry(?:[\s-]*(?:zone|price|point))?|entries|enter|buy(?:[\s-]*zone)?|sell(?:[\s-]*zone)?",
+    'weak_entry': r"open|price|at",
+    'ignore': r"leverage|lev|cross|isolated|margin|risk",
+}
+DIRECTIONS = r"long|short|buy|sell"
+_KEYWORD = re.compile(
+    r"(?<![a-z])(?:" + '|'.join(f"(?P<{kind}>{pattern})" for kind, pattern in KEYWORDS.items()) + r")(?![a-z])",
+    re.IGNORECASE
+)
+# Ticker-like tokens in a sample ("BTC/USDT", "#ETH", "SOLUSDT") vary per message
+_SYMBOL = re.compile(r"[#$]?[A-Z0-9]{2,20}(?:[/\-_][A-Z0-9]{2,10})?")
+_PREFIX_TOKEN = re.compile(r"\s+|[#$]?[A-Za-z0-9]+(?:[/\-_][A-Za-z0-9]+)?|.", re.DOTALL)
+SYMBOL_PATTERN = r"[#$]?[A-Za-z0-9]{2,20}(?:[/\-_][A-Za-z0-9]{2,10})?"
+# The traded pair: "BTC/USDT", "#ETH-USDT", "SOLUSDT"; failing that a bare ticker ("#BTC", "Buy SOL")
+QUOTED_PAIR = re.compile(r"(?<![A-Za-z0-9])[#$]?([A-Z0-9]{2,15}?)[/\-_]?(USDT|USDC|BUSD|FDUSD|USD)(?![A-Za-z0-9])")
+BARE_TICKER = re.compile(r"(?:[#$]|(?<![a-z])(?:long|short|buy|sell)\s+[#$]?)([A-Z0-9]{2,15})(?![A-Za-z0-9/\-_])",
+                         re.IGNORECASE)
+DEFAULT_QUOTE = 'USDT'
+
+
+def extract_symbol(text: str) -> Optional[str]:
+    """The pair a message trades in trades.symbol form ('BTCUSDT'), or None"""
+    match = QUOTED_PAIR.search(text)
+    if match:
+        return match.group(1) + match.group(2)
+    for match in BARE_TICKER.finditer(text):
+        ticker = match.group(1)
+        # Tickers are upper case; the match is case-insensitive only for the direction word
+        if ticker.isupper() and not ticker.isdigit() and not _KEYWORD.fullmatch(ticker):
+            return ticker + DEFAULT_QUOTE
+    return None
+
+
+def parse_number(text: str) -> Optional[Decimal]:
+    """Parse '42,000.5', '0,5123' or '1.25' into a Decimal"""
+    if ',' in text:
+        if '.' in text or re.fullmatch(r"\d{1,3}(?:,\d{3})+", text):
+            text = text.replace(',', '')
+        else:
+            text = text.replace(',', '.')
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+class Rule:
+    """One line pattern of a template: where a field's number(s) appear"""
+
+    __slots__ = ('kind', 'start', 'multi', 'block', 'pattern')
+
+    def __init__(self, kind: str, pattern: str, start: int = 1, multi: bool = False, block: bool = False):
+        self.kind = kind        # 'entry', 'tp' or 'sl'
+        self.start = start      # first take-profit number this rule fills
+        self.multi = multi      # True when the rule yields several take-profits
+        self.block = block      # True when the prices are listed on the lines after the label
+        self.pattern = pattern  # regex matching the label before the first price
+
+    @property
+    def key(self):
+        return (self.kind, self.pattern, self.start, self.multi, self.block)
+
+    def __repr__(self):
+        return f"Rule({self.kind!r}, {self.pattern!r}, start={self.start}, multi={self.multi}, block={self.block})"
+
+
+def _classify(prefix: str) -> Tuple[Optional[str], Optional[int]]:
+    """Return (kind, take-profit index) for the label text before a line's first number"""
+    kinds = [match.lastgroup for match in _KEYWORD.finditer(prefix)]
+    # The last keyword before the number names it ("Buy BTC, stop 95" -> sl), but
+    # "at"/"price" only count on their own ("Stop at 95" -> sl, "BTC at 100" -> entry)
+    strong = [kind for kind in kinds if kind != 'weak_entry']
+    kind = strong[-1] if strong else ('entry' if kinds else None)
+    index = None
+    if kind == 'tp':
+        digits = re.findall(r"(\d)\D*$", prefix)
+        index = int(digits[0]) if digits and 0 < int(digits[0]) <= MAX_TAKE_PROFITS else None
+    return kind, index
+
+
+def _generalize(prefix: str) -> str:
+    """Regex for a sample's label text: keywords literal, tickers and directions generic"""
+    parts = []
+    for token in _PREFIX_TOKEN.findall(prefix):
+        if token.isspace():
+            parts.append(r"\s*")
+        elif re.fullmatch(DIRECTIONS, token, re.IGNORECASE):
+            parts.append(f"(?:{DIRECTIONS})")
+        elif _KEYWORD.match(token) or not _SYMBOL.fullmatch(token) or token.isdigit():
+            parts.append(re.escape(token))
+        else:
+            parts.append(SYMBOL_PATTERN)
+    pattern = ''.join(parts)
+    # Collapse runs of optional whitespace produced by adjacent tokens
+    return re.sub(r"(?:\\s\*)+", r"\\s*", pattern).strip()
+
+
+def _line_rules(line: str) -> List[Rule]:
+    """Rules for each labelled price (list) on one line: "Buy X at 1, targets 2 / 3, stop 0.9" """
+    rules = []
+    position = 0
+    label_start = 0
+    while True:
+        match = NUMBER_LIST.search(line, position)
+        if match is None:
+            return rules
+        prefix = line[label_start:match.start()]
+        kind, index = _classify(prefix)
+        first = NUMBER.match(line, match.start())
+        if kind == 'tp' and index is None and TP_INDEX.match(line, first.start()):
+            # "Take Profit 1: 0.085": the 1 numbers the target, the price follows
+            position = first.end()
+            continue
+        if kind in ('entry', 'tp', 'sl'):
+            numbers = NUMBER.findall(match.group())
+            # Separators left over from the previous price aren't part of the label
+            rules.append(Rule(kind, _generalize(prefix.strip().lstrip(',;|').strip()), start=index or 1,
+                              multi=kind == 'tp' and index is None and len(numbers) > 1))
+        position = label_start = match.end()
+
+
+def rules_from_sample(sample: str) -> List[Rule]:
+    """Derive line rules from one sample message"""
+    rules = []
+    header = None
+    for line in sample.splitlines():
+        has_number = NUMBER.search(line) is not None
+        if header is not None:
+            kind, header_line = header
+            header = None
+            if has_number and LIST_LINE.match(line):
+                # A header like "Targets:" followed by one price per line
+                rules.append(Rule(kind, _generalize(header_line.strip()), multi=kind == 'tp', block=True))
+                continue
+        if not has_number:
+            kind, _ = _classify(line)
+            if kind in ('entry', 'tp', 'sl'):
+                header = (kind, line)
+            continue
+        rules.extend(_line_rules(line))
+    return rules
+
+
+# Used for sources without usable samples
+GENERIC_RULES = [
+    Rule('entry', r"(?:entry(?:\s*(?:zone|price|point))?|entries|enter|buy(?:\s*zone)?|sell(?:\s*zone)?|open|price)\s*[:=@-]?"),
+    Rule('entry', SYMBOL_PATTERN + r"\s+(?:\d+(?:\.\d+)?\s+)?at"),
+    Rule('tp', r"(?:take\s*profit|target|tgt|tp)\s*1\s*[:=)\-]?", start=1),
+    Rule('tp', r"(?:take\s*profit|target|tgt|tp)\s*2\s*[:=)\-]?", start=2),
+    Rule('tp', r"(?:take\s*profit|target|tgt|tp)\s*3\s*[:=)\-]?", start=3),
+    Rule('tp', r"(?:take\s*profit|target|tgt|tp)\s*4\s*[:=)\-]?", start=4),
+    # "Targets:" alone on its line, with one price per line below it ("1) 43000", "- 44000")
+    Rule('tp', r"(?:take\s*profits?|targets?|tgts?|tps?)[^\S\n]*[:=\-]?(?=[^\S\n]*\n)", multi=True, block=True),
+    Rule('tp', r"(?:take\s*profits?|targets?|tgts?|tp)\s*[:=\-]?", multi=True),
+    Rule('sl', r"(?:stop[\s-]*loss|stoploss|stop|sl|invalidation)\s*[:=@-]?"),
+]
+
+
+class CompiledParser:
+    """Matcher for one source, built from its message samples
+
+    All rules are combined into one alternation, so a message is scanned once. Each
+    match captures the price(s) following its label; the first rule to supply a field wins.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        alternatives = []
+        for position, rule in enumerate(rules):
+            if rule.block:
+                value = f"[^\\n]*\\n(?P<r{position}>{LIST_ITEM_PATTERN}(?:\\n{LIST_ITEM_PATTERN})*)"
+            else:
+                # Up to a few characters of punctuation or currency may sit between label and price
+                value = f"[^\\w\\n]{{0,12}}?(?P<r{position}>{NUMBER_LIST_PATTERN})"
+            alternatives.append(f"(?:{rule.pattern}){value}")
+        self.regex = re.compile('|'.join(alternatives), re.IGNORECASE | re.MULTILINE)
+
+    def parse(self, text: str) -> Optional[Dict]:
+        """Return create_signal keyword arguments, or None if the message is not a signal"""
+        fields = {}
+        for match in self.regex.finditer(text):
+            rule = self.rules[int(match.lastgroup[1:])]
+            value = match.group(match.lastgroup)
+            if rule.block:
+                value = ENUMERATOR.sub('', value)
+            numbers = NUMBER.findall(value)
+            if not numbers:
+                continue
+            if rule.kind == 'entry':
+                fields.setdefault('source_entry_price', parse_number(numbers[0]))
+            elif rule.kind == 'sl':
+                fields.setdefault('sl', parse_number(numbers[0]))
+            else:
+                values = numbers if rule.multi else numbers[:1]
+                for offset, value in enumerate(values):
+                    index = rule.start + offset
+                    if index > MAX_TAKE_PROFITS:
+                        break
+                    fields.setdefault(f"tp{index}", parse_number(value))
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if 'source_entry_price' not in fields or len(fields) < 2:
+            return None
+        symbol = extract_symbol(text)
+        if symbol:
+            fields['symbol'] = symbol
+        return fields
+
+
+GENERIC_PARSER = CompiledParser(GENERIC_RULES)
+
+
+def compile_source_parser(source: Dict) -> CompiledParser:
+    """Build the parser for a source from its short and long message samples
+
+    Rules from both samples are combined. A source whose samples don't yield an
+    entry rule falls back to the generic keyword rules.
+    """
+    rules = []
+    seen = set()
+    for sample in (source.get('message_sample_long'), source.get('message_sample_short')):
+        for rule in rules_from_sample(sample or ''):
+            if rule.key not in seen:
+                seen.add(rule.key)
+                rules.append(rule)
+    if not any(rule.kind == 'entry' for rule in rules):
+        return GENERIC_PARSER
+    # Keep the generic rules as a fallback for lines the samples didn't show
+    return CompiledParser(rules + GENERIC_RULES)
+
+
+def _samples_fingerprint(source: Dict) -> str:
+    digest = hashlib.sha1()
+    for sample in (source.get('message_sample_short'), source.get('message_sample_long')):
+        digest.update((sample or '').encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ParserCache:
+    """Compiled parsers by source uuid, recompiled when a source's samples change
+
+    Entries are also dropped by `invalidate`, which `on_reference_change` calls for
+    edited and deleted sources when subscribed to the reference listener.
+    """
+
+    def __init__(self):
+        self._parsers: Dict[str, Tuple[str, CompiledParser]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.compiles = 0
+
+    def get(self, source: Dict) -> CompiledParser:
+        fingerprint = _samples_fingerprint(source)
+        entry = self._parsers.get(source['uuid'])
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+        parser = compile_source_parser(source)
+        with self._lock:
+            self._parsers[source['uuid']] = (fingerprint, parser)
+            self.compiles += 1
+        return parser
+
+    def parse(self, source: Dict, text: str) -> Optional[Dict]:
+        """SignalParser entry point: parse `text` with the source's compiled parser"""
+        return self.get(source).parse(text)
+
+    def invalidate(self, source_uuid: str = None):
+        with self._lock:
+            if source_uuid is None:
+                self._parsers.clear()
+            else:
+                self._parsers.pop(source_uuid, None)
+
+    def on_reference_change(self, table, op, old_row, new_row):
+        """reference_listener handler; a resync (table None) drops every compiled parser"""
+        if table is None:
+            self.invalidate()
+        elif table == 'sources':
+            for row in (old_row, new_row):
+                if row:
+                    self.invalidate(row['uuid'])
+
+    def stats(self) -> Dict:
+        return {'parsers': len(self._parsers), 'hits': self.hits, 'compiles': self.compiles}
+
+
+# Global parser cache
+signal_parsers = ParserCache()
@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 16
+# Persisted entry: fingerprint followed by its expiry as a Unix timestamp
+_RECORD = struct.Struct(f"<{DIGEST_SIZE}sd")
+_STATE_MAGIC = b"CTBDEDUP1\n"
+
+# Parts of a message that change between copies of the same call
+_URL = re.compile(r"https?://\S+|t\.me/\S+", re.IGNORECASE)
+_MENTION = re.compile(r"@\w+")
+_FORWARD_HEADER = re.compile(r"^\s*(?:forwarded from|via|source)\b[^\n]*\n", re.IGNORECASE)
+# Keep words and prices; emojis, markup and punctuation only separate them
+_TOKEN = re.compile(r"\w+(?:[.,]\d+)*")
+
+
+def normalize(text: str) -> str:
+    """Reduce a message to the content that identifies the call
+
+    Case, emojis, markdown, links, @mentions, forward headers and whitespace are
+    dropped, so an edited, cross-posted or re-forwarded copy normalizes the same.
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = _FORWARD_HEADER.sub('', text)
+    text = _URL.sub(' ', text)
+    text = _MENTION.sub(' ', text)
+    return ' '.join(_TOKEN.findall(text))
+
+
+def fingerprint(source_uuid: str, text: str) -> bytes:
+    """Fingerprint of a message's normalized content for one source"""
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    digest.update(source_uuid.encode())
+    digest.update(b'\0')
+    digest.update(normalize(text).encode())
+    return digest.digest()
+
+
+class MessageDeduplicator:
+    """Seen-set of message fingerprints per source with time-based expiry
+
+    A fingerprint is remembered for `ttl` seconds; at most `max_entries` are held
+    and the oldest are evicted first, so memory stays bounded (roughly 100 bytes
+    per entry) during a flood of distinct messages. Expiry uses wall-clock time so
+    the set can be saved to `state_path` and reloaded after a restart. Thread-safe.
+    """
+
+    def __init__(self, ttl: float = 21600, max_entries: int = 100_000, state_path: str = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.state_path = state_path or None
+        # fingerprint -> expiry; insertion order is expiry order since ttl is fixed
+        self._seen: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.suppressed = 0
+        self.evicted = 0
+        self.suppressed_by_source: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _expire(self, now):
+        seen = self._seen
+        while seen:
+            _, expires = next(iter(seen.items()))
+            if expires > now:
+                break
+            seen.popitem(last=False)
+
+    def check(self, source_uuid: str, text: str) -> bool:
+        """Remember the message for the source; False if it is a duplicate
+
+        A duplicate does not extend the original's expiry, so a call repeated
+        every few minutes still goes through once per `ttl`.
+        """
+        key = fingerprint(source_uuid, text)
+        now = time.time()
+        with self._lock:
+            self.checked += 1
+            self._expire(now)
+            if key in self._seen:
+                self.suppressed += 1
+                self.suppressed_by_source[source_uuid] = self.suppressed_by_source.get(source_uuid, 0) + 1
+                return False
+            self._seen[key] = now + self.ttl
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+                self.evicted += 1
+            return True
+
+    def fresh_sources(self, sources: Iterable[Dict], text: str) -> List[Dict]:
+        """The sources for which `text` has not been seen yet (and remember it for them)"""
+        return [source for source in sources if self.check(source['uuid'], text)]
+
+    def forget(self, source_uuid: str, text: str):
+        """Drop a message's fingerprint, e.g. when it was accepted but never processed"""
+        with self._lock:
+            self._seen.pop(fingerprint(source_uuid, text), None)
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+
+    def save(self, path: str = None) -> int:
+        """Write the unexpired fingerprints to `path` (atomically) and return how many"""
+        path = path or self.state_path
+        if not path:
+            return 0
+        with self._lock:
+            self._expire(time.time())
+            entries = list(self._seen.items())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_STATE_MAGIC)
+            f.write(b''.join(_RECORD.pack(key, expires) for key, expires in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def load(self, path: str = None) -> int:
+        """Merge unexpired fingerprints saved by `save` and return how many were loaded"""
+        path = path or self.state_path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(_STATE_MAGIC):
+            logger.warning(f"Ignoring dedup state {path}: unrecognized format")
+            return 0
+        now = time.time()
+        body = memoryview(data)[len(_STATE_MAGIC):]
+        body = body[:len(body) - len(body) % _RECORD.size]
+        loaded = 0
+        with self._lock:
+            for key, expires in _RECORD.iter_unpack(body):
+                if expires > now and key not in self._seen:
+                    self._seen[key] = expires
+                    loaded += 1
+            # Keep insertion order equal to expiry order
+            self._seen = OrderedDict(sorted(self._seen.items(), key=lambda item: item[1]))
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+                self.evicted += 1
+        return loaded
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self._seen),
+            'max_entries': self.max_entries,
+            'checked': self.checked,
+            'suppressed': self.suppressed,
+            'evicted': self.evicted,
+        }
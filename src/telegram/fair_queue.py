@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+class FairQueue:
+    """Bounded asyncio queue with one FIFO lane per key, served round-robin
+
+    `get` takes one item from each non-empty lane in turn, so a burst on one key
+    (e.g. one Telegram channel) waits behind its own backlog rather than everyone's.
+    Each lane holds at most `lane_size` items and the queue at most `maxsize`.
+    When a put would exceed either bound, `overflow` decides what happens:
+
+    - 'block': wait up to `put_timeout` seconds for room, then drop the new item
+    - 'drop_oldest': evict the oldest item of the full lane, or of the longest lane
+      when the whole queue is full
+    - 'drop_newest': drop the new item
+
+    `put` returns False for a dropped new item; an evicted item, which was already
+    accepted, is passed to `on_evict(key, item)` so the owner can undo what it did
+    on acceptance.
+    """
+
+    def __init__(self, maxsize: int = 1000, lane_size: int = 200, overflow: str = 'drop_oldest',
+                 put_timeout: float = 1.0, on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        self.maxsize = maxsize
+        self.lane_size = min(lane_size, maxsize)
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self.on_evict = on_evict
+        self._lanes: Dict[Hashable, deque] = {}
+        self._ready = deque()
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._not_empty = asyncio.Condition(self._lock)
+        self._not_full = asyncio.Condition(self._lock)
+        self.put_count = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.blocked = 0
+        self.dropped_by_key: Dict[Hashable, int] = {}
+
+    def qsize(self) -> int:
+        return self._size
+
+    def _full(self, key) -> bool:
+        lane = self._lanes.get(key)
+        return self._size >= self.maxsize or (lane is not None and len(lane) >= self.lane_size)
+
+    def _count_drop(self, key):
+        self.dropped_by_key[key] = self.dropped_by_key.get(key, 0) + 1
+
+    def _evict(self, key):
+        lane = self._lanes.get(key)
+        if lane is None or len(lane) < self.lane_size:
+            # The queue as a whole is full: take from whoever is bursting
+            key = max(self._lanes, key=lambda k: len(self._lanes[k]))
+            lane = self._lanes[key]
+        item = lane.popleft()
+        self._size -= 1
+        self.evicted += 1
+        self._count_drop(key)
+        if not lane:
+            del self._lanes[key]
+            self._ready.remove(key)
+        if self.on_evict is not None:
+            try:
+                self.on_evict(key, item)
+            except Exception as e:
+                logger.error(f"on_evict handler failed for lane {key!r}: {e}")
+
+    async def put(self, key: Hashable, item: Any) -> bool:
+        """Queue `item` on the lane for `key`; returns False if it was dropped"""
+        async with self._lock:
+            if self._full(key):
+                if self.overflow == 'drop_newest':
+                    self.dropped += 1
+                    self._count_drop(key)
+                    return False
+                if self.overflow == 'drop_oldest':
+                    self._evict(key)
+                else:
+                    self.blocked += 1
+                    try:
+                        await asyncio.wait_for(self._not_full.wait_for(lambda: not self._full(key)),
+                                               self.put_timeout)
+                    except asyncio.TimeoutError:
+                        self.dropped += 1
+                        self._count_drop(key)
+                        return False
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = deque()
+                self._ready.append(key)
+            lane.append(item)
+            self._size += 1
+            self.put_count += 1
+            self._not_empty.notify()
+            return True
+
+    async def get(self) -> Tuple[Hashable, Any]:
+        """Remove and return (key, item) from the next lane in round-robin order"""
+        async with self._lock:
+            await self._not_empty.wait_for(lambda: self._size > 0)
+            key = self._ready.popleft()
+            lane = self._lanes[key]
+            item = lane.popleft()
+            self._size -= 1
+            if lane:
+                self._ready.append(key)
+            else:
+                del self._lanes[key]
+            self._not_full.notify_all()
+            return key, item
+
+    def pop_all(self) -> List[Tuple[Hashable, Any]]:
+        """Remove and return every queued (key, item) without waiting, oldest first within each lane"""
+        items = [(key, item) for key in self._ready for item in self._lanes[key]]
+        self._lanes.clear()
+        self._ready.clear()
+        self._size = 0
+        return items
+
+    def stats(self) -> Dict:
+        return {
+            'size': self._size,
+            'maxsize': self.maxsize,
+            'lanes': len(self._lanes),
+            'lane_size': self.lane_size,
+            'overflow': self.overflow,
+            'put': self.put_count,
+            'dropped': self.dropped,
+            'evicted': self.evicted,
+            'blocked': self.blocked,
+        }
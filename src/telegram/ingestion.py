@@ -0,0 +1,439 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+import orjson
+from telethon import TelegramClient, events, utils
+from src.config.index import Config
+from src.database.async_connection import async_db
+from src.database.async_queries import AsyncMessageQueries, AsyncSourceQueries
+from src.database.listener import reference_listener
+from src.database.spool import Spool, SpoolFull
+from src.metrics import LatencyHistogram
+from src.parser.signal_parser import PRICE_FIELDS
+from src.telegram.dedup import MessageDeduplicator
+from src.telegram.fair_queue import FairQueue
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages with a latency histogram each:
+# delivery   Telegram message date -> received by the handler
+# queue      received -> picked up by a worker
+# parse      running the parser for every source of the group
+# persist    saving the message row and its signals in one transaction (or spooling them
+#            while the database is unavailable or slow)
+# total      received -> done
+STAGES = ('delivery', 'queue', 'parse', 'persist', 'total')
+
+# parser(source, message_text) -> SignalQueries.create_signal keyword arguments, or None
+SignalParser = Callable[[Dict, str], Optional[Dict]]
+
+
+def _spool_record(message, group_id, parsed, creation_time, created_at) -> bytes:
+    return orjson.dumps({
+        'text': message.text,
+        'date': message.date.isoformat() if message.date else None,
+        'sender_id': message.sender_id,
+        'sender_name': message.sender_name,
+        'group_id': group_id,
+        'message_id': message.message_id,
+        'created_at': created_at.isoformat(),
+        'signals': [[source['uuid'], fields] for source, fields in parsed],
+        'creation_time': creation_time.isoformat(),
+    }, default=str)
+
+
+def _spooled_message(payload: bytes) -> Tuple:
+    """AsyncMessageQueries.save_messages_with_signals row from a spool record"""
+    record = orjson.loads(payload)
+    creation_time = datetime.fromisoformat(record['creation_time'])
+    signals = [(creation_time, source_uuid,
+                {name: Decimal(value) if value is not None and name in PRICE_FIELDS else value
+                 for name, value in fields.items()})
+               for source_uuid, fields in record['signals']]
+    date = datetime.fromisoformat(record['date']) if record['date'] else None
+    # Records spooled before message_id / created_at were stored replay without the key
+    created_at = datetime.fromisoformat(record['created_at']) if record.get('created_at') else None
+    return (record['text'], date, record['sender_id'], record['sender_name'], record['group_id'],
+            record.get('message_id'), created_at, signals)
+
+
+def chat_key(chat_id: int) -> int:
+    """Bare Telegram peer id, so -100-prefixed channel ids and plain ids compare equal"""
+    return utils.resolve_id(int(chat_id))[0]
+
+
+class IncomingMessage:
+    """One Telegram message on its way through the pipeline (`date` is naive UTC)"""
+
+    __slots__ = ('group_id', 'message_id', 'text', 'date', 'sender_id', 'sender_name', 'received_at', 'sources',
+                 'created_at')
+
+    def __init__(self, group_id, message_id, text, date, sender_id=None, sender_name=None, received_at=None):
+        self.group_id = group_id
+        self.message_id = message_id
+        self.text = text
+        self.date = date
+        self.sender_id = sender_id
+        self.sender_name = sender_name
+        self.received_at = time.monotonic() if received_at is None else received_at
+        # Sources the message is new for, set by TelegramIngestion.submit
+        self.sources = None
+        # telegram_messages.created_at, fixed by the first write attempt so every retry carries the same key
+        self.created_at = None
+
+
+class TelegramIngestion:
+    """Ingests messages from every source's Telegram group over one client
+
+    The NewMessage handler only filters and enqueues. Messages wait in a FairQueue
+    with one bounded lane per group, and `workers` tasks parse them against each
+    source of the group, save the message and create signals. A burst in one group
+    therefore queues (and, once its lane is full, overflows) on its own lane while
+    the other groups keep being served. Copies of a message a source has already
+    sent (edits, cross-posts, re-forwards) are suppressed by `dedup` before they are
+    queued. `stats()` reports counters, queue state and per-stage latency.
+
+    The message row and its signals are written in one transaction. With a `spool`,
+    a message whose write fails or takes longer than SPOOL_WRITE_TIMEOUT is appended
+    to the on-disk spool (with the signals parsed from it) instead of being lost,
+    and later messages go straight to the spool until it has been drained, so a
+    PostgreSQL outage never stalls the workers. A drain task writes spooled messages
+    back in bulk once the database answers again.
+    """
+
+    def __init__(self, client: TelegramClient = None, parser: SignalParser = None, workers: int = None,
+                 queue_size: int = None, group_queue_size: int = None, overflow: str = None,
+                 put_timeout: float = None, dedup: MessageDeduplicator = None, spool: Spool = None):
+        self.client = client
+        self.parser = parser
+        self.workers = workers or Config.INGESTION_WORKERS
+        self.queue = FairQueue(
+            queue_size or Config.INGESTION_QUEUE_SIZE,
+            group_queue_size or Config.INGESTION_GROUP_QUEUE_SIZE,
+            overflow or Config.INGESTION_OVERFLOW,
+            Config.INGESTION_PUT_TIMEOUT if put_timeout is None else put_timeout,
+            on_evict=self._on_evicted,
+        )
+        if dedup is None and Config.DEDUP_ENABLED:
+            dedup = MessageDeduplicator(Config.DEDUP_TTL, Config.DEDUP_MAX_ENTRIES, Config.DEDUP_STATE_PATH)
+        self.dedup = dedup
+        if spool is None and Config.SPOOL_ENABLED:
+            spool = Spool(Config.SPOOL_DIR, Config.SPOOL_SEGMENT_SIZE, Config.SPOOL_MAX_BYTES)
+        self.spool = spool
+        # Set when a database write fails; cleared once the spool has been drained
+        self.spooling = False
+        self.spool_drain = {'batches': 0, 'messages': 0, 'signals': 0, 'failures': 0, 'seconds': 0.0}
+        self.latency = {stage: LatencyHistogram() for stage in STAGES}
+        self.counters = dict.fromkeys(
+            ('received', 'ignored', 'duplicates', 'enqueued', 'dropped', 'processed', 'parsed', 'unparsed',
+             'signals_created', 'spooled', 'spool_rejected', 'errors'), 0)
+        # chat_key -> sources listening to that group
+        self.sources: Dict[int, List[Dict]] = {}
+        self._tasks = []
+        self._loop = None
+        self._reload = None
+        # Cleared by stop(); messages submitted after that are dropped
+        self._accepting = True
+        # Messages a worker has taken off the queue and not finished yet
+        self._in_flight = set()
+
+    async def load_sources(self):
+        """(Re)load the group -> sources map from the database"""
+        sources = {}
+        for source in await AsyncSourceQueries.get_all_sources():
+            sources.setdefault(chat_key(source['telegram_group_id']), []).append(source)
+        self.sources = sources
+        logger.info(f"Ingesting {len(sources)} Telegram group(s) for "
+                    f"{sum(len(group) for group in sources.values())} source(s)")
+
+    def on_reference_change(self, table, op, old_row, new_row):
+        """reference_listener handler: reload sources after any change or a resync (runs on the listener thread)"""
+        if table in ('sources', None) and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._schedule_reload)
+
+    def _schedule_reload(self):
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.ensure_future(self.load_sources())
+
+    async def handle_event(self, event):
+        """Telethon NewMessage handler"""
+        message = event.message
+        sender = message.sender
+        sender_name = None
+        if sender is not None:
+            sender_name = utils.get_display_name(sender) or None
+        await self.submit(IncomingMessage(
+            event.chat_id, message.id, message.message or '',
+            message.date.replace(tzinfo=None) if message.date else None,
+            message.sender_id, sender_name,
+        ))
+
+    async def submit(self, message: IncomingMessage) -> bool:
+        """Queue a message for processing; False if it was ignored or dropped"""
+        self.counters['received'] += 1
+        if not self._accepting:
+            self.counters['dropped'] += 1
+            return False
+        key = chat_key(message.group_id)
+        sources = self.sources.get(key)
+        if not sources or not message.text:
+            self.counters['ignored'] += 1
+            return False
+        if self.dedup is not None:
+            sources = self.dedup.fresh_sources(sources, message.text)
+            if not sources:
+                self.counters['duplicates'] += 1
+                return False
+        message.sources = sources
+        if message.date is not None:
+            sent_at = message.date.replace(tzinfo=timezone.utc).timestamp()
+            self.latency['delivery'].record(max(time.time() - sent_at, 0.0))
+        if await self.queue.put(key, message):
+            self.counters['enqueued'] += 1
+            return True
+        self.counters['dropped'] += 1
+        self._forget(message)
+        return False
+
+    def _forget(self, message: IncomingMessage):
+        """Drop a message's fingerprints: it was never processed, so a later copy should still get through"""
+        if self.dedup is not None and message.sources:
+            for source in message.sources:
+                self.dedup.forget(source['uuid'], message.text)
+
+    def _on_evicted(self, key, message: IncomingMessage):
+        # Accepted, then pushed out of its lane by newer messages (drop_oldest)
+        self.counters['dropped'] += 1
+        self._forget(message)
+
+    async def process(self, message: IncomingMessage):
+        """Parse, persist and create signals for one message"""
+        started = time.monotonic()
+        self.latency['queue'].record(started - message.received_at)
+        sources = message.sources
+        if sources is None:
+            sources = self.sources.get(chat_key(message.group_id), [])
+        group_id = sources[0]['telegram_group_id'] if sources else message.group_id
+
+        parsed = []
+        if self.parser is not None:
+            for source in sources:
+                fields = self.parser(source, message.text)
+                if fields:
+                    parsed.append((source, fields))
+        parsed_at = time.monotonic()
+        self.latency['parse'].record(parsed_at - started)
+
+        creation_time = message.date or datetime.utcnow()
+        if message.created_at is None:
+            message.created_at = datetime.now()
+        created_at = message.created_at
+        if self.spool is not None and (self.spooling or self.spool.pending):
+            await self._spool(message, group_id, parsed, parsed_at, creation_time, created_at)
+            return
+        row = (message.text, message.date, message.sender_id, message.sender_name, group_id, message.message_id,
+               created_at, [(creation_time, source['uuid'], fields) for source, fields in parsed])
+        try:
+            # Without a spool there is nowhere else to put the message, so wait for the database
+            _, signals = await asyncio.wait_for(AsyncMessageQueries.save_messages_with_signals([row]),
+                                                Config.SPOOL_WRITE_TIMEOUT if self.spool is not None else None)
+        except Exception as e:
+            if self.spool is None:
+                raise
+            if not self.spooling:
+                reason = 'timed out' if isinstance(e, asyncio.TimeoutError) else e
+                logger.warning(f"Saving messages failed ({reason}); spooling to {self.spool.directory} until "
+                               f"the database is back")
+            self.spooling = True
+            # The abandoned write may still commit; replaying it is then skipped by the unique key
+            await self._spool(message, group_id, parsed, parsed_at, creation_time, created_at)
+            return
+        done = time.monotonic()
+        self.latency['persist'].record(done - parsed_at)
+        if parsed:
+            self.counters['parsed'] += 1
+            self.counters['signals_created'] += signals
+        else:
+            self.counters['unparsed'] += 1
+        self.latency['total'].record(done - message.received_at)
+
+    async def _spool(self, message: IncomingMessage, group_id, parsed, parsed_at, creation_time, created_at):
+        payload = _spool_record(message, group_id, parsed, creation_time, created_at)
+        try:
+            await asyncio.to_thread(self.spool.append, payload)
+        except SpoolFull as e:
+            self.counters['spool_rejected'] += 1
+            logger.error(f"Lost message {message.message_id} from group {message.group_id}: {e}")
+            return
+        self.counters['spooled'] += 1
+        done = time.monotonic()
+        self.latency['persist'].record(done - parsed_at)
+        self.latency['total'].record(done - message.received_at)
+
+    async def drain_spool_once(self, batch_size: int = None) -> int:
+        """Write one batch of spooled messages to the database; returns messages written"""
+        records, position = await asyncio.to_thread(self.spool.read, batch_size or Config.SPOOL_DRAIN_BATCH)
+        if not records:
+            self.spooling = False
+            return 0
+        started = time.monotonic()
+        saved, signals = await AsyncMessageQueries.save_messages_with_signals(
+            [_spooled_message(r) for r in records])
+        await asyncio.to_thread(self.spool.commit, position, len(records))
+        self.spool_drain['batches'] += 1
+        self.spool_drain['messages'] += saved
+        self.spool_drain['signals'] += signals
+        self.spool_drain['seconds'] += time.monotonic() - started
+        self.counters['signals_created'] += signals
+        return saved
+
+    async def _drain_spool(self, interval):
+        while True:
+            try:
+                if await self.drain_spool_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.spool_drain['failures'] += 1
+                logger.warning(f"Spool drain failed ({e}); {self.spool.pending} message(s) waiting")
+            await asyncio.sleep(interval)
+
+    async def _worker(self):
+        while True:
+            _, message = await self.queue.get()
+            self._in_flight.add(message)
+            try:
+                await self.process(message)
+                self.counters['processed'] += 1
+            except asyncio.CancelledError:
+                # Interrupted by stop(), which spools or forgets what is left in _in_flight
+                raise
+            except Exception as e:
+                self.counters['errors'] += 1
+                self._forget(message)
+                logger.error(f"Failed to ingest message {message.message_id} from group {message.group_id}: {e}")
+            self._in_flight.discard(message)
+
+    async def _report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            logger.info(f"Ingestion: {stats['counters']} queue={stats['queue']} "
+                        f"total_p99={stats['latency']['total']['p99_ms']:.1f}ms")
+
+    async def _save_dedup(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.dedup.save)
+
+    async def start(self):
+        """Load sources and start the workers; attaches the NewMessage handler if a client is set"""
+        self._loop = asyncio.get_running_loop()
+        self._accepting = True
+        await self.load_sources()
+        if self.dedup is not None and self.dedup.state_path:
+            loaded = await asyncio.to_thread(self.dedup.load)
+            logger.info(f"Loaded {loaded} message fingerprint(s) from {self.dedup.state_path}")
+            if Config.DEDUP_SAVE_INTERVAL > 0:
+                self._tasks.append(asyncio.create_task(self._save_dedup(Config.DEDUP_SAVE_INTERVAL)))
+        reference_listener.subscribe(self.on_reference_change)
+        if self.spool is not None:
+            self._tasks.append(asyncio.create_task(self._drain_spool(Config.SPOOL_RETRY_INTERVAL)))
+        self._tasks += [asyncio.create_task(self._worker(), name=f"ingestion-worker-{n}")
+                        for n in range(self.workers)]
+        if Config.INGESTION_STATS_INTERVAL > 0:
+            self._tasks.append(asyncio.create_task(self._report(Config.INGESTION_STATS_INTERVAL)))
+        if self.client is not None:
+            self.client.add_event_handler(self.handle_event, events.NewMessage())
+
+    async def drain(self):
+        """Wait until every queued message has been picked up by a worker"""
+        while self.queue.qsize():
+            await asyncio.sleep(0.01)
+
+    async def stop(self, timeout: float = None):
+        """Stop taking messages, let the workers finish the queue, then shut down
+
+        Waits up to `timeout` (INGESTION_STOP_TIMEOUT) for queued and in-flight messages.
+        Whatever is still queued or was interrupted after that is spooled (a replay of a
+        write that did commit is skipped by its unique key), or without a spool dropped,
+        logged and forgotten by dedup so a redelivered copy still gets through.
+        """
+        self._accepting = False
+        if self.client is not None:
+            self.client.remove_event_handler(self.handle_event)
+        deadline = time.monotonic() + (Config.INGESTION_STOP_TIMEOUT if timeout is None else timeout)
+        while (self.queue.qsize() or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        if self._in_flight:
+            logger.warning(f"Cancelling {len(self._in_flight)} message(s) still being processed at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        leftover = list(self._in_flight) + [message for _, message in self.queue.pop_all()]
+        self._in_flight.clear()
+        if leftover and self.spool is not None:
+            # Straight to the spool; the next start drains it into the database
+            self.spooling = True
+            for message in leftover:
+                try:
+                    await self.process(message)
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    logger.error(f"Failed to spool message {message.message_id} from group {message.group_id}: {e}")
+            logger.warning(f"Spooled {len(leftover)} message(s) unfinished at shutdown")
+        elif leftover:
+            self.counters['dropped'] += len(leftover)
+            for message in leftover:
+                self._forget(message)
+            logger.error(f"Lost {len(leftover)} message(s) unfinished at shutdown")
+        if self.dedup is not None and self.dedup.state_path:
+            await asyncio.to_thread(self.dedup.save)
+        if self.spool is not None:
+            self.spool.close()
+
+    async def run(self):
+        """Connect the Telegram client and ingest until it disconnects"""
+        if self.client is None:
+            self.client = TelegramClient(Config.TELEGRAM_SESSION, int(Config.TELEGRAM_API_ID),
+                                         Config.TELEGRAM_API_HASH)
+        await self.client.start(phone=Config.TELEGRAM_PHONE)
+        await self.start()
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict:
+        return {
+            'counters': dict(self.counters),
+            'queue': self.queue.stats(),
+            'dropped_by_group': dict(self.queue.dropped_by_key),
+            'dedup': self.dedup.stats() if self.dedup is not None else None,
+            'spool': self._spool_stats() if self.spool is not None else None,
+            'latency': {stage: histogram.snapshot() for stage, histogram in self.latency.items()},
+        }
+
+    def _spool_stats(self) -> Dict:
+        drain = self.spool_drain
+        return {
+            **self.spool.stats(),
+            'spooling': self.spooling,
+            'drained_batches': drain['batches'],
+            'drain_failures': drain['failures'],
+            'replay_msgs_per_s': round(drain['messages'] / drain['seconds'], 1) if drain['seconds'] else None,
+        }
+
+
+async def run_ingestion(parser: SignalParser = None):
+    """Open the async database pool and run TelegramIngestion until the client disconnects"""
+    await async_db.connect()
+    try:
+        await TelegramIngestion(parser=parser).run()
+    finally:
+        await async_db.disconnect()
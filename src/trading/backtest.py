@@ -0,0 +1,355 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from src.config.index import Config
+from src.database.candle_store import Candles, CandleStore, read_csv
+from src.database.connection import db
+from src.database.queries_signals import SignalQueries
+
+logger = logging.getLogger(__name__)
+
+MAX_TAKE_PROFITS = 4
+# Per-signal outcome codes: the highest target reached before the stop, else the stop, else still open
+OUTCOMES = ('NO_DATA', 'OPEN', 'SL', 'TP1', 'TP2', 'TP3', 'TP4')
+NO_DATA, OPEN, SL, TP1 = 0, 1, 2, 3
+
+_NEVER = np.iinfo(np.int64).max
+
+
+class SignalBatch(NamedTuple):
+    """Signals as columns; take_profits is (n, 4) with NaN for targets a signal doesn't set"""
+    ids: np.ndarray
+    times: np.ndarray
+    sources: np.ndarray
+    symbols: np.ndarray
+    entries: np.ndarray
+    take_profits: np.ndarray
+    stop_losses: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, indices) -> 'SignalBatch':
+        return SignalBatch(*(column[indices] for column in self))
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple]) -> 'SignalBatch':
+        """Build from SignalQueries.get_signal_levels rows"""
+        if not rows:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, object), np.empty(0, object),
+                       np.empty(0), np.empty((0, MAX_TAKE_PROFITS)), np.empty(0))
+        ids, times, sources, symbols, *prices = zip(*rows)
+        # None -> NaN on the way into float64
+        levels = np.array(prices, dtype=np.float64)
+        return cls(np.array(ids, dtype=np.int64), np.array(times, dtype=np.int64),
+                   np.array(sources, dtype=object), np.array(symbols, dtype=object),
+                   levels[0], levels[1:1 + MAX_TAKE_PROFITS].T.copy(), levels[1 + MAX_TAKE_PROFITS])
+
+    @classmethod
+    def load(cls, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             source_uuid: Optional[str] = None) -> 'SignalBatch':
+        return cls.from_rows(SignalQueries.get_signal_levels(start, end, source_uuid))
+
+
+class CsvCandleSource:
+    """Candles from <directory>/<SYMBOL>_<interval>.csv
+
+    For kline exports not yet loaded into the CandleStore (see
+    candle_store.iter_csv for the format). Picklable, so each backtest worker
+    process loads only the pairs it evaluates.
+    """
+
+    def __init__(self, directory: str, interval: str = '1m'):
+        self.directory = directory
+        self.interval = interval
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}_{self.interval}.csv")
+
+    def load(self, symbol: str) -> Optional[Candles]:
+        path = self.path(symbol)
+        return read_csv(path) if os.path.exists(path) else None
+
+
+def _sparse_table(values: np.ndarray, levels: int, reduce) -> List[np.ndarray]:
+    """table[k][i] = reduce(values[i:i + 2**k]) for k < levels
+
+    Entries whose span runs past the end only cover what is left; searches never
+    use them, because a block is only examined when it fits inside the window.
+    """
+    table = [values]
+    for k in range(1, levels):
+        previous = table[-1]
+        half = 1 << (k - 1)
+        current = previous.copy()
+        reduce(previous[:-half], previous[half:], out=current[:-half])
+        table.append(current)
+    return table
+
+
+def _first_touch(highs: List[np.ndarray], lows: List[np.ndarray], start: np.ndarray, stop: np.ndarray,
+                 levels: np.ndarray, rising: np.ndarray) -> np.ndarray:
+    """Index of the first candle in [start, stop) whose high reaches `levels` (where `rising`)
+    or whose low does (elsewhere), or -1 if none does
+
+    Binary lifting over the sparse tables: from the largest block down, skip every
+    block that stays short of the level, so all signals are resolved together in
+    log2(window) vectorized steps. A NaN level is never reached.
+    """
+    last = len(highs[0]) - 1
+    position = start.copy()
+    for k in range(len(highs) - 1, -1, -1):
+        step = 1 << k
+        index = np.minimum(position, last)
+        short_of = np.where(rising, highs[k][index] < levels, lows[k][index] > levels)
+        position += np.where(short_of & (position + step <= stop), step, 0)
+    index = np.minimum(position, last)
+    touched = (position < stop) & np.where(rising, highs[0][index] >= levels, lows[0][index] <= levels)
+    return np.where(touched, position, -1)
+
+
+def evaluate(batch: SignalBatch, candles: Optional[Candles], horizon_ms: int,
+             same_bar: str = 'sl') -> Dict[str, np.ndarray]:
+    """Replay one pair's signals against its candles
+
+    A signal is taken at its entry price when posted; its window is the candles
+    opening from then until `horizon_ms` later. It is LONG when tp1 is above the
+    entry (or, without tp1, when the stop is below it). The position is split
+    equally across the targets it sets: each target touched before the stop closes
+    its share there, and the rest closes at the stop or, if the stop is never
+    touched, at the window's last close. Candles have no order inside them, so a
+    target and the stop touched by the same candle count as stop first unless
+    `same_bar` is 'tp'.
+
+    Returns per-signal arrays: outcome (an OUTCOMES code), side (1 LONG, -1 SHORT),
+    targets_hit, stopped, pnl_pct, first_hit_ms (signal to the first target or stop
+    touch) and exit_ms (signal to the stop, or to the last target once all are
+    reached). Missing values are NaN.
+    """
+    count = len(batch)
+    tp1 = batch.take_profits[:, 0]
+    long = np.where(np.isnan(tp1), batch.stop_losses < batch.entries, tp1 > batch.entries)
+    side = np.where(long, 1.0, -1.0)
+    if candles is None or not len(candles.times):
+        return _empty_result(count, side)
+
+    start = np.searchsorted(candles.times, batch.times, 'left')
+    stop = np.searchsorted(candles.times, batch.times + horizon_ms, 'left')
+    has_data = stop > start
+    levels = max(1, int((stop - start).max()).bit_length())
+    highs = _sparse_table(candles.high, levels, np.maximum)
+    lows = _sparse_table(candles.low, levels, np.minimum)
+
+    sl_index = _first_touch(highs, lows, start, stop, batch.stop_losses, ~long)
+    tp_index = np.column_stack([_first_touch(highs, lows, start, stop, batch.take_profits[:, n], long)
+                                for n in range(MAX_TAKE_PROFITS)])
+    sl_rank = np.where(sl_index < 0, _NEVER, sl_index)[:, None]
+    tp_hit = (tp_index >= 0) & ((tp_index < sl_rank) if same_bar == 'sl' else (tp_index <= sl_rank))
+    targets = (~np.isnan(batch.take_profits)).sum(axis=1)
+    targets_hit = tp_hit.sum(axis=1)
+    # Once every target has closed its share there is nothing left for the stop to close
+    stopped = (sl_index >= 0) & ((targets_hit < targets) | (targets == 0))
+
+    entries = batch.entries[:, None]
+    share = 1.0 / np.maximum(targets, 1)
+    with np.errstate(invalid='ignore'):
+        tp_returns = np.where(tp_hit, (batch.take_profits - entries) / entries * side[:, None], 0.0)
+    last_close = candles.close[np.maximum(stop - 1, 0)]
+    exit_price = np.where(stopped, batch.stop_losses, last_close)
+    remaining = 1.0 - np.where(targets > 0, targets_hit * share, 0.0)
+    pnl = tp_returns.sum(axis=1) * share + remaining * (exit_price - batch.entries) / batch.entries * side
+
+    first_index = np.minimum(np.where(tp_hit, tp_index, _NEVER).min(axis=1), np.where(stopped, sl_index, _NEVER))
+    last_target = np.where(tp_hit, tp_index, -1).max(axis=1)
+    exit_index = np.where(stopped, sl_index, np.where((targets > 0) & (targets_hit == targets), last_target, -1))
+
+    outcome = np.where(targets_hit > 0, TP1 - 1 + targets_hit, np.where(stopped, SL, OPEN))
+    outcome[~has_data] = NO_DATA
+    pnl[~has_data] = np.nan
+    return {
+        'outcome': outcome.astype(np.int8),
+        'side': side,
+        'targets_hit': targets_hit,
+        'stopped': stopped,
+        'pnl_pct': pnl * 100,
+        'first_hit_ms': _elapsed(candles.times, first_index, batch.times),
+        'exit_ms': _elapsed(candles.times, exit_index, batch.times),
+    }
+
+
+def _elapsed(times: np.ndarray, index: np.ndarray, since: np.ndarray) -> np.ndarray:
+    """Milliseconds from `since` to the open of candle `index`; NaN where the index is -1 or _NEVER"""
+    found = (index >= 0) & (index < len(times))
+    opened = times[np.where(found, index, 0)]
+    return np.where(found, (opened - since).astype(np.float64), np.nan)
+
+
+def _empty_result(count: int, side: np.ndarray) -> Dict[str, np.ndarray]:
+    return {
+        'outcome': np.full(count, NO_DATA, dtype=np.int8),
+        'side': side,
+        'targets_hit': np.zeros(count, dtype=np.int64),
+        'stopped': np.zeros(count, dtype=bool),
+        'pnl_pct': np.full(count, np.nan),
+        'first_hit_ms': np.full(count, np.nan),
+        'exit_ms': np.full(count, np.nan),
+    }
+
+
+def _evaluate_symbol(symbol: str, batch: SignalBatch, candles_source, horizon_ms: int,
+                     same_bar: str) -> Dict[str, np.ndarray]:
+    """Worker entry point: load one pair's candles and evaluate its signals"""
+    return evaluate(batch, candles_source.load(symbol), horizon_ms, same_bar)
+
+
+class BacktestResult:
+    """Per-signal outcomes of a backtest, as columns aligned with the signal batch"""
+
+    def __init__(self, batch: SignalBatch, columns: Dict[str, np.ndarray]):
+        self.batch = batch
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.batch)
+
+    def by_source(self) -> Dict[str, Dict]:
+        """Hit rates, P&L and timing per source over the signals that had candles"""
+        sources, codes = np.unique(self.batch.sources.astype(str), return_inverse=True)
+        outcome = self.columns['outcome']
+        evaluated = outcome != NO_DATA
+        pnl = np.nan_to_num(self.columns['pnl_pct'])
+
+        def per_source(mask, weights=None):
+            return np.bincount(codes[mask], weights=None if weights is None else weights[mask],
+                               minlength=len(sources))
+
+        signals = np.bincount(codes, minlength=len(sources))
+        counted = per_source(evaluated)
+        wins = per_source(evaluated & (pnl > 0))
+        stopped = per_source(evaluated & self.columns['stopped'])
+        open_ = per_source(outcome == OPEN)
+        pnl_total = per_source(evaluated, pnl)
+        reached = [per_source(evaluated & (self.columns['targets_hit'] >= n)) for n in range(1, MAX_TAKE_PROFITS + 1)]
+        # Medians don't reduce with bincount: sort by (source, value) and read each group's middle
+        first_hit = self.columns['first_hit_ms']
+        timed = evaluated & ~np.isnan(first_hit)
+        order = np.lexsort((first_hit[timed], codes[timed]))
+        timed_codes, timed_values = codes[timed][order], first_hit[timed][order]
+        bounds = np.searchsorted(timed_codes, np.arange(len(sources) + 1))
+
+        def rate(part):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(counted > 0, part / counted, np.nan)
+
+        win_rate, sl_rate, open_rate, avg_pnl = rate(wins), rate(stopped), rate(open_), rate(pnl_total)
+        tp_rates = [rate(part) for part in reached]
+        summary = {}
+        for code, source in enumerate(sources.tolist()):
+            low, high = bounds[code], bounds[code + 1]
+            median = float(np.median(timed_values[low:high])) / 60000 if high > low else None
+            summary[source] = {
+                'signals': int(signals[code]),
+                'evaluated': int(counted[code]),
+                'win_rate': _float(win_rate[code]),
+                'avg_pnl_pct': _float(avg_pnl[code]),
+                'total_pnl_pct': float(pnl_total[code]),
+                'sl_rate': _float(sl_rate[code]),
+                'open_rate': _float(open_rate[code]),
+                **{f"tp{n + 1}_rate": _float(tp_rates[n][code]) for n in range(MAX_TAKE_PROFITS)},
+                'median_first_hit_min': median,
+            }
+        return summary
+
+    def to_records(self) -> List[Dict]:
+        """One JSON-ready dict per signal (NaN becomes None)"""
+        columns = {
+            'signal_id': self.batch.ids.tolist(),
+            'source_uuid': self.batch.sources.tolist(),
+            'symbol': self.batch.symbols.tolist(),
+            'side': np.where(self.columns['side'] < 0, 'SHORT', 'LONG').tolist(),
+            'outcome': [OUTCOMES[code] for code in self.columns['outcome'].tolist()],
+            'targets_hit': self.columns['targets_hit'].tolist(),
+            'stopped': self.columns['stopped'].tolist(),
+        }
+        for name in ('pnl_pct', 'first_hit_ms', 'exit_ms'):
+            values = self.columns[name]
+            columns[name] = np.where(np.isnan(values), None, values).tolist()
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def _float(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def run_backtest(batch: SignalBatch, candles_source=None, horizon_hours: Optional[float] = None,
+                 workers: Optional[int] = None, same_bar: str = 'sl') -> BacktestResult:
+    """Evaluate every signal against its pair's candles, one process per pair
+
+    `candles_source` is any picklable object with load(symbol) -> Optional[Candles]
+    (a read-only CandleStore at BACKTEST_INTERVAL by default). Pairs are independent,
+    so they are spread across `workers` processes (BACKTEST_WORKERS); with one
+    worker everything runs in this process.
+    """
+    if same_bar not in ('sl', 'tp'):
+        raise ValueError(f"same_bar must be 'sl' or 'tp', not {same_bar!r}")
+    if candles_source is None:
+        candles_source = CandleStore(Config.CANDLE_STORE_DIR, Config.BACKTEST_INTERVAL, readonly=True)
+    horizon_ms = int((horizon_hours or Config.BACKTEST_HORIZON_HOURS) * 3600 * 1000)
+    workers = workers or Config.BACKTEST_WORKERS or os.cpu_count() or 1
+
+    symbols, codes = np.unique(batch.symbols.astype(str), return_inverse=True)
+    groups = np.split(np.argsort(codes, kind='stable'), np.cumsum(np.bincount(codes, minlength=len(symbols)))[:-1])
+    tasks = [(symbol, batch.take(indices), candles_source, horizon_ms, same_bar)
+             for symbol, indices in zip(symbols, groups)]
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_evaluate_symbol(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [pool.submit(_evaluate_symbol, *task) for task in tasks]
+            results = [future.result() for future in futures]
+
+    columns = _empty_result(len(batch), np.ones(len(batch)))
+    for indices, result in zip(groups, results):
+        for name, values in result.items():
+            columns[name][indices] = values
+    missing = [symbol for symbol, result in zip(symbols, results) if (result['outcome'] == NO_DATA).all()]
+    if missing:
+        logger.warning(f"No candles covering the signals of {len(missing)} pair(s): {', '.join(missing[:10])}")
+    return BacktestResult(batch, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the stored signals against historical candles")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="first signal creation_time")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="creation_time bound (exclusive)")
+    parser.add_argument('--source', help="only this source_uuid")
+    parser.add_argument('--candles-dir', default=Config.CANDLE_STORE_DIR)
+    parser.add_argument('--csv', action='store_true',
+                        help="read <candles-dir>/<SYMBOL>_<interval>.csv files instead of the candle store")
+    parser.add_argument('--interval', default=Config.BACKTEST_INTERVAL)
+    parser.add_argument('--horizon-hours', type=float, default=Config.BACKTEST_HORIZON_HOURS)
+    parser.add_argument('--workers', type=int, default=Config.BACKTEST_WORKERS)
+    parser.add_argument('--same-bar', choices=['sl', 'tp'], default='sl',
+                        help="which counts first when one candle touches both a target and the stop")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db.connect()
+    try:
+        batch = SignalBatch.load(args.start, args.end, args.source)
+    finally:
+        db.disconnect()
+    started = time.perf_counter()
+    candles_source = (CsvCandleSource(args.candles_dir, args.interval) if args.csv
+                      else CandleStore(args.candles_dir, args.interval, readonly=True))
+    result = run_backtest(batch, candles_source, args.horizon_hours, args.workers, args.same_bar)
+    logger.info(f"Backtested {len(result)} signals in {time.perf_counter() - started:.2f}s")
+    for source, stats in result.by_source().items():
+        print(f"{source}  " + '  '.join(f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                                        for name, value in stats.items()))
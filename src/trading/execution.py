@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from src.config.index import Config
+from src.database.event_buffer import ExchangeEventBuffer
+from src.database.queries_signals import ExchangeTradingPairQueries
+from src.exchanges.base import BaseExchange
+from src.exchanges.registry import EXCHANGE_CLASSES, get_exchange
+from src.exchanges.ticker_cache import normalize_symbol
+from src.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Venue spellings of base assets (Kraken's XBT and XDG), for matching signal symbols to pair names
+BASE_ASSET_ALIASES = {'XBT': 'BTC', 'XDG': 'DOGE'}
+
+
+def _pair_key(name: str) -> str:
+    symbol = normalize_symbol(name)
+    for alias, asset in BASE_ASSET_ALIASES.items():
+        if symbol.startswith(alias):
+            return asset + symbol[len(alias):]
+    return symbol
+
+
+class OrderRequest(NamedTuple):
+    """One order to place for a signal"""
+    exchange: str
+    symbol: str
+    position_type: str
+    quantity: object
+    price: object = None
+
+
+class OrderResult:
+    """Outcome of one order of a fan-out
+
+    `status` moves from PENDING to exactly one of PLACED, REJECTED or TIMEOUT;
+    a PLACED order may later become CANCELLED. Times are time.monotonic() values.
+    """
+
+    __slots__ = ('request', 'client_order_id', 'status', 'order', 'error',
+                 'received_at', 'submitted_at', 'acked_at', '_lock')
+
+    def __init__(self, request: OrderRequest, client_order_id: str, received_at: float):
+        self.request = request
+        self.client_order_id = client_order_id
+        self.status = 'PENDING'
+        self.order: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.received_at = received_at
+        self.submitted_at = None
+        self.acked_at = None
+        self._lock = threading.Lock()
+
+    def settle(self, status: str) -> bool:
+        """Move out of PENDING; False if the order was already settled by someone else"""
+        with self._lock:
+            if self.status != 'PENDING':
+                return False
+            self.status = status
+            return True
+
+    @property
+    def exchange(self) -> str:
+        return self.request.exchange
+
+    @property
+    def order_id(self) -> Optional[str]:
+        return self.order['order_id'] if self.order else None
+
+    def latency_ms(self) -> Dict[str, Optional[float]]:
+        """signal_to_submit (our queueing), submit_to_ack (the exchange round trip) and signal_to_ack"""
+        def span(start, end):
+            return None if start is None or end is None else round((end - start) * 1000, 3)
+        return {
+            'signal_to_submit_ms': span(self.received_at, self.submitted_at),
+            'submit_to_ack_ms': span(self.submitted_at, self.acked_at),
+            'signal_to_ack_ms': span(self.received_at, self.acked_at),
+        }
+
+    def __repr__(self):
+        return (f"OrderResult({self.exchange} {self.request.symbol} {self.status} "
+                f"order_id={self.order_id} error={self.error})")
+
+
+class ExecutionEngine:
+    """Places the orders for one signal on every eligible exchange at once
+
+    Orders run concurrently on a thread pool over the shared exchange clients, so
+    a signal costs the slowest exchange's round trip rather than the sum. Each
+    exchange has its own timeout (<NAME>_ORDER_TIMEOUT, default ORDER_TIMEOUT):
+    an order still queued at its deadline is cancelled before it is sent, and one
+    whose request is already in flight is marked TIMEOUT and cancelled on the
+    exchange if its ack arrives later. With `all_or_none`, placed orders are
+    cancelled when any other order of the signal failed.
+
+    Every outcome goes to exchange_events through an ExchangeEventBuffer, so the
+    order path never waits on the database. Events carry the signal ID, client
+    order ID and the latency breakdown; signal-to-ack latency is also kept per
+    exchange in `self.latency`.
+    """
+
+    def __init__(self, events: ExchangeEventBuffer = None, max_workers: int = None,
+                 timeouts: Dict[str, float] = None,
+                 exchange_factory: Callable[[str], BaseExchange] = get_exchange):
+        self._owns_events = events is None
+        self.events = events or ExchangeEventBuffer()
+        self.timeouts = {name: float(getattr(Config, f"{name}_ORDER_TIMEOUT", Config.ORDER_TIMEOUT))
+                         for name in EXCHANGE_CLASSES}
+        self.timeouts.update({name.upper(): timeout for name, timeout in (timeouts or {}).items()})
+        self.exchange_factory = exchange_factory
+        self._pool = ThreadPoolExecutor(max_workers or Config.ORDER_WORKERS, thread_name_prefix='order')
+        self.latency: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in EXCHANGE_CLASSES}
+        self.counters = {'signals': 0, 'placed': 0, 'rejected': 0, 'timeouts': 0, 'cancelled': 0,
+                         'late_acks': 0}
+        self._counter_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def timeout_for(self, exchange: str) -> float:
+        return self.timeouts.get(exchange.upper(), Config.ORDER_TIMEOUT)
+
+    def eligible_exchanges(self, symbol: str) -> Dict[str, str]:
+        """{exchange: pair name} of the exchanges listing the pair in exchange_trading_pairs that we have a client for"""
+        key = _pair_key(symbol)
+        eligible = {}
+        for pair in ExchangeTradingPairQueries.get_all_pairs():
+            exchange = pair['exchange_name'].upper()
+            if exchange in EXCHANGE_CLASSES and _pair_key(pair['pair_name']) == key:
+                eligible.setdefault(exchange, pair['pair_name'])
+        return dict(sorted(eligible.items()))
+
+    def plan(self, symbol: str, position_type: str, quantity, price=None,
+             exchanges: Iterable[str] = None) -> List[OrderRequest]:
+        """The same order on every eligible exchange (or on `exchanges`), each under that venue's pair name
+
+        An exchange in `exchanges` without a matching pair gets the normalized signal symbol.
+        """
+        pairs = self.eligible_exchanges(symbol)
+        if exchanges is not None:
+            pairs = {name.upper(): pairs.get(name.upper(), normalize_symbol(symbol)) for name in exchanges}
+        return [OrderRequest(name, pair_name, position_type.upper(), quantity, price)
+                for name, pair_name in pairs.items()]
+
+    def execute_signal(self, signal_id: int, symbol: str, position_type: str, quantity, price=None,
+                       exchanges: Iterable[str] = None, received_at: float = None,
+                       all_or_none: bool = False) -> List[OrderResult]:
+        orders = self.plan(symbol, position_type, quantity, price, exchanges)
+        if not orders:
+            logger.warning(f"Signal {signal_id}: no eligible exchange for {symbol}")
+        return self.execute(signal_id, orders, received_at, all_or_none)
+
+    def execute(self, signal_id: int, orders: List[OrderRequest], received_at: float = None,
+                all_or_none: bool = False) -> List[OrderResult]:
+        """Place `orders` concurrently and wait for each until its exchange's timeout
+
+        `received_at` is the time.monotonic() at which the signal arrived (now by
+        default), the start of the signal-to-ack latency.
+        """
+        received_at = time.monotonic() if received_at is None else received_at
+        started = time.monotonic()
+        self._count('signals')
+        tag = uuid.uuid4().hex[:8]
+        results = [OrderResult(order, f"s{signal_id}-{tag}-{n}", received_at) for n, order in enumerate(orders)]
+        futures = [(result, self._pool.submit(self._place, signal_id, result)) for result in results]
+
+        # Deadlines run from when the fan-out started, so the waits overlap
+        for result, future in sorted(futures, key=lambda item: self.timeout_for(item[0].exchange)):
+            remaining = started + self.timeout_for(result.exchange) - time.monotonic()
+            if not wait([future], timeout=max(0.0, remaining)).done:
+                future.cancel()
+                if result.settle('TIMEOUT'):
+                    self._count('timeouts')
+                    result.error = f"no ack within {self.timeout_for(result.exchange):.1f}s"
+                    self._log(signal_id, result, 'ORDER_TIMEOUT')
+                    logger.warning(f"Signal {signal_id}: {result.exchange} order timed out")
+
+        if all_or_none and any(result.status != 'PLACED' for result in results):
+            placed = [result for result in results if result.status == 'PLACED']
+            for future in [self._pool.submit(self._cancel, signal_id, result, 'all_or_none') for result in placed]:
+                future.result()
+        return results
+
+    def _place(self, signal_id: int, result: OrderResult):
+        request = result.request
+        result.submitted_at = time.monotonic()
+        try:
+            client = self.exchange_factory(request.exchange)
+            order = client.open_position(request.symbol, request.position_type, request.quantity,
+                                         request.price, client_order_id=result.client_order_id)
+        except Exception as e:
+            result.acked_at = time.monotonic()
+            if result.settle('REJECTED'):
+                result.error = str(e)
+                self._count('rejected')
+                self._log(signal_id, result, 'ORDER_REJECTED')
+                logger.error(f"Signal {signal_id}: {request.exchange} order failed: {e}")
+            return
+        result.acked_at = time.monotonic()
+        result.order = order
+        if result.settle('PLACED'):
+            self._count('placed')
+            self.latency.setdefault(request.exchange, LatencyHistogram()).record(
+                result.acked_at - result.received_at)
+            self._log(signal_id, result, 'ORDER_PLACED')
+        else:
+            # Acked after we gave up on it: take it back off the book
+            self._count('late_acks')
+            self._log(signal_id, result, 'ORDER_LATE_ACK')
+            self._cancel(signal_id, result, 'late_ack')
+
+    def _cancel(self, signal_id: int, result: OrderResult, reason: str):
+        request = result.request
+        try:
+            self.exchange_factory(request.exchange).cancel_order(request.symbol, result.order_id)
+        except Exception as e:
+            logger.error(f"Signal {signal_id}: could not cancel {request.exchange} order {result.order_id} "
+                         f"({reason}): {e}")
+            self._log(signal_id, result, 'ORDER_CANCEL_FAILED', reason=reason, cancel_error=str(e))
+            return
+        result.status = 'CANCELLED'
+        self._count('cancelled')
+        self._log(signal_id, result, 'ORDER_CANCELLED', reason=reason)
+
+    def _log(self, signal_id: int, result: OrderResult, event_type: str, **extra):
+        request = result.request
+        data = {
+            'signal_id': signal_id,
+            'client_order_id': result.client_order_id,
+            'order_id': result.order_id,
+            'symbol': request.symbol,
+            'position_type': request.position_type,
+            'quantity': str(request.quantity),
+            'price': None if request.price is None else str(request.price),
+            'status': result.status,
+            'error': result.error,
+        }
+        data.update(result.latency_ms())
+        data.update(extra)
+        try:
+            self.events.log(None, event_type, data, request.exchange)
+        except RuntimeError as e:
+            logger.error(f"Signal {signal_id}: could not log {event_type}: {e}")
+
+    def stats(self) -> Dict:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            'signal_to_ack': {name: histogram.snapshot() for name, histogram in sorted(self.latency.items())},
+            'events': self.events.stats(),
+        }
+
+    def close(self):
+        """Wait for in-flight orders, then write the remaining events if the buffer is ours"""
+        self._pool.shutdown(wait=True)
+        if self._owns_events:
+            self.events.close()
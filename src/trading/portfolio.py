@@ -0,0 +1,157 @@
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.database.queries import PositionQueries
+
+logger = logging.getLogger(__name__)
+
+
+class PositionBook:
+    """Column arrays of every monitored position, repriced and valued in one vectorized pass
+
+    Each attribute is a NumPy array with one entry per position (`symbols` maps the
+    `symbol_codes` back to names). Prices are float64: exact enough to value and rank
+    positions, while the database keeps its DECIMAL(18, 8) rounding. A position
+    without a stop or a pending take profit has NaN there.
+
+    P&L follows the SQL in `apply_price_snapshot`: (price - entry) * quantity for
+    LONG, negated for SHORT, with `quantity` the full position size. Exposure is the
+    signed notional (price * quantity * side) and margin the notional divided by
+    leverage.
+    """
+
+    def __init__(self, rows: Iterable[Dict] = ()):
+        rows = list(rows)
+        self.symbols: List[str] = sorted({row['symbol'] for row in rows})
+        self._symbol_index = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.position_ids = np.array([row['position_id'] for row in rows], dtype=np.int64)
+        self.trade_ids = np.array([row['trade_id'] for row in rows], dtype=np.int64)
+        self.symbol_codes = np.array([self._symbol_index[row['symbol']] for row in rows], dtype=np.int64)
+        self.sides = np.array([-1.0 if row['position_type'] == 'SHORT' else 1.0 for row in rows])
+        self.entry_prices = self._floats(row['entry_price'] for row in rows)
+        self.quantities = self._floats(row['quantity'] for row in rows)
+        self.leverages = self._floats(row.get('leverage') or 1 for row in rows)
+        self.current_prices = self._floats(row.get('current_price') for row in rows)
+        self.stop_losses = self._floats(row.get('stop_loss') for row in rows)
+        # The pending take profit closest to entry: the next one the price would reach
+        self.next_take_profits = self._floats(
+            self._next_take_profit(row.get('tp_prices') or (), row['position_type']) for row in rows)
+        # Positions whose price changed since the last `db_updates`
+        self._dirty = np.zeros(len(rows), dtype=bool)
+
+    @staticmethod
+    def _floats(values) -> np.ndarray:
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+    @staticmethod
+    def _next_take_profit(prices, position_type):
+        if not prices:
+            return None
+        return max(prices) if position_type == 'SHORT' else min(prices)
+
+    @classmethod
+    def load(cls) -> 'PositionBook':
+        """Build the book from PositionQueries.get_monitoring_details"""
+        return cls(PositionQueries.get_monitoring_details())
+
+    def __len__(self):
+        return len(self.position_ids)
+
+    def set_prices(self, prices: Dict[str, float]) -> int:
+        """Apply a {symbol: price} snapshot to every position of those symbols; returns how many moved"""
+        by_code = np.full(len(self.symbols), np.nan)
+        for symbol, price in prices.items():
+            code = self._symbol_index.get(symbol)
+            if code is not None:
+                by_code[code] = float(price)
+        new_prices = by_code[self.symbol_codes]
+        moved = ~np.isnan(new_prices) & (new_prices != self.current_prices)
+        self.current_prices[moved] = new_prices[moved]
+        self._dirty |= moved
+        return int(moved.sum())
+
+    def compute(self) -> Dict[str, np.ndarray]:
+        """Value the whole book at the current prices
+
+        Returns per-position arrays: unrealized_pnl, exposure, margin, roe (P&L over
+        margin), and tp_distance / sl_distance as the fraction the price still has to
+        move toward the next take profit / the stop (negative once crossed).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price = self.current_prices
+            notional = price * self.quantities
+            unrealized_pnl = (price - self.entry_prices) * self.quantities * self.sides
+            margin = np.abs(notional) / self.leverages
+            return {
+                'unrealized_pnl': unrealized_pnl,
+                'exposure': notional * self.sides,
+                'margin': margin,
+                'roe': unrealized_pnl / margin,
+                'tp_distance': (self.next_take_profits - price) / price * self.sides,
+                'sl_distance': (price - self.stop_losses) / price * self.sides,
+            }
+
+    def summary(self, values: Dict[str, np.ndarray] = None) -> Dict:
+        """Book totals and per-symbol P&L and net exposure"""
+        if values is None:
+            values = self.compute()
+        pnl = np.nan_to_num(values['unrealized_pnl'])
+        exposure = np.nan_to_num(values['exposure'])
+        pnl_by_symbol = np.bincount(self.symbol_codes, weights=pnl, minlength=len(self.symbols))
+        exposure_by_symbol = np.bincount(self.symbol_codes, weights=exposure, minlength=len(self.symbols))
+        return {
+            'positions': len(self),
+            'unrealized_pnl': float(pnl.sum()),
+            'gross_exposure': float(np.abs(exposure).sum()),
+            'net_exposure': float(exposure.sum()),
+            'margin': float(np.nansum(values['margin'])),
+            'by_symbol': {
+                symbol: {'unrealized_pnl': float(pnl_by_symbol[code]),
+                         'net_exposure': float(exposure_by_symbol[code])}
+                for code, symbol in enumerate(self.symbols)
+            },
+        }
+
+    def db_updates(self, values: Dict[str, np.ndarray] = None,
+                   changed_only: bool = True) -> List[Tuple[int, float, float]]:
+        """(position_id, current_price, profit_loss) tuples for PositionQueries.update_position_prices
+
+        By default only positions repriced since the previous call are included.
+        """
+        if values is None:
+            values = self.compute()
+        selected = self._dirty.copy() if changed_only else np.ones(len(self), dtype=bool)
+        selected &= ~np.isnan(self.current_prices)
+        self._dirty[selected] = False
+        return list(zip(self.position_ids[selected].tolist(), self.current_prices[selected].tolist(),
+                        values['unrealized_pnl'][selected].round(8).tolist()))
+
+    def flush(self, values: Dict[str, np.ndarray] = None) -> int:
+        """Write repriced positions' price and P&L in one statement"""
+        return PositionQueries.update_position_prices(self.db_updates(values))
+
+    def to_records(self, values: Dict[str, np.ndarray] = None) -> List[Dict]:
+        """One JSON-ready dict per position (NaN becomes None)"""
+        if values is None:
+            values = self.compute()
+        columns = {
+            'position_id': self.position_ids.tolist(),
+            'trade_id': self.trade_ids.tolist(),
+            'symbol': [self.symbols[code] for code in self.symbol_codes.tolist()],
+            'position_type': np.where(self.sides < 0, 'SHORT', 'LONG').tolist(),
+            'entry_price': _nullable(self.entry_prices),
+            'quantity': _nullable(self.quantities),
+            'leverage': _nullable(self.leverages),
+            'current_price': _nullable(self.current_prices),
+            'stop_loss': _nullable(self.stop_losses),
+            'next_take_profit': _nullable(self.next_take_profits),
+        }
+        columns.update((name, _nullable(array)) for name, array in values.items())
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _nullable(array: np.ndarray) -> List[Optional[float]]:
+    """Array to a list of floats with NaN and infinities as None"""
+    return [value if math.isfinite(value) else None for value in array.tolist()]
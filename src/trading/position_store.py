@@ -0,0 +1,459 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import orjson
+from src.config.index import Config
+from src.database.connection import db
+from src.database.queries import PositionQueries
+
+logger = logging.getLogger(__name__)
+
+
+class PositionJournal:
+    """Append-only change log in numbered segment files (<path>.00000001, ...)
+
+    Records are JSON lines. `append` writes through Python's buffer; `sync`
+    (or `append(..., sync=True)`) flushes and fsyncs. `rotate` starts a new
+    segment so the finished ones can be `discard`ed once their changes are in
+    the database. On replay, a torn last line (a crash mid-write) ends the
+    segment.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.segment = None
+        self._file = None
+        self._written = 0
+        self.appended = 0
+        self.syncs = 0
+
+    def _segments(self) -> List[int]:
+        directory, prefix = os.path.split(self.path)
+        numbers = []
+        for name in os.listdir(directory):
+            suffix = name[len(prefix) + 1:]
+            if name.startswith(prefix + '.') and suffix.isdigit():
+                numbers.append(int(suffix))
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return f"{self.path}.{number:08d}"
+
+    def open(self):
+        """Start a new segment after any existing ones (which `replay` then reads)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        existing = self._segments()
+        self._open_segment((existing[-1] if existing else 0) + 1)
+        return self
+
+    def _open_segment(self, number: int):
+        self.segment = number
+        self._file = open(self._segment_path(number), 'ab')
+        self._written = 0
+
+    def append(self, record: Dict, sync: bool = False):
+        self._file.write(orjson.dumps(record) + b'\n')
+        self._written += 1
+        self.appended += 1
+        if sync:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+
+    def rotate(self) -> int:
+        """Close the current segment (if it has records) and start the next; returns the last finished one"""
+        if not self._written:
+            return self.segment - 1
+        self.sync()
+        self._file.close()
+        finished = self.segment
+        self._open_segment(finished + 1)
+        return finished
+
+    def discard(self, through: int):
+        """Delete the finished segments up to and including `through`"""
+        for number in self._segments():
+            if number <= through and number != self.segment:
+                os.remove(self._segment_path(number))
+
+    def replay(self) -> Iterator[Dict]:
+        """Records of the segments written before `open`, oldest first"""
+        for number in self._segments():
+            if self.segment is not None and number >= self.segment:
+                break
+            with open(self._segment_path(number), 'rb') as f:
+                for line_number, line in enumerate(f, start=1):
+                    try:
+                        yield orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        logger.warning(f"Position journal segment {number} is torn at line {line_number}; "
+                                       f"ignoring the rest of it")
+                        break
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class PositionState:
+    __slots__ = ('position_id', 'trade_id', 'exchange', 'current_price', 'current_profit_loss', 'monitoring')
+
+    def __init__(self, position_id, trade_id, exchange, current_price, current_profit_loss, monitoring):
+        self.position_id = position_id
+        self.trade_id = trade_id
+        self.exchange = exchange
+        self.current_price = current_price
+        self.current_profit_loss = current_profit_loss
+        self.monitoring = monitoring
+
+
+class TradeState:
+    __slots__ = ('trade_id', 'symbol', 'position_type', 'entry_price', 'quantity', 'status',
+                 'exit_price', 'exit_time', 'profit_loss', 'stop_loss')
+
+    def __init__(self, trade_id, symbol, position_type, entry_price, quantity, status,
+                 exit_price, exit_time, profit_loss, stop_loss):
+        self.trade_id = trade_id
+        self.symbol = symbol
+        self.position_type = position_type
+        self.entry_price = entry_price
+        self.quantity = quantity
+        self.status = status
+        self.exit_price = exit_price
+        self.exit_time = exit_time
+        self.profit_loss = profit_loss
+        self.stop_loss = stop_loss
+
+    def pnl(self, price: float) -> float:
+        sign = -1.0 if self.position_type == 'SHORT' else 1.0
+        return (price - self.entry_price) * self.quantity * sign
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class PositionStore:
+    """Write-behind store for the live state of positions and their trades
+
+    Price updates, stop loss moves and closes are applied in memory and appended
+    to a PositionJournal, so the monitoring loop never waits on PostgreSQL. A
+    background thread fsyncs the journal every `sync_interval` seconds and writes
+    every changed row to positions/trades in one coalesced transaction every
+    `flush_interval` seconds, then discards the journal segments that flush
+    covered. Closes and stop loss changes are fsynced before the call returns,
+    so fills are never lost; price updates can be rebuilt from the market and
+    share the periodic fsync.
+
+    After a crash, `recover` loads the last flushed state from the database,
+    replays the remaining journal and flushes the result. Journal records carry
+    absolute values, so replaying changes that did reach the database is
+    harmless.
+
+    Positions opened after `recover` are picked up by `load_new` every
+    `reload_interval` seconds; until then `position_ids` does not list them and
+    they have to be priced in the database directly.
+
+    A flush only writes the columns the store changes and skips rows that were
+    closed in the database meanwhile (see PositionQueries.write_states), so a
+    close made outside the store is not undone by a stale in-memory copy.
+    """
+
+    def __init__(self, journal_path: str = None, flush_interval: float = None, sync_interval: float = None,
+                 reload_interval: float = None):
+        self.journal = PositionJournal(journal_path or Config.POSITION_JOURNAL_PATH)
+        self.flush_interval = Config.POSITION_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.reload_interval = Config.POSITION_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self.sync_interval = Config.POSITION_JOURNAL_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._positions: Dict[int, PositionState] = {}
+        self._trades: Dict[int, TradeState] = {}
+        # (exchange, symbol) -> IDs of the monitored positions on that market
+        self._by_market: Dict[Tuple[str, str], List[int]] = {}
+        self._dirty_positions = set()
+        self._dirty_trades = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.recovered = False
+        self.changes = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.last_flush = None
+
+    # ---- loading ----
+
+    def track(self, row: Dict):
+        """Add one row of PositionQueries.get_position_states (e.g. right after creating the position)"""
+        with self._lock:
+            trade = self._trades.get(row['trade_id'])
+            if trade is None:
+                trade = self._trades[row['trade_id']] = TradeState(
+                    row['trade_id'], row['symbol'], row['position_type'], float(row['entry_price']),
+                    float(row['quantity']), row['status'], _float(row['exit_price']), row['exit_time'],
+                    _float(row['profit_loss']), _float(row['stop_loss']))
+            position = PositionState(row['position_id'], row['trade_id'], row['exchange'],
+                                     _float(row['current_price']), _float(row['current_profit_loss']),
+                                     bool(row['monitoring']))
+            self._positions[position.position_id] = position
+            if position.monitoring:
+                self._by_market.setdefault(self._market(position), []).append(position.position_id)
+
+    def load_new(self) -> int:
+        """Track monitored positions created since the store loaded; returns how many were added"""
+        rows = PositionQueries.get_position_states()
+        added = 0
+        with self._lock:
+            for row in rows:
+                if row['monitoring'] and row['position_id'] not in self._positions:
+                    self.track(row)
+                    added += 1
+        if added:
+            logger.info(f"Position store picked up {added} new position(s)")
+        return added
+
+    def recover(self) -> int:
+        """Load the flushed state, replay the journal on top of it and flush; returns records replayed"""
+        with self._lock:
+            self.journal.open()
+            self._positions.clear()
+            self._trades.clear()
+            self._by_market.clear()
+            for row in PositionQueries.get_position_states():
+                self.track(row)
+            replayed = 0
+            for record in self.journal.replay():
+                self._apply(record)
+                replayed += 1
+            self.recovered = True
+        if replayed:
+            logger.info(f"Position store replayed {replayed} journal records")
+        self.flush()
+        return replayed
+
+    # ---- changes ----
+
+    def _market(self, position: PositionState) -> Tuple[str, str]:
+        # Market data names exchanges in upper case
+        return (position.exchange or '').upper(), self._trades[position.trade_id].symbol
+
+    def _apply(self, record: Dict):
+        op = record['op']
+        if op == 'prices':
+            prices = record['prices']
+            if isinstance(prices, dict):
+                # Journals written before prices were keyed by exchange: {symbol: price} for every venue
+                prices = [(exchange, symbol, prices[symbol]) for exchange, symbol in list(self._by_market)
+                          if symbol in prices]
+            for exchange, symbol, price in prices:
+                self._reprice((exchange, symbol), price)
+        elif op == 'price':
+            position = self._positions.get(record['position_id'])
+            if position is not None and position.monitoring:
+                self._set_price(position, record['price'])
+        elif op == 'close_position':
+            position = self._positions.get(record['position_id'])
+            if position is not None and position.monitoring:
+                position.monitoring = False
+                ids = self._by_market.get(self._market(position))
+                if ids and position.position_id in ids:
+                    ids.remove(position.position_id)
+                self._dirty_positions.add(position.position_id)
+        elif op == 'stop_loss':
+            trade = self._trades.get(record['trade_id'])
+            if trade is not None:
+                trade.stop_loss = record['stop_loss']
+                self._dirty_trades.add(trade.trade_id)
+        elif op == 'close_trade':
+            trade = self._trades.get(record['trade_id'])
+            if trade is not None:
+                trade.status = 'CLOSED'
+                trade.exit_price = record['exit_price']
+                trade.exit_time = datetime.fromisoformat(record['exit_time'])
+                trade.profit_loss = trade.pnl(record['exit_price'])
+                self._dirty_trades.add(trade.trade_id)
+
+    def _set_price(self, position: PositionState, price: float):
+        position.current_price = price
+        position.current_profit_loss = self._trades[position.trade_id].pnl(price)
+        self._dirty_positions.add(position.position_id)
+
+    def _reprice(self, market: Tuple[str, str], price: float) -> int:
+        ids = self._by_market.get(market, ())
+        for position_id in ids:
+            self._set_price(self._positions[position_id], price)
+        return len(ids)
+
+    def _record(self, record: Dict, sync: bool = False):
+        if not self.recovered:
+            raise RuntimeError("PositionStore.recover() must run before changes are recorded")
+        self.journal.append(record, sync)
+        self._apply(record)
+        self.changes += 1
+
+    def apply_prices(self, prices: Dict[Tuple[str, str], float]) -> int:
+        """Reprice every monitored position from one {(exchange, symbol): price} snapshot; returns positions repriced"""
+        with self._lock:
+            prices = [(exchange, symbol, float(price)) for (exchange, symbol), price in prices.items()
+                      if (exchange, symbol) in self._by_market]
+            if not prices:
+                return 0
+            self._record({'op': 'prices', 'prices': prices})
+            return sum(len(self._by_market[(exchange, symbol)]) for exchange, symbol, _ in prices)
+
+    def update_price(self, position_id: int, price: float):
+        with self._lock:
+            self._record({'op': 'price', 'position_id': position_id, 'price': float(price)})
+
+    def set_stop_loss(self, trade_id: int, stop_loss: float):
+        with self._lock:
+            self._record({'op': 'stop_loss', 'trade_id': trade_id, 'stop_loss': _float(stop_loss)}, sync=True)
+
+    def close_position(self, position_id: int):
+        """Stop monitoring a position"""
+        with self._lock:
+            self._record({'op': 'close_position', 'position_id': position_id}, sync=True)
+
+    def close_trade(self, trade_id: int, exit_price: float, exit_time: datetime = None):
+        """Close a trade at `exit_price`; durable on return"""
+        exit_time = exit_time or datetime.now()
+        with self._lock:
+            self._record({'op': 'close_trade', 'trade_id': trade_id, 'exit_price': float(exit_price),
+                          'exit_time': exit_time.isoformat()}, sync=True)
+
+    # ---- reads ----
+
+    def get(self, position_id: int) -> Optional[Dict]:
+        with self._lock:
+            position = self._positions.get(position_id)
+            if position is None:
+                return None
+            trade = self._trades[position.trade_id]
+            return {
+                'position_id': position.position_id, 'trade_id': trade.trade_id, 'exchange': position.exchange,
+                'symbol': trade.symbol, 'position_type': trade.position_type, 'entry_price': trade.entry_price,
+                'quantity': trade.quantity, 'current_price': position.current_price,
+                'current_profit_loss': position.current_profit_loss, 'monitoring': position.monitoring,
+                'status': trade.status, 'exit_price': trade.exit_price, 'exit_time': trade.exit_time,
+                'profit_loss': trade.profit_loss, 'stop_loss': trade.stop_loss,
+            }
+
+    def position_ids(self) -> List[int]:
+        """IDs of every position the store holds"""
+        with self._lock:
+            return list(self._positions)
+
+    def positions(self) -> List[Dict]:
+        with self._lock:
+            ids = list(self._positions)
+        return [row for row in map(self.get, ids) if row is not None]
+
+    # ---- flushing ----
+
+    def flush(self) -> int:
+        """Write every changed row in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                dirty_positions, self._dirty_positions = self._dirty_positions, set()
+                dirty_trades, self._dirty_trades = self._dirty_trades, set()
+                positions = [(p.position_id, p.current_price, p.current_profit_loss, p.monitoring)
+                             for p in map(self._positions.get, dirty_positions) if p is not None]
+                trades = [(t.trade_id, t.status, t.exit_price, t.exit_time, t.profit_loss, t.stop_loss)
+                          for t in map(self._trades.get, dirty_trades) if t is not None]
+                # Everything journaled so far is in this snapshot; later changes go to a new segment
+                finished = self.journal.rotate()
+            try:
+                if positions or trades:
+                    PositionQueries.write_states(positions, trades)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Position store flush of {len(positions) + len(trades)} rows failed: {e}")
+                with self._lock:
+                    self._dirty_positions |= dirty_positions
+                    self._dirty_trades |= dirty_trades
+                return 0
+            self.journal.discard(finished)
+            self.flushes += 1
+            self.flushed_rows += len(positions) + len(trades)
+            self.last_flush = datetime.now()
+            self._evict()
+            return len(positions) + len(trades)
+
+    def _evict(self):
+        """Forget closed positions and trades whose final state has been written"""
+        with self._lock:
+            for position_id, position in list(self._positions.items()):
+                if not position.monitoring and position_id not in self._dirty_positions:
+                    trade = self._trades.get(position.trade_id)
+                    if trade is None or (trade.status != 'OPEN' and trade.trade_id not in self._dirty_trades):
+                        del self._positions[position_id]
+            referenced = {position.trade_id for position in self._positions.values()}
+            for trade_id, trade in list(self._trades.items()):
+                if trade_id not in referenced and trade.status != 'OPEN' and trade_id not in self._dirty_trades:
+                    del self._trades[trade_id]
+
+    def start(self):
+        """Recover if needed, then sync the journal and flush in a background thread"""
+        if db.pool is None:
+            # The flush thread would share the single connection (and its transactions) with the caller
+            raise RuntimeError("PositionStore.start() needs a pooled database connection (db.connect(pooled=True))")
+        if not self.recovered:
+            self.recover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='position-store', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and write everything pending"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.journal.close()
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        next_reload = time.monotonic() + self.reload_interval
+        while not self._stop.wait(self.sync_interval):
+            try:
+                with self._lock:
+                    self.journal.sync()
+                if time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+                if time.monotonic() >= next_reload:
+                    next_reload = time.monotonic() + self.reload_interval
+                    self.load_new()
+            except Exception as e:
+                logger.error(f"Position store background flush failed: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'positions': len(self._positions),
+                'trades': len(self._trades),
+                'dirty_positions': len(self._dirty_positions),
+                'dirty_trades': len(self._dirty_trades),
+                'changes': self.changes,
+                'journal_records': self.journal.appended,
+                'journal_segment': self.journal.segment,
+                'flushes': self.flushes,
+                'flushed_rows': self.flushed_rows,
+                'failed_flushes': self.failed_flushes,
+                'last_flush': self.last_flush.isoformat() if self.last_flush else None,
+            }
+
+
+# Global position store, recovered and started by the application when enabled
+position_store = PositionStore()
@@ -0,0 +1,78 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict
+from src.config.index import Config
+from src.database.queries import PositionQueries
+from src.database.queries_signals import SignalQueries
+from src.exchanges.ticker_cache import TickerCache, ticker_cache
+from src.trading.position_store import PositionStore
+
+logger = logging.getLogger(__name__)
+
+
+class PriceFeed:
+    """Writes ticker cache snapshots to position and signal prices in a background thread
+
+    Every `interval` seconds the fresh prices in `cache` reprice the monitored
+    positions and set current_price on the signals created in the last
+    `signal_window`. Positions take the price of their own exchange
+    (`cache.exchange_prices()`); signals name no exchange and take the latest price
+    on any of them (`cache.prices()`). With a PositionStore the positions it holds
+    are repriced in memory, and the ones it has not picked up yet with one
+    PositionQueries.apply_price_snapshot statement; without a store that statement
+    reprices them all. An in-process monitoring loop reads the same
+    `cache.prices()` snapshot for TriggerIndex.on_prices and PositionBook.set_prices.
+    """
+
+    def __init__(self, cache: TickerCache = ticker_cache, interval: float = None, signal_window: timedelta = None):
+        self.cache = cache
+        self.interval = Config.MARKET_DATA_PUBLISH_INTERVAL if interval is None else interval
+        self.signal_window = signal_window or timedelta(hours=Config.MARKET_DATA_SIGNAL_WINDOW_HOURS)
+        self.store = None
+        self.publishes = 0
+        self.last_publish = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def publish(self) -> Dict[str, int]:
+        """Apply one snapshot; returns the positions and signals repriced"""
+        market_prices = self.cache.exchange_prices()
+        if not market_prices:
+            return {'positions': 0, 'signals': 0}
+        if self.store is not None:
+            positions = self.store.apply_prices(market_prices)
+            positions += PositionQueries.apply_price_snapshot(market_prices, self.store.position_ids())
+        else:
+            positions = PositionQueries.apply_price_snapshot(market_prices)
+        # signals.creation_time is the Telegram message date, naive UTC
+        signals = SignalQueries.update_signal_prices_by_symbol(self.cache.prices(),
+                                                               datetime.utcnow() - self.signal_window)
+        self.publishes += 1
+        self.last_publish = datetime.now()
+        return {'positions': positions, 'signals': signals}
+
+    def start(self, store: PositionStore = None):
+        """Publish every `interval` seconds; prices go through `store` when given"""
+        self.store = store
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Publishing market prices failed: {e}")
+
+
+# Global feed, started by the application when market data is enabled
+price_feed = PriceFeed()
@@ -0,0 +1,258 @@
+import bisect
+import itertools
+import logging
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A LONG position's take profits fire when the price rises to them and its stop when
+# the price falls to it; a SHORT position's the other way round
+_FIRES_ABOVE = {('LONG', 'tp'), ('SHORT', 'sl')}
+
+
+class Trigger:
+    """One TP or SL level of a position (or signal)
+
+    `owner` identifies what the level belongs to (a position id, or ('signal', id)),
+    `index` is the TP number and `ref` the take_profit_levels row id, when known.
+    """
+
+    __slots__ = ('seq', 'owner', 'symbol', 'side', 'kind', 'price', 'level', 'index', 'ref', 'above')
+
+    def __init__(self, seq, owner, symbol, side, kind, price, index=None, ref=None):
+        self.seq = seq
+        self.owner = owner
+        self.symbol = symbol
+        self.side = side
+        self.kind = kind
+        self.price = price
+        self.level = float(price)
+        self.index = index
+        self.ref = ref
+        self.above = (side, kind) in _FIRES_ABOVE
+
+    @property
+    def key(self) -> Tuple[float, int]:
+        return self.level, self.seq
+
+    def __repr__(self):
+        return f"Trigger({self.owner!r}, {self.symbol}, {self.side} {self.kind}{self.index or ''} @ {self.price})"
+
+
+class _SymbolLevels:
+    """Sorted trigger keys of one symbol: those firing on a rise and those firing on a fall"""
+
+    __slots__ = ('above', 'below')
+
+    def __init__(self):
+        self.above: List[Tuple[float, int]] = []
+        self.below: List[Tuple[float, int]] = []
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+
+class TriggerIndex:
+    """In-memory TP/SL levels per symbol, kept sorted so a tick only touches crossed levels
+
+    Levels that fire when the price rises to them (LONG take profits, SHORT stops)
+    and those that fire when it falls to them are kept in two sorted lists per
+    symbol. `on_price` bisects each list once and cuts off the crossed end, so a
+    tick costs O(log n + fired) instead of a scan of every open position. A gap
+    past several levels fires all of them.
+
+    Fired triggers are removed from the index. When a stop loss fires, the rest of
+    the owner's levels are removed as well, since the position is being closed.
+    Positions are added and removed incrementally as they open and close. Thread-safe.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, _SymbolLevels] = {}
+        self._triggers: Dict[int, Trigger] = {}
+        self._by_owner: Dict[Hashable, List[int]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._triggers)
+
+    def __contains__(self, owner):
+        return owner in self._by_owner
+
+    def _insert(self, trigger: Trigger):
+        levels = self._symbols.get(trigger.symbol)
+        if levels is None:
+            levels = self._symbols[trigger.symbol] = _SymbolLevels()
+        bisect.insort(levels.above if trigger.above else levels.below, trigger.key)
+        self._triggers[trigger.seq] = trigger
+        self._by_owner.setdefault(trigger.owner, []).append(trigger.seq)
+
+    def _discard(self, trigger: Trigger):
+        """Remove a trigger still present in the sorted lists"""
+        levels = self._symbols.get(trigger.symbol)
+        if levels is None:
+            return
+        keys = levels.above if trigger.above else levels.below
+        position = bisect.bisect_left(keys, trigger.key)
+        if position < len(keys) and keys[position] == trigger.key:
+            del keys[position]
+        if not levels:
+            del self._symbols[trigger.symbol]
+
+    def _forget(self, trigger: Trigger):
+        """Drop a trigger's bookkeeping once it is out of the sorted lists"""
+        del self._triggers[trigger.seq]
+        seqs = self._by_owner.get(trigger.owner)
+        if seqs is not None:
+            seqs.remove(trigger.seq)
+            if not seqs:
+                del self._by_owner[trigger.owner]
+
+    def add(self, owner: Hashable, symbol: str, side: str, kind: str, price, index: int = None,
+            ref=None) -> Trigger:
+        """Index one 'tp' or 'sl' level for `owner`"""
+        if kind not in ('tp', 'sl'):
+            raise ValueError(f"Unknown trigger kind {kind!r}, expected 'tp' or 'sl'")
+        side = side.upper()
+        if side not in ('LONG', 'SHORT'):
+            raise ValueError(f"Unknown position side {side!r}, expected 'LONG' or 'SHORT'")
+        with self._lock:
+            trigger = Trigger(next(self._seq), owner, symbol, side, kind, price, index, ref)
+            self._insert(trigger)
+            return trigger
+
+    def add_position(self, owner: Hashable, symbol: str, side: str,
+                     take_profits: Sequence = (), stop_loss=None) -> int:
+        """Index a position's levels and return how many were added
+
+        `take_profits` holds prices, (price, ref) pairs or (price, ref, index) triples, in
+        TP order; None entries are skipped. Without an explicit index, an entry's TP
+        number is its position in the sequence.
+        """
+        added = 0
+        for position, take_profit in enumerate(take_profits, start=1):
+            price, ref, index = take_profit, None, position
+            if isinstance(take_profit, tuple):
+                price, ref = take_profit[:2]
+                if len(take_profit) > 2:
+                    index = take_profit[2]
+            if price is not None:
+                self.add(owner, symbol, side, 'tp', price, index, ref)
+                added += 1
+        if stop_loss is not None:
+            self.add(owner, symbol, side, 'sl', stop_loss)
+            added += 1
+        return added
+
+    def add_signal(self, signal: Dict, symbol: str, side: str = None) -> int:
+        """Index a signals row's tp1..tp4 and sl under ('signal', id)
+
+        The signals table has no symbol column, so the caller supplies it. The side
+        defaults to the one implied by tp1 against the entry price.
+        """
+        if side is None:
+            entry, tp1 = signal.get('source_entry_price'), signal.get('tp1')
+            if entry is None or tp1 is None:
+                raise ValueError(f"Cannot infer the side of signal {signal.get('id')} without entry and tp1")
+            side = 'LONG' if tp1 > entry else 'SHORT'
+        take_profits = [signal.get(f"tp{n}") for n in range(1, 5)]
+        return self.add_position(('signal', signal['id']), symbol, side, take_profits, signal.get('sl'))
+
+    def remove(self, trigger: Trigger) -> bool:
+        """Remove one trigger; False if it already fired or was removed"""
+        with self._lock:
+            if self._triggers.get(trigger.seq) is not trigger:
+                return False
+            self._discard(trigger)
+            self._forget(trigger)
+            return True
+
+    def remove_position(self, owner: Hashable) -> int:
+        """Remove every level of `owner` (e.g. when its position closes) and return how many"""
+        with self._lock:
+            return self._remove_owner(owner)
+
+    def _remove_owner(self, owner) -> int:
+        seqs = self._by_owner.pop(owner, ())
+        for seq in seqs:
+            self._discard(self._triggers.pop(seq))
+        return len(seqs)
+
+    def triggers_for(self, owner: Hashable) -> List[Trigger]:
+        with self._lock:
+            return [self._triggers[seq] for seq in self._by_owner.get(owner, ())]
+
+    def on_price(self, symbol: str, price) -> List[Trigger]:
+        """Fire and remove every level of `symbol` crossed by `price`"""
+        with self._lock:
+            self.ticks += 1
+            levels = self._symbols.get(symbol)
+            if levels is None:
+                return []
+            price = float(price)
+            keys = []
+            above = levels.above
+            if above and above[0][0] <= price:
+                cut = bisect.bisect_right(above, (price, float('inf')))
+                keys = above[:cut]
+                del above[:cut]
+            below = levels.below
+            if below and below[-1][0] >= price:
+                cut = bisect.bisect_left(below, (price, -1))
+                keys += below[cut:]
+                del below[cut:]
+            if not keys:
+                return []
+            fired = []
+            closed = []
+            for _, seq in keys:
+                trigger = self._triggers.get(seq)
+                if trigger is None:
+                    continue
+                self._forget(trigger)
+                fired.append(trigger)
+                if trigger.kind == 'sl':
+                    closed.append(trigger.owner)
+            for owner in closed:
+                self._remove_owner(owner)
+            if symbol in self._symbols and not levels:
+                del self._symbols[symbol]
+            self.fired += len(fired)
+            return fired
+
+    def on_prices(self, prices: Dict[str, float]) -> List[Trigger]:
+        """Apply a {symbol: price} snapshot and return every fired trigger"""
+        fired = []
+        for symbol, price in prices.items():
+            fired += self.on_price(symbol, price)
+        return fired
+
+    def load(self, positions: Iterable[Dict]) -> int:
+        """Index rows from PositionQueries.get_monitoring_details and return the number of levels"""
+        added = 0
+        for row in positions:
+            take_profits = list(zip(row['tp_prices'], row['tp_ids'], row['tp_numbers']))
+            added += self.add_position(row['position_id'], row['symbol'], row['position_type'],
+                                       take_profits, row.get('stop_loss'))
+        return added
+
+    def nearest(self, symbol: str) -> Tuple[Optional[float], Optional[float]]:
+        """(lowest level firing on a rise, highest level firing on a fall) for `symbol`"""
+        with self._lock:
+            levels = self._symbols.get(symbol)
+            if levels is None:
+                return None, None
+            return (levels.above[0][0] if levels.above else None,
+                    levels.below[-1][0] if levels.below else None)
+
+    def stats(self) -> Dict:
+        return {
+            'symbols': len(self._symbols),
+            'owners': len(self._by_owner),
+            'triggers': len(self._triggers),
+            'ticks': self.ticks,
+            'fired': self.fired,
+        }
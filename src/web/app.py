@@ -1,24 +1,44 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import logging
+import queue
+from datetime import timedelta
+from src.database.cache import reference_cache
 from src.database.connection import db
+from src.database.rows import fetch_dicts
 from src.database.queries_signals import (
     ExchangeQueries, SourceQueries, TradingPairQueries,
-    ExchangeTradingPairQueries, SignalQueries
+    ExchangeTradingPairQueries, SignalQueries, decode_page_cursor
 )
+from src.trading.portfolio import PositionBook
+from src.web.conditional import compress_response, conditional, invalidates, table_versions
+from src.web.json_provider import FastJSONProvider
+from src.web.signal_feed import signal_feed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Initialize database connection
-db.connect()
+MAX_SIGNALS_PAGE_SIZE = 1000
+SIGNAL_STREAM_KEEPALIVE = 15
+# updated_at is the writing transaction's start time, so a row can commit after rows with
+# later timestamps. Resuming re-reads this far behind the client's last event to catch them.
+SIGNAL_STREAM_RESUME_LOOKBACK = timedelta(seconds=60)
+
+# Initialize database connection pool so concurrent requests don't share one connection
+db.connect(pooled=True)
+
+# Track table versions for conditional GETs and compress large responses
+table_versions.start()
+app.after_request(compress_response)
 
 # ==================== EXCHANGES ====================
 
 @app.route('/api/exchanges', methods=['GET'])
+@conditional('exchanges')
 def get_exchanges():
     """Get all exchanges"""
     try:
@@ -30,6 +50,7 @@ def get_exchanges():
 
 
 @app.route('/api/exchanges', methods=['POST'])
+@invalidates('exchanges')
 def create_exchange():
     """Create a new exchange"""
     try:
@@ -61,6 +82,7 @@ def get_exchange(exchange_uuid):
 
 
 @app.route('/api/exchanges/<exchange_uuid>', methods=['PUT'])
+@invalidates('exchanges', 'sources', 'exchange_trading_pairs')
 def update_exchange(exchange_uuid):
     """Update exchange"""
     try:
@@ -79,6 +101,7 @@ def update_exchange(exchange_uuid):
             values.append(exchange_uuid)
             query = f"UPDATE exchanges SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP WHERE uuid = %s"
             cursor.execute(query, values)
+        ExchangeQueries.invalidate_cache(exchange_uuid)
         
         return jsonify({'message': 'Exchange updated'}), 200
     except Exception as e:
@@ -87,11 +110,13 @@ def update_exchange(exchange_uuid):
 
 
 @app.route('/api/exchanges/<exchange_uuid>', methods=['DELETE'])
+@invalidates('exchanges', 'sources', 'exchange_trading_pairs', 'signals')
 def delete_exchange(exchange_uuid):
     """Delete exchange"""
     try:
         with db.get_cursor() as cursor:
             cursor.execute("DELETE FROM exchanges WHERE uuid = %s", (exchange_uuid,))
+        ExchangeQueries.invalidate_cache(exchange_uuid)
         return jsonify({'message': 'Exchange deleted'}), 200
     except Exception as e:
         logger.error(f"Error deleting exchange: {e}")
@@ -101,6 +126,7 @@ def delete_exchange(exchange_uuid):
 # ==================== SOURCES ====================
 
 @app.route('/api/sources', methods=['GET'])
+@conditional('sources', 'exchanges')
 def get_sources():
     """Get all sources"""
     try:
@@ -113,21 +139,7 @@ def get_sources():
                 LEFT JOIN exchanges e ON s.exchange_uuid = e.uuid
                 ORDER BY s.name
             """)
-            results = cursor.fetchall()
-            sources = []
-            for result in results:
-                sources.append({
-                    'id': result[0],
-                    'uuid': result[1],
-                    'name': result[2],
-                    'exchange_uuid': result[3],
-                    'exchange_name': result[4],
-                    'telegram_group_id': result[5],
-                    'message_sample_short': result[6],
-                    'message_sample_long': result[7],
-                    'created_at': result[8],
-                    'updated_at': result[9]
-                })
+            sources = fetch_dicts(cursor)
             return jsonify(sources)
     except Exception as e:
         logger.error(f"Error getting sources: {e}")
@@ -135,6 +147,7 @@ def get_sources():
 
 
 @app.route('/api/sources', methods=['POST'])
+@invalidates('sources')
 def create_source():
     """Create a new source"""
     try:
@@ -158,6 +171,7 @@ def create_source():
 
 
 @app.route('/api/sources/<source_uuid>', methods=['PUT'])
+@invalidates('sources')
 def update_source(source_uuid):
     """Update source"""
     try:
@@ -176,6 +190,7 @@ def update_source(source_uuid):
             values.append(source_uuid)
             query = f"UPDATE sources SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP WHERE uuid = %s"
             cursor.execute(query, values)
+        SourceQueries.invalidate_cache(source_uuid)
         
         return jsonify({'message': 'Source updated'}), 200
     except Exception as e:
@@ -184,11 +199,13 @@ def update_source(source_uuid):
 
 
 @app.route('/api/sources/<source_uuid>', methods=['DELETE'])
+@invalidates('sources', 'signals')
 def delete_source(source_uuid):
     """Delete source"""
     try:
         with db.get_cursor() as cursor:
             cursor.execute("DELETE FROM sources WHERE uuid = %s", (source_uuid,))
+        SourceQueries.invalidate_cache(source_uuid)
         return jsonify({'message': 'Source deleted'}), 200
     except Exception as e:
         logger.error(f"Error deleting source: {e}")
@@ -198,6 +215,7 @@ def delete_source(source_uuid):
 # ==================== TRADING PAIRS ====================
 
 @app.route('/api/trading-pairs', methods=['GET'])
+@conditional('trading_pairs')
 def get_trading_pairs():
     """Get all trading pairs"""
     try:
@@ -209,6 +227,7 @@ def get_trading_pairs():
 
 
 @app.route('/api/trading-pairs', methods=['POST'])
+@invalidates('trading_pairs')
 def create_trading_pair():
     """Create a new trading pair"""
     try:
@@ -226,6 +245,7 @@ def create_trading_pair():
 
 
 @app.route('/api/trading-pairs/<pair_uuid>', methods=['PUT'])
+@invalidates('trading_pairs', 'exchange_trading_pairs')
 def update_trading_pair(pair_uuid):
     """Update trading pair"""
     try:
@@ -234,6 +254,7 @@ def update_trading_pair(pair_uuid):
             cursor.execute("""
                 UPDATE trading_pairs SET name = %s, updated_at = CURRENT_TIMESTAMP WHERE uuid = %s
             """, (data.get('name'), pair_uuid))
+        TradingPairQueries.invalidate_cache(pair_uuid)
         
         return jsonify({'message': 'Trading pair updated'}), 200
     except Exception as e:
@@ -242,11 +263,13 @@ def update_trading_pair(pair_uuid):
 
 
 @app.route('/api/trading-pairs/<pair_uuid>', methods=['DELETE'])
+@invalidates('trading_pairs', 'exchange_trading_pairs')
 def delete_trading_pair(pair_uuid):
     """Delete trading pair"""
     try:
         with db.get_cursor() as cursor:
             cursor.execute("DELETE FROM trading_pairs WHERE uuid = %s", (pair_uuid,))
+        TradingPairQueries.invalidate_cache(pair_uuid)
         return jsonify({'message': 'Trading pair deleted'}), 200
     except Exception as e:
         logger.error(f"Error deleting trading pair: {e}")
@@ -256,6 +279,7 @@ def delete_trading_pair(pair_uuid):
 # ==================== EXCHANGE TRADING PAIRS ====================
 
 @app.route('/api/exchange-trading-pairs', methods=['GET'])
+@conditional('exchange_trading_pairs', 'trading_pairs', 'exchanges')
 def get_exchange_trading_pairs():
     """Get all exchange-trading pair mappings"""
     try:
@@ -269,19 +293,7 @@ def get_exchange_trading_pairs():
                 LEFT JOIN exchanges e ON etp.exchange_uuid = e.uuid
                 ORDER BY tp.name, e.name
             """)
-            results = cursor.fetchall()
-            pairs = []
-            for result in results:
-                pairs.append({
-                    'id': result[0],
-                    'trading_pair_uuid': result[1],
-                    'trading_pair_name': result[2],
-                    'exchange_uuid': result[3],
-                    'exchange_name': result[4],
-                    'max_leverage': result[5],
-                    'created_at': result[6],
-                    'updated_at': result[7]
-                })
+            pairs = fetch_dicts(cursor)
             return jsonify(pairs)
     except Exception as e:
         logger.error(f"Error getting exchange trading pairs: {e}")
@@ -289,6 +301,7 @@ def get_exchange_trading_pairs():
 
 
 @app.route('/api/exchange-trading-pairs', methods=['POST'])
+@invalidates('exchange_trading_pairs')
 def create_exchange_trading_pair():
     """Create exchange-trading pair mapping"""
     try:
@@ -306,6 +319,7 @@ def create_exchange_trading_pair():
 
 
 @app.route('/api/exchange-trading-pairs/<int:pair_id>', methods=['PUT'])
+@invalidates('exchange_trading_pairs')
 def update_exchange_trading_pair(pair_id):
     """Update exchange-trading pair"""
     try:
@@ -314,6 +328,7 @@ def update_exchange_trading_pair(pair_id):
             cursor.execute("""
                 UPDATE exchange_trading_pairs SET max_leverage = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s
             """, (data.get('max_leverage'), pair_id))
+        ExchangeTradingPairQueries.invalidate_cache()
         
         return jsonify({'message': 'Exchange trading pair updated'}), 200
     except Exception as e:
@@ -322,11 +337,13 @@ def update_exchange_trading_pair(pair_id):
 
 
 @app.route('/api/exchange-trading-pairs/<int:pair_id>', methods=['DELETE'])
+@invalidates('exchange_trading_pairs')
 def delete_exchange_trading_pair(pair_id):
     """Delete exchange-trading pair"""
     try:
         with db.get_cursor() as cursor:
             cursor.execute("DELETE FROM exchange_trading_pairs WHERE id = %s", (pair_id,))
+        ExchangeTradingPairQueries.invalidate_cache()
         return jsonify({'message': 'Exchange trading pair deleted'}), 200
     except Exception as e:
         logger.error(f"Error deleting exchange trading pair: {e}")
@@ -336,6 +353,7 @@ def delete_exchange_trading_pair(pair_id):
 # ==================== SIGNALS ====================
 
 @app.route('/api/signals', methods=['GET'])
+@conditional('signals')
 def get_signals():
     """Get all signals"""
     try:
@@ -347,7 +365,92 @@ def get_signals():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/signals/page', methods=['GET'])
+@conditional('signals')
+def get_signals_page():
+    """Get one page of signals using an opaque keyset cursor"""
+    try:
+        limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_SIGNALS_PAGE_SIZE)
+        signals, next_cursor = SignalQueries.get_signals_page(
+            limit, request.args.get('cursor'), request.args.get('source_uuid')
+        )
+        return jsonify({'signals': signals, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting signals page: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/signals/export', methods=['GET'])
+def export_signals():
+    """Stream all signals as newline-delimited JSON"""
+    source_uuid = request.args.get('source_uuid')
+
+    def generate():
+        for signal in SignalQueries.iter_signals(source_uuid):
+            yield app.json.dumps(signal) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/signals/stream', methods=['GET'])
+def stream_signals():
+    """Push inserted, updated and deleted signals as Server-Sent Events
+
+    Clients reconnecting with a Last-Event-ID header (or `last_event_id` parameter) first
+    receive every signal changed since that event, then the live feed. The backfill starts
+    SIGNAL_STREAM_RESUME_LOOKBACK before the last event, so a client may see an event id it
+    already has again; events are whole signal states and safe to apply twice.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        position = decode_page_cursor(last_event_id) if last_event_id else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Subscribe before the backfill query so no change falls between the two
+    subscription = signal_feed.subscribe()
+
+    def event(event_id, op, signal):
+        return f"id: {event_id}\nevent: {op.lower()}\ndata: {app.json.dumps(signal)}\n\n"
+
+    def generate():
+        # Ids sent by the backfill; the live feed, subscribed before it, may repeat them
+        backfilled = set()
+        last = (position[0] - SIGNAL_STREAM_RESUME_LOOKBACK, 0) if position else None
+        try:
+            while last is not None:
+                backlog = SignalQueries.get_signals_changed_since(*last, limit=MAX_SIGNALS_PAGE_SIZE)
+                for signal in backlog:
+                    last = (signal['updated_at'], signal['id'])
+                    op = 'INSERT' if signal['created_at'] == signal['updated_at'] else 'UPDATE'
+                    event_id = signal_feed.event_id(signal)
+                    backfilled.add(event_id)
+                    yield event(event_id, op, signal)
+                if len(backlog) < MAX_SIGNALS_PAGE_SIZE:
+                    break
+            while True:
+                try:
+                    item = subscription.get(timeout=SIGNAL_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event_id, op, signal = item
+                if op != 'DELETE' and event_id in backfilled:
+                    backfilled.discard(event_id)
+                    continue
+                yield event(event_id, op, signal)
+        finally:
+            signal_feed.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/api/signals', methods=['POST'])
+@invalidates('signals')
 def create_signal():
     """Create a new signal"""
     try:
@@ -361,7 +464,8 @@ def create_signal():
             data.get('tp2'),
             data.get('tp3'),
             data.get('tp4'),
-            data.get('sl')
+            data.get('sl'),
+            data.get('symbol')
         )
         return jsonify({'id': signal_id}), 201
     except Exception as e:
@@ -370,6 +474,7 @@ def create_signal():
 
 
 @app.route('/api/signals/<int:signal_id>', methods=['PUT'])
+@invalidates('signals')
 def update_signal(signal_id):
     """Update signal"""
     try:
@@ -378,7 +483,7 @@ def update_signal(signal_id):
             updates = []
             values = []
             for key in ['creation_time', 'source_uuid', 'source_entry_price', 'current_price',
-                       'tp1', 'tp2', 'tp3', 'tp4', 'sl']:
+                       'tp1', 'tp2', 'tp3', 'tp4', 'sl', 'symbol']:
                 if key in data:
                     updates.append(f"{key} = %s")
                     values.append(data[key])
@@ -397,6 +502,7 @@ def update_signal(signal_id):
 
 
 @app.route('/api/signals/<int:signal_id>', methods=['DELETE'])
+@invalidates('signals')
 def delete_signal(signal_id):
     """Delete signal"""
     try:
@@ -408,12 +514,32 @@ def delete_signal(signal_id):
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== POSITIONS ====================
+
+@app.route('/api/positions', methods=['GET'])
+def get_positions():
+    """Monitored positions with unrealized P&L, exposure and distance to TP/SL, plus book totals"""
+    try:
+        book = PositionBook.load()
+        values = book.compute()
+        return jsonify({'positions': book.to_records(values), 'summary': book.summary(values)})
+    except Exception as e:
+        logger.error(f"Error getting positions: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 # ==================== UTILITY ENDPOINTS ====================
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'ok'}), 200
+    return jsonify({'status': 'ok', 'db_pool': db.pool_stats()}), 200
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Reference table cache hit/miss counters"""
+    return jsonify(reference_cache.stats()), 200
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+import uuid as uuid_lib
+from flask import make_response, request
+from src.database.listener import NotificationListener, REFERENCE_CHANNEL
+from src.web.signal_feed import SIGNAL_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+VERSIONED_TABLES = ['exchanges', 'sources', 'trading_pairs', 'exchange_trading_pairs', 'signals']
+COMPRESS_MIN_SIZE = 1024
+
+
+class TableVersions(NotificationListener):
+    """Per-table change counters kept current by the reference and signal NOTIFY channels
+
+    While the listener is connected, a list endpoint's ETag can be computed from the
+    versions of the tables it reads, so unchanged polls are answered with 304 before any
+    query runs. The epoch makes ETags from another process or an earlier run never match.
+    """
+
+    def __init__(self):
+        super().__init__([REFERENCE_CHANNEL, SIGNAL_CHANNEL])
+        self.epoch = uuid_lib.uuid4().hex[:8]
+        self._versions = {table: 0 for table in VERSIONED_TABLES}
+        # Whole-second Last-Modified values; every bump moves the changed tables past all earlier ones
+        self._clock = math.ceil(time.time())
+        self._modified = {table: self._clock for table in VERSIONED_TABLES}
+        self._lock = threading.Lock()
+
+    def bump(self, *tables):
+        """Record a change to the given tables
+
+        HTTP dates have whole-second resolution, so a change in the same second as the
+        previous one is stamped a second later; otherwise If-Modified-Since would keep
+        matching and clients would get a stale 304.
+        """
+        with self._lock:
+            self._clock = max(math.ceil(time.time()), self._clock + 1)
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._modified[table] = self._clock
+
+    def on_connect(self):
+        # Changes may have been missed while disconnected
+        self.bump(*VERSIONED_TABLES)
+
+    def dispatch(self, payload: str, channel: str):
+        if channel == SIGNAL_CHANNEL:
+            self.bump('signals')
+            return
+        try:
+            table = json.loads(payload).get('table')
+        except ValueError:
+            table = None
+        # Unknown payloads invalidate everything rather than risk a stale 304
+        self.bump(*([table] if table in self._versions else VERSIONED_TABLES))
+
+    def etag(self, tables, variant: bytes = b''):
+        """ETag for a response built from `tables`, or None when versions can't be trusted"""
+        if not self.connected:
+            return None
+        with self._lock:
+            versions = '.'.join(str(self._versions[table]) for table in tables)
+        variant = f"-{hashlib.md5(variant).hexdigest()[:12]}" if variant else ''
+        return f"{self.epoch}-{versions}{variant}"
+
+    def last_modified(self, tables):
+        with self._lock:
+            return max(self._modified[table] for table in tables)
+
+
+table_versions = TableVersions()
+
+
+def conditional(*tables):
+    """Serve a GET endpoint with ETag/Last-Modified derived from the versions of `tables`
+
+    With a live listener, a matching If-None-Match or If-Modified-Since returns 304
+    without calling the view. Otherwise the ETag falls back to a hash of the body,
+    which still saves the transfer but not the query.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = table_versions.etag(tables, request.query_string)
+            if etag is not None:
+                # Already whole seconds, so the advertised and compared values are the same
+                last_modified = table_versions.last_modified(tables)
+                if request.if_none_match:
+                    not_modified = request.if_none_match.contains_weak(etag)
+                else:
+                    not_modified = (request.if_modified_since is not None and
+                                    request.if_modified_since.timestamp() >= last_modified)
+                if not_modified:
+                    response = make_response('', 304)
+                    response.set_etag(etag, weak=True)
+                    return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if etag is not None:
+                response.set_etag(etag, weak=True)
+                response.last_modified = last_modified
+            else:
+                response.add_etag(weak=True)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables):
+    """Bump the versions of `tables` after a successful write through the decorated view
+
+    The NOTIFY listener would catch the change too; bumping here makes it visible to
+    this process's next poll without waiting for the round trip.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            response = make_response(view(*args, **kwargs))
+            if response.status_code < 400:
+                table_versions.bump(*tables)
+            return response
+        return wrapper
+    return decorator
+
+
+def compress_response(response):
+    """gzip large responses for clients that accept it (after_request hook)"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
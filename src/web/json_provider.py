@@ -0,0 +1,59 @@
+import orjson
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+# Same output shape as Flask's default provider: sorted keys, compact separators
+ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def _http_datetime(value: datetime) -> str:
+    """werkzeug.http.http_date for datetimes, without its generic parsing overhead"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        _WEEKDAYS[value.weekday()], value.day, _MONTHS[value.month - 1],
+        value.year, value.hour, value.minute, value.second
+    )
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return _http_datetime(obj)
+    if isinstance(obj, date):
+        return http_date(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson
+
+    Decimals and timestamps are encoded exactly like Flask's default provider (strings
+    and RFC 822 dates), so responses are unchanged apart from non-ASCII text being sent
+    as UTF-8 instead of \\u escapes. Pretty-printed (debug) output still goes through
+    the standard library.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs and kwargs != {'separators': (',', ':')}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
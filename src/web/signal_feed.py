@@ -0,0 +1,115 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from src.database.listener import NotificationListener
+from src.database.queries_signals import SIGNAL_COLUMNS, encode_page_cursor
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_CHANNEL = 'signal_changes'
+TIMESTAMP_COLUMNS = ('creation_time', 'created_at', 'updated_at')
+
+
+class SignalFeed(NotificationListener):
+    """Fans out signal inserts, updates and deletes from the 'signal_changes' channel to subscribers
+
+    Each subscriber gets a bounded queue of (event_id, op, signal) tuples, where event_id
+    is an opaque (updated_at, id) token usable for resuming. A subscriber that falls
+    `max_queue` events behind is cut off and receives None, so it can reconnect and resume
+    instead of holding back the feed.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        super().__init__(SIGNAL_CHANNEL)
+        self.max_queue = max_queue
+        self.dropped_subscribers = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._connected_once = False
+
+    def subscribe(self, timeout: float = 10.0) -> queue.Queue:
+        """Register a new subscriber queue, starting the listener on first use
+
+        Returns once LISTEN is active (or after `timeout` seconds if the database is
+        unreachable), so a query made after subscribing cannot miss a change.
+        """
+        subscription = queue.Queue(self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if not self.running:
+                self.start()
+        deadline = time.monotonic() + timeout
+        while not self.connected and self.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if not self.connected:
+            logger.warning("Signal feed is not listening yet; changes made now may be missed")
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def on_connect(self):
+        # After a reconnect, end every stream so clients resume from their last event id
+        if self._connected_once:
+            with self._lock:
+                subscribers, self._subscribers = self._subscribers, set()
+            for subscription in subscribers:
+                self._close(subscription)
+        self._connected_once = True
+
+    @staticmethod
+    def _close(subscription: queue.Queue):
+        try:
+            subscription.put_nowait(None)
+        except queue.Full:
+            # Make room for the end-of-stream marker
+            subscription.get_nowait()
+            subscription.put_nowait(None)
+
+    @staticmethod
+    def parse_signal(row: dict) -> dict:
+        """Convert a JSON signal row from the trigger into the shape SignalQueries returns"""
+        signal = {column: row.get(column) for column in SIGNAL_COLUMNS}
+        for column in TIMESTAMP_COLUMNS:
+            if signal[column] is not None:
+                signal[column] = datetime.fromisoformat(signal[column])
+        return signal
+
+    @staticmethod
+    def event_id(signal: dict) -> str:
+        return encode_page_cursor(signal['updated_at'], signal['id'])
+
+    def dispatch(self, payload: str, channel: str = SIGNAL_CHANNEL):
+        try:
+            change = json.loads(payload, parse_float=Decimal)
+            signal = self.parse_signal(change['signal'])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Ignoring malformed signal change payload: {payload!r}")
+            return
+        event = (self.event_id(signal), change.get('op'), signal)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                self.unsubscribe(subscription)
+                self.dropped_subscribers += 1
+                self._close(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'notifications': self.notifications,
+                'dropped_subscribers': self.dropped_subscribers,
+            }
+
+
+# Global feed instance, started lazily by the first subscriber
+signal_feed = SignalFeed()